@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import List, Optional
+from app.core.profiler import profile_store
+from app.core.security import verify_admin_token
+from app.schemas import ProfileSummary
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow only requests carrying the configured X-Admin-Token"""
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
+
+@router.get("/profiles", response_model=List[ProfileSummary], dependencies=[Depends(require_admin)])
+def list_profiles():
+    """List captured request profiles, newest first (this worker only)"""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+def get_profile(profile_id: int):
+    """
+    Folded stacks for one profile, ready for flamegraph.pl or speedscope
+    (one `frame;frame;frame count` line per distinct stack)
+    """
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    return PlainTextResponse(profile.folded())
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, Reel, MicroCourse
+from app.models import Reel, MicroCourse
 from app.schemas import SummaryRequest, SummaryResponse, QuizResponse
-from app.api.auth import get_current_user
+from app.api.auth import Principal, get_current_principal
 from app.services.ai_service import ai_service
 
 router = APIRouter(prefix="/ai", tags=["AI Features"])
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/ai", tags=["AI Features"])
 @router.post("/summary", response_model=SummaryResponse)
 def generate_summary(
     request: SummaryRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Generate AI summary for a reel or micro-course"""
@@ -65,7 +65,7 @@ def generate_summary(
 @router.post("/quiz", response_model=QuizResponse)
 def generate_quiz(
     request: SummaryRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Generate AI quiz for a reel or micro-course"""
@@ -1,17 +1,61 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.request_stats import current_request_stats
+from app.database import get_db, SessionLocal
 from app.models import User
 from app.schemas import UserCreate, UserLogin, Token, UserResponse
-from app.core.security import verify_password, get_password_hash, create_access_token, decode_access_token
+from app.core.security import (
+    verify_password, get_password_hash, create_access_token, decode_access_token, PasswordHashQueueFull
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
-    """Get current authenticated user from JWT token"""
+@dataclass(frozen=True)
+class Principal:
+    """Detached snapshot of the authenticated user, safe to cache across requests"""
+    id: int
+    email: str
+    full_name: Optional[str]
+    role: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            created_at=user.created_at
+        )
+
+
+# Principals keyed by user id; invalidated on any User update/delete in this process
+_principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's cached principal"""
+    _principal_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Principal:
+    """Get current authenticated user from JWT token without a DB round trip when cached"""
     token = credentials.credentials
     payload = decode_access_token(token)
     
@@ -28,8 +72,40 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Invalid token payload"
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user_id = int(user_id)
+    stats = current_request_stats.get()
+    if stats is not None:
+        # Attributes slow-log entries to the user
+        stats.user_id = user_id
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    # Short-lived session so a cache hit never checks out a connection
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        principal = Principal.from_user(user)
+    finally:
+        db.close()
+    
+    _principal_cache.set(user_id, principal)
+    return principal
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user as an ORM object (for endpoints that modify it)"""
+    user = db.query(User).filter(User.id == principal.id).first()
     if not user:
+        invalidate_user(principal.id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -38,6 +114,15 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return user
 
 
+def _too_busy() -> HTTPException:
+    """Fast rejection while the password hashing queue is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts right now, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=Token)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
@@ -51,7 +136,10 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = get_password_hash(user_data.password)
+    except PasswordHashQueueFull:
+        raise _too_busy()
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -86,7 +174,11 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    try:
+        password_ok = verify_password(credentials.password, user.hashed_password)
+    except PasswordHashQueueFull:
+        raise _too_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -103,6 +195,6 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: Principal = Depends(get_current_principal)):
     """Get current user profile"""
     return UserResponse.model_validate(current_user)
@@ -4,7 +4,7 @@ from typing import List
 from app.database import get_db
 from app.models import User, Comment, Reel
 from app.schemas import CommentCreate, CommentResponse
-from app.api.auth import get_current_user
+from app.api.auth import Principal, get_current_principal
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/comments", tags=["Comments"])
 @router.post("/", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
 def create_comment(
     comment_data: CommentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Add a comment to a reel"""
@@ -44,20 +44,21 @@ def create_comment(
 @router.get("/reel/{reel_id}", response_model=List[CommentResponse])
 def get_reel_comments(
     reel_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all comments for a reel"""
     
-    comments = db.query(Comment).filter(
+    rows = db.query(Comment, User.full_name, User.email).outerjoin(
+        User, User.id == Comment.user_id
+    ).filter(
         Comment.reel_id == reel_id
     ).order_by(Comment.created_at.desc()).all()
     
     results = []
-    for comment in comments:
-        user = db.query(User).filter(User.id == comment.user_id).first()
+    for comment, full_name, email in rows:
         response = CommentResponse.model_validate(comment)
-        response.user_name = user.full_name or user.email if user else "Unknown"
+        response.user_name = full_name or email or "Unknown"
         results.append(response)
     
     return results
@@ -1,18 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from app.database import get_db
-from app.models import User, MicroCourse, Reel
+from app.models import MicroCourse, Reel, course_reels
 from app.schemas import MicroCourseCreate, MicroCourseResponse, ReelResponse
-from app.api.auth import get_current_user
+from app.api.auth import Principal, get_current_principal
+from app.services.progress_service import progress_service
+from app.core.http_cache import compute_etag, is_not_modified, not_modified, set_cache_headers
 
 router = APIRouter(prefix="/courses", tags=["Micro-Courses"])
 
 
+def _courses_etag(db: Session, course_rows: List[tuple]) -> str:
+    """ETag over (id, version) of the courses plus version/views of every embedded reel"""
+    course_ids = [row[0] for row in course_rows]
+    reel_rows = db.query(course_reels.c.course_id, Reel.id, Reel.version, Reel.views_count).join(
+        Reel, Reel.id == course_reels.c.reel_id
+    ).filter(course_reels.c.course_id.in_(course_ids)).order_by(
+        course_reels.c.course_id, Reel.id
+    ).all() if course_ids else []
+    return compute_etag("courses", [tuple(row) for row in course_rows], [tuple(row) for row in reel_rows])
+
+
 @router.post("/", response_model=MicroCourseResponse, status_code=status.HTTP_201_CREATED)
 def create_course(
     course_data: MicroCourseCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new micro-course (creators only)"""
@@ -51,6 +64,9 @@ def create_course(
     new_course.reels = reels
     
     db.add(new_course)
+    db.flush()
+    # Learners may already have completed some of these reels
+    progress_service.recompute_course(db, new_course.id)
     db.commit()
     db.refresh(new_course)
     
@@ -64,39 +80,65 @@ def create_course(
 @router.get("/{course_id}", response_model=MicroCourseResponse)
 def get_course(
     course_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific micro-course by ID"""
     
-    course = db.query(MicroCourse).filter(MicroCourse.id == course_id).first()
-    if not course:
+    course_row = db.query(MicroCourse.id, MicroCourse.version).filter(MicroCourse.id == course_id).first()
+    if not course_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Micro-course not found"
         )
     
-    response = MicroCourseResponse.model_validate(course)
-    response.reels = [ReelResponse.model_validate(r) for r in course.reels]
+    etag = _courses_etag(db, [course_row])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
     
-    return response
+    course = db.query(MicroCourse).options(selectinload(MicroCourse.reels)).filter(MicroCourse.id == course_id).first()
+    result = MicroCourseResponse.model_validate(course)
+    result.reels = [ReelResponse.model_validate(r) for r in course.reels]
+    set_cache_headers(response, etag)
+    
+    return result
 
 
 @router.get("/", response_model=List[MicroCourseResponse])
 def list_courses(
+    request: Request,
+    response: Response,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """List all micro-courses"""
     
-    courses = db.query(MicroCourse).order_by(MicroCourse.created_at.desc()).offset(offset).limit(limit).all()
+    course_rows = db.query(MicroCourse.id, MicroCourse.version).order_by(
+        MicroCourse.created_at.desc()
+    ).offset(offset).limit(limit).all()
+    
+    etag = _courses_etag(db, course_rows)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    course_ids = [row[0] for row in course_rows]
+    courses_by_id = {
+        course.id: course
+        for course in db.query(MicroCourse).options(selectinload(MicroCourse.reels)).filter(MicroCourse.id.in_(course_ids))
+    }
     
     results = []
-    for course in courses:
-        response = MicroCourseResponse.model_validate(course)
-        response.reels = [ReelResponse.model_validate(r) for r in course.reels]
-        results.append(response)
+    for course_id in course_ids:
+        course = courses_by_id.get(course_id)
+        if course is None:
+            continue
+        result = MicroCourseResponse.model_validate(course)
+        result.reels = [ReelResponse.model_validate(r) for r in course.reels]
+        results.append(result)
+    set_cache_headers(response, etag)
     
     return results
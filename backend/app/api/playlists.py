@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from app.database import get_db
-from app.models import User, Playlist, Reel
+from app.models import Playlist, Reel, playlist_reels
 from app.schemas import PlaylistCreate, PlaylistResponse, PlaylistAddReel, ReelResponse
-from app.api.auth import get_current_user
+from app.api.auth import Principal, get_current_principal
+from app.core.http_cache import compute_etag, is_not_modified, not_modified, set_cache_headers
 
 router = APIRouter(prefix="/playlists", tags=["Playlists"])
 
@@ -12,7 +13,7 @@ router = APIRouter(prefix="/playlists", tags=["Playlists"])
 @router.post("/", response_model=PlaylistResponse, status_code=status.HTTP_201_CREATED)
 def create_playlist(
     playlist_data: PlaylistCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new playlist"""
@@ -34,7 +35,7 @@ def create_playlist(
 def add_reel_to_playlist(
     playlist_id: int,
     reel_data: PlaylistAddReel,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Add a reel to a playlist"""
@@ -73,7 +74,7 @@ def add_reel_to_playlist(
 
 @router.get("/", response_model=List[PlaylistResponse])
 def get_my_playlists(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all playlists for current user"""
@@ -92,23 +93,34 @@ def get_my_playlists(
 @router.get("/{playlist_id}", response_model=PlaylistResponse)
 def get_playlist(
     playlist_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific playlist"""
     
-    playlist = db.query(Playlist).filter(
+    playlist_row = db.query(Playlist.id, Playlist.version).filter(
         Playlist.id == playlist_id,
         Playlist.user_id == current_user.id
     ).first()
     
-    if not playlist:
+    if not playlist_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Playlist not found"
         )
     
-    response = PlaylistResponse.model_validate(playlist)
-    response.reels = [ReelResponse.model_validate(r) for r in playlist.reels]
+    reel_rows = db.query(Reel.id, Reel.version, Reel.views_count).join(
+        playlist_reels, playlist_reels.c.reel_id == Reel.id
+    ).filter(playlist_reels.c.playlist_id == playlist_id).order_by(Reel.id).all()
+    etag = compute_etag("playlist", tuple(playlist_row), [tuple(row) for row in reel_rows])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
     
-    return response
+    playlist = db.query(Playlist).options(selectinload(Playlist.reels)).filter(Playlist.id == playlist_id).first()
+    result = PlaylistResponse.model_validate(playlist)
+    result.reels = [ReelResponse.model_validate(r) for r in playlist.reels]
+    set_cache_headers(response, etag)
+    
+    return result
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List
 from app.database import get_db
-from app.models import User, Progress, MicroCourse, Reel
-from app.schemas import ProgressCreate, ProgressResponse, CourseProgressResponse
-from app.api.auth import get_current_user
+from app.models import Progress
+from app.schemas import ProgressCreate, ProgressResponse, CourseProgressResponse, WatchHeartbeat, WatchPositionResponse
+from app.api.auth import Principal, get_current_principal
+from app.services.watch_service import watch_service
+from app.services.progress_service import progress_service
+from app.services.trending_service import trending_service
+from app.services.feed_materializer import feed_materializer
+from app.services.watched_set_service import watched_set_service
 
 router = APIRouter(prefix="/progress", tags=["Progress"])
 
@@ -13,25 +18,34 @@ router = APIRouter(prefix="/progress", tags=["Progress"])
 @router.post("/", response_model=ProgressResponse, status_code=status.HTTP_201_CREATED)
 def mark_progress(
     progress_data: ProgressCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Mark a reel or course as watched/completed"""
     
     # Check if progress already exists
+    # `== None` renders as IS NULL, so reel-only and course-only entries match too
     existing = db.query(Progress).filter(
         Progress.user_id == current_user.id,
-        Progress.reel_id == progress_data.reel_id if progress_data.reel_id else False,
-        Progress.course_id == progress_data.course_id if progress_data.course_id else False
+        Progress.reel_id == progress_data.reel_id,
+        Progress.course_id == progress_data.course_id
     ).first()
     
     if existing:
         # Update existing
+        was_completed = bool(existing.completed)
         existing.completed = progress_data.completed
         if progress_data.completed:
             existing.completed_at = datetime.utcnow()
+        if existing.reel_id and was_completed != progress_data.completed:
+            progress_service.on_reel_completion_changed(
+                db, current_user.id, existing.reel_id, 1 if progress_data.completed else -1, existing.id
+            )
+            feed_materializer.mark_stale(db, current_user.id)
         db.commit()
         db.refresh(existing)
+        if existing.reel_id and progress_data.completed and not was_completed:
+            trending_service.record_completion(existing.reel_id)
         return ProgressResponse.model_validate(existing)
     
     # Create new progress entry
@@ -43,61 +57,76 @@ def mark_progress(
         completed_at=datetime.utcnow() if progress_data.completed else None
     )
     
+    if progress_data.reel_id and progress_data.completed:
+        progress_service.on_reel_completion_changed(db, current_user.id, progress_data.reel_id, 1)
     db.add(new_progress)
+    if progress_data.reel_id:
+        watched_set_service.add(db, current_user.id, progress_data.reel_id)
+        feed_materializer.mark_stale(db, current_user.id)
     db.commit()
     db.refresh(new_progress)
+    if progress_data.reel_id and progress_data.completed:
+        trending_service.record_completion(progress_data.reel_id)
     
     return ProgressResponse.model_validate(new_progress)
 
 
+@router.post("/heartbeat", status_code=status.HTTP_202_ACCEPTED)
+def watch_heartbeat(
+    heartbeat: WatchHeartbeat,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Record playback position; coalesced in memory and flushed periodically"""
+    watch_service.record(current_user.id, heartbeat.reel_id, heartbeat.position_seconds)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/watch/{reel_id}", response_model=WatchPositionResponse)
+def get_watch_position(
+    reel_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get the position to resume playback of a reel from"""
+    position = watch_service.get_position(db, current_user.id, reel_id)
+    return WatchPositionResponse(reel_id=reel_id, position_seconds=position)
+
+
+@router.get("/courses", response_model=List[CourseProgressResponse])
+def get_courses_progress(
+    course_ids: List[int] = Query(..., max_length=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get progress for many micro-courses at once (unknown ids are skipped)"""
+    
+    return [
+        CourseProgressResponse(**item)
+        for item in progress_service.get_courses_progress(db, current_user.id, course_ids)
+    ]
+
+
 @router.get("/course/{course_id}", response_model=CourseProgressResponse)
 def get_course_progress(
     course_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get progress for a specific micro-course"""
     
-    # Get course
-    course = db.query(MicroCourse).filter(MicroCourse.id == course_id).first()
-    if not course:
+    results = progress_service.get_courses_progress(db, current_user.id, [course_id])
+    if not results:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    # Get total reels in course
-    total_reels = len(course.reels)
-    
-    if total_reels == 0:
-        return CourseProgressResponse(
-            course_id=course_id,
-            total_reels=0,
-            completed_reels=0,
-            completion_percentage=0.0
-        )
-    
-    # Get completed reels for this user
-    reel_ids = [r.id for r in course.reels]
-    completed = db.query(Progress).filter(
-        Progress.user_id == current_user.id,
-        Progress.reel_id.in_(reel_ids),
-        Progress.completed == True
-    ).count()
-    
-    completion_percentage = (completed / total_reels) * 100
-    
-    return CourseProgressResponse(
-        course_id=course_id,
-        total_reels=total_reels,
-        completed_reels=completed,
-        completion_percentage=round(completion_percentage, 2)
-    )
+    return CourseProgressResponse(**results[0])
 
 
 @router.get("/", response_model=List[ProgressResponse])
 def get_my_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get all progress entries for current user"""
@@ -1,32 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import logging
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, UploadFile, File, Form, Request, Response
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, Query as SAQuery, load_only, contains_eager
+from typing import List, Optional, Tuple
 from app.database import get_db
-from app.models import User, Reel
-from app.schemas import ReelCreate, ReelResponse, ReelUploadResponse, FeedRequest
-from app.api.auth import get_current_user
-from app.services.feed_service import feed_service
+from app.models import User, Reel, ReelTrending
+from app.schemas import ReelCreate, ReelResponse, ReelUploadResponse, ReelCard, TrendingReel, RelatedReelCard, SimilarReelCard, ReelSearchPage, ReelMoments, TranscriptMoment, FeedRequest
+from app.api.auth import Principal, get_current_principal
+from app.core.request_stats import request_phase
+from app.core.http_cache import compute_etag, is_not_modified, not_modified, set_cache_headers
+from app.services.feed_pipeline import feed_pipeline, FeedContext
+from app.services.feed_materializer import feed_materializer, FEED_SERVED
+from app.services.cold_start_service import cold_start_feed
 from app.services.cloudinary_service import cloudinary_service
-from app.services.ai_service import ai_service
+from app.services.progress_service import progress_service
+from app.services.search_service import search_service, InvalidCursor
+from app.services.transcript_service import transcript_service
+from app.services.tag_service import tag_index
+from app.services.trending_service import trending_service
+from app.services.related_service import related_service
+from app.services.embedding_service import embedding_index
+from app.services.reel_processing_service import reel_processing_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reels", tags=["Reels"])
 
+REEL_CARD_FIELDS = tuple(ReelCard.model_fields)
+
+
+def reel_card_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated ReelCard fields to return (sparse fieldset)")
+) -> Tuple[str, ...]:
+    """Parse and validate the `fields=` sparse fieldset parameter"""
+    if not fields:
+        return REEL_CARD_FIELDS
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in ReelCard.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested or REEL_CARD_FIELDS
+
+
+def reel_card_query(db: Session) -> SAQuery:
+    """Reels joined to their creator, loading only the columns a ReelCard needs"""
+    columns = [getattr(Reel, name) for name in REEL_CARD_FIELDS if name != "creator_name"]
+    return db.query(Reel).join(Reel.creator).options(
+        load_only(*columns),
+        contains_eager(Reel.creator).load_only(User.full_name, User.email)
+    )
+
+
+def reel_card_dict(reel: Reel, fields: Tuple[str, ...] = REEL_CARD_FIELDS) -> dict:
+    """Plain-dict ReelCard, rendered by orjson without a pydantic round trip"""
+    card = {name: getattr(reel, name) for name in fields if name != "creator_name"}
+    if "creator_name" in fields:
+        creator = reel.creator
+        card["creator_name"] = (creator.full_name or creator.email) if creator else "Unknown"
+    return card
+
 @router.post("/upload", response_model=ReelUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_reel(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="Video file (.mp4, .mov, etc.)"),
     title: str = Form(...),
     description: Optional[str] = Form(None),
     tags: Optional[str] = Form(None),
     difficulty_level: str = Form("beginner"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Upload a new reel video to Cloudinary and generate AI metadata
     - Accepts multipart/form-data with video file
     - Uploads to Cloudinary
-    - Generates AI summary and quiz
     - Saves to database
+    - Transcribes and generates AI summary and quiz in the background, after responding
     """
     if current_user.role != "creator":
         raise HTTPException(
@@ -52,33 +106,14 @@ async def upload_reel(
     db.add(new_reel)
     db.commit()
     db.refresh(new_reel)
+    tag_index.add(new_reel.tags)
     
-    # Generate AI metadata asynchronously (or sync for simplicity)
-    try:
-        summary_data = ai_service.generate_summary(
-            title=title,
-            description=description or "",
-            tags=tags or "",
-            difficulty=difficulty_level
-        )
-        
-        new_reel.ai_summary = summary_data.get("summary")
-        new_reel.ai_key_points = summary_data.get("key_points")
-        
-        quiz_data = ai_service.generate_quiz(
-            title=title,
-            description=description or "",
-            tags=tags or "",
-            num_questions=3
-        )
-        
-        new_reel.ai_quiz = quiz_data
-        
-        db.commit()
-        db.refresh(new_reel)
-    except Exception as e:
-        print(f"AI generation error: {e}")
-        # Continue without AI metadata
+    # Transcription, the embedding entry and AI metadata take about as long as the
+    # video: answer now and do them from the uploaded file once the response is sent
+    video_path = await run_in_threadpool(
+        reel_processing_service.save_upload, file.file, os.path.splitext(file.filename or "")[1] or ".mp4"
+    )
+    background_tasks.add_task(reel_processing_service.process_upload, new_reel.id, video_path)
     
     # Build response
     response = ReelUploadResponse.model_validate(new_reel)
@@ -88,7 +123,7 @@ async def upload_reel(
 @router.post("/", response_model=ReelResponse, status_code=status.HTTP_201_CREATED)
 def create_reel(
     reel_data: ReelCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -113,95 +148,266 @@ def create_reel(
     db.add(new_reel)
     db.commit()
     db.refresh(new_reel)
+    tag_index.add(new_reel.tags)
+    embedding_index.add(new_reel)
     
     response = ReelResponse.model_validate(new_reel)
     response.creator_name = current_user.full_name or current_user.email
     return response
 
+def _stored_feed_page(db: Session, reel_ids: List[int], fields: Tuple[str, ...]) -> ORJSONResponse:
+    """Cards for a precomputed page of reel ids, in that order (reels deleted since are skipped)"""
+    with request_phase("load_candidates"):
+        reels = {reel.id: reel for reel in reel_card_query(db).filter(Reel.id.in_(reel_ids))} if reel_ids else {}
+    with request_phase("serialize"):
+        return ORJSONResponse([reel_card_dict(reels[reel_id], fields) for reel_id in reel_ids if reel_id in reels])
+
 # ✅ MOVED /feed BEFORE /{reel_id} to prevent route collision
-@router.get("/feed", response_model=List[ReelResponse])
+@router.get("/feed", response_model=List[ReelCard])
 def get_feed(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     tags: Optional[str] = Query(None),
     difficulty: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
+    popularity: str = Query("lifetime", pattern="^(lifetime|trending)$", description="Rank popularity by lifetime views or recent momentum"),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get personalized feed of reels"""
-    query = db.query(Reel)
+    """Get personalized feed of reels (candidate sources -> ranker -> re-ranker, see feed_pipeline)"""
+    # Users without history all get the same ranking: share one per filter combination.
+    # Checked first so the materializer only registers users it has something to personalize
+    if cold_start_feed.applies(db, current_user.id):
+        shared = cold_start_feed.read(db, offset, limit, tags=tags, difficulty=difficulty, popularity=popularity)
+        if shared is not None:
+            FEED_SERVED.inc(source="cold_start")
+            return _stored_feed_page(db, shared, fields)
+    # The default feed is usually precomputed by the materialization worker
+    elif not tags and not difficulty and popularity == "lifetime":
+        stored = feed_materializer.read(db, current_user.id, offset, limit)
+        if stored is not None:
+            FEED_SERVED.inc(source="materialized")
+            return _stored_feed_page(db, stored, fields)
     
+    filters = []
     if tags:
-        query = query.filter(Reel.tags.contains(tags))
+        filters.append(Reel.tags.contains(tags))
     if difficulty:
-        query = query.filter(Reel.difficulty_level == difficulty)
+        filters.append(Reel.difficulty_level == difficulty)
     
-    all_reels = query.all()
-    scored_reels = feed_service.score_reels_for_user(db, current_user.id, all_reels)
-    paginated_scored = scored_reels[offset:offset + limit]
+    ranked = feed_pipeline.run(FeedContext(
+        db=db,
+        user_id=current_user.id,
+        query=reel_card_query(db).filter(*filters),
+        filters=filters,
+        popularity=popularity,
+    ), limit=offset + limit)
+    paginated_scored = ranked[offset:offset + limit]
+    FEED_SERVED.inc(source="online")
     
-    results = []
-    for item in paginated_scored:
-        reel = item["reel"]
-        creator = db.query(User).filter(User.id == reel.creator_id).first()
-        response = ReelResponse.model_validate(reel)
-        response.creator_name = creator.full_name or creator.email if creator else "Unknown"
-        results.append(response)
+    with request_phase("serialize"):
+        return ORJSONResponse([reel_card_dict(item["reel"], fields) for item in paginated_scored])
+
+@router.get("/trending", response_model=List[TrendingReel])
+def get_trending(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    tags: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Reels with the most recent views and completions (exponentially decayed), hottest first"""
+    query = reel_card_query(db).join(ReelTrending, ReelTrending.reel_id == Reel.id).add_columns(
+        ReelTrending.trend_key
+    ).filter(ReelTrending.trend_key > trending_service.min_key())
+    
+    if tags:
+        query = query.filter(Reel.tags.contains(tags))
+    if difficulty:
+        query = query.filter(Reel.difficulty_level == difficulty)
     
-    return results
+    rows = query.order_by(ReelTrending.trend_key.desc()).offset(offset).limit(limit).all()
+    return ORJSONResponse([
+        {**reel_card_dict(reel, fields), "trending_score": round(trending_service.score(trend_key), 3)}
+        for reel, trend_key in rows
+    ])
 
-@router.get("/list", response_model=List[ReelResponse])
+@router.get("/list", response_model=List[ReelCard])
 def list_reels(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     creator_id: Optional[int] = Query(None),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """List all reels with optional creator filter"""
-    query = db.query(Reel)
+    query = reel_card_query(db)
     
     if creator_id:
         query = query.filter(Reel.creator_id == creator_id)
     
     reels = query.order_by(Reel.created_at.desc()).offset(offset).limit(limit).all()
     
+    return ORJSONResponse([reel_card_dict(reel, fields) for reel in reels])
+
+@router.get("/search", response_model=ReelSearchPage)
+def search_reels(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for; each matches as a prefix"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over title, description, tags, AI summary and transcript"""
+    try:
+        hits, next_cursor = search_service.search(db, q, limit=limit, cursor=cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    hit_ids = [reel_id for reel_id, _ in hits]
+    reels = {reel.id: reel for reel in reel_card_query(db).filter(Reel.id.in_(hit_ids))} if hit_ids else {}
     results = []
-    for reel in reels:
-        creator = db.query(User).filter(User.id == reel.creator_id).first()
-        response = ReelResponse.model_validate(reel)
-        response.creator_name = creator.full_name or creator.email if creator else "Unknown"
-        results.append(response)
+    for reel_id, snippet in hits:
+        reel = reels.get(reel_id)
+        if reel is not None:
+            results.append({**reel_card_dict(reel, fields), "snippet": snippet})
+    
+    return ORJSONResponse({"results": results, "next_cursor": next_cursor})
+
+@router.get("/moments", response_model=List[ReelMoments])
+def search_moments(
+    q: str = Query(..., min_length=1, max_length=200, description="Phrase spoken in the video; the last word matches as a prefix"),
+    limit: int = Query(10, ge=1, le=50),
+    per_reel: int = Query(3, ge=1, le=20),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Reels whose transcript contains the phrase, with the seconds where it is spoken"""
+    hits = transcript_service.search_moments(db, q, limit=limit, per_reel=per_reel)
+    hit_ids = [hit["reel_id"] for hit in hits]
+    reels = {reel.id: reel for reel in reel_card_query(db).filter(Reel.id.in_(hit_ids))} if hit_ids else {}
     
-    return results
+    return ORJSONResponse([
+        {"reel": reel_card_dict(reels[hit["reel_id"]], fields), "moments": hit["moments"]}
+        for hit in hits if hit["reel_id"] in reels
+    ])
 
 @router.get("/{reel_id}", response_model=ReelResponse)
 def get_reel(
     reel_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get a specific reel by ID"""
-    reel = db.query(Reel).filter(Reel.id == reel_id).first()
+    """Get a specific reel by ID (side-effect free; views are recorded via POST /{reel_id}/view)"""
+    validators = db.query(Reel.version, Reel.views_count, User.full_name, User.email).outerjoin(
+        User, User.id == Reel.creator_id
+    ).filter(Reel.id == reel_id).first()
     
-    if not reel:
+    if not validators:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Reel not found"
         )
     
-    reel.views_count += 1
-    db.commit()
+    etag = compute_etag("reel", reel_id, *validators)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
     
-    creator = db.query(User).filter(User.id == reel.creator_id).first()
-    response = ReelResponse.model_validate(reel)
-    response.creator_name = creator.full_name or creator.email if creator else "Unknown"
-    return response
+    reel = db.query(Reel).filter(Reel.id == reel_id).first()
+    creator = reel.creator
+    result = ReelResponse.model_validate(reel)
+    result.creator_name = creator.full_name or creator.email if creator else "Unknown"
+    set_cache_headers(response, compute_etag(
+        "reel", reel_id, reel.version, reel.views_count,
+        creator.full_name if creator else None, creator.email if creator else None
+    ))
+    return result
+
+@router.get("/{reel_id}/transcript", response_model=List[TranscriptMoment])
+def get_transcript(
+    reel_id: int,
+    q: Optional[str] = Query(None, max_length=200, description="Only segments where this phrase is spoken"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """A reel's timed transcript segments"""
+    if not db.query(Reel.id).filter(Reel.id == reel_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reel not found")
+    
+    return ORJSONResponse(transcript_service.reel_segments(db, reel_id, q))
+
+@router.get("/{reel_id}/related", response_model=List[RelatedReelCard])
+def get_related(
+    reel_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Reels most often watched by the same learners (refreshed offline by app.jobs.related_reels)"""
+    neighbors = related_service.neighbors(db, reel_id, limit)
+    if not neighbors and not db.query(Reel.id).filter(Reel.id == reel_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reel not found")
+    
+    neighbor_ids = [related_reel_id for related_reel_id, _ in neighbors]
+    reels = {reel.id: reel for reel in reel_card_query(db).filter(Reel.id.in_(neighbor_ids))} if neighbor_ids else {}
+    return ORJSONResponse([
+        {**reel_card_dict(reels[related_reel_id], fields), "similarity": score}
+        for related_reel_id, score in neighbors if related_reel_id in reels
+    ])
+
+@router.get("/{reel_id}/similar", response_model=List[SimilarReelCard])
+def get_similar(
+    reel_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    fields: Tuple[str, ...] = Depends(reel_card_fields),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Reels whose title, description and transcript are closest to this one's (approximate nearest neighbors)"""
+    if not db.query(Reel.id).filter(Reel.id == reel_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reel not found")
+    
+    neighbors = embedding_index.similar(reel_id, limit)
+    neighbor_ids = [similar_reel_id for similar_reel_id, _ in neighbors]
+    reels = {reel.id: reel for reel in reel_card_query(db).filter(Reel.id.in_(neighbor_ids))} if neighbor_ids else {}
+    return ORJSONResponse([
+        {**reel_card_dict(reels[similar_reel_id], fields), "similarity": score}
+        for similar_reel_id, score in neighbors if similar_reel_id in reels
+    ])
+
+@router.post("/{reel_id}/view", status_code=status.HTTP_204_NO_CONTENT)
+def record_view(
+    reel_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Count a view of a reel"""
+    # Atomic SQL increment; doesn't bump the reel's content version
+    updated = db.query(Reel).filter(Reel.id == reel_id).update(
+        {Reel.views_count: Reel.views_count + 1}, synchronize_session=False
+    )
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reel not found")
+    
+    db.commit()
+    trending_service.record_view(reel_id)
+    return None
 
 @router.delete("/{reel_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_reel(
     reel_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete a reel (creator only)"""
@@ -217,6 +423,14 @@ def delete_reel(
     if reel.cloudinary_public_id:
         cloudinary_service.delete_video(reel.cloudinary_public_id)
     
+    course_ids = [course.id for course in reel.courses]
+    tags = reel.tags
     db.delete(reel)
+    db.flush()
+    # The reel set of every course containing it just changed
+    for course_id in course_ids:
+        progress_service.recompute_course(db, course_id)
     db.commit()
+    tag_index.remove(tags)
+    embedding_index.remove(reel_id)
     return None
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from app.schemas import TagSuggestion
+from app.api.auth import Principal, get_current_principal
+from app.services.tag_service import tag_index
+
+router = APIRouter(prefix="/tags", tags=["Tags"])
+
+
+@router.get("/suggest", response_model=List[TagSuggestion])
+def suggest_tags(
+    prefix: str = Query("", max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Existing tags starting with `prefix`, most used first"""
+    return [{"tag": tag, "count": count} for tag, count in tag_index.suggest(prefix, limit)]
@@ -0,0 +1,136 @@
+import gzip
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional codecs, used only when installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_CONTENT_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete, uncompressed responses with the best codec the client
+    accepts (zstd > br > gzip). Streaming bodies, small bodies, non-allowlisted
+    content types and responses that already carry a Content-Encoding pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.compressors: Dict[str, Callable[[bytes], bytes]] = {}
+        # Preference order: on feed pages zstd-3 matches brotli-4's ratio at a fraction of
+        # the CPU (see benchmarks/bench_compression.py)
+        if zstandard is not None:
+            self.compressors["zstd"] = zstandard.ZstdCompressor(level=zstd_level).compress
+        if brotli is not None:
+            self.compressors["br"] = lambda body: brotli.compress(body, quality=brotli_quality, mode=brotli.MODE_TEXT)
+        self.compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+        # Ties go to the earlier (better ratio per CPU) codec
+        for rank, encoding in enumerate(self.compressors):
+            q = accepted.get(encoding, wildcard)
+            if q > 0 and (q, -rank) > best[:2]:
+                best = (q, -rank, encoding)
+        return best[2]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if start_message["status"] == 304:
+                # Revalidation must echo the validator the compressed 200 carried
+                self._weaken_etag(MutableHeaders(raw=start_message["headers"]))
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                # Streaming responses are sent untouched, chunk by chunk
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self.compressors[encoding](body)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            self._weaken_etag(headers)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _weaken_etag(headers: MutableHeaders) -> None:
+        """Encoded bytes differ from the identity representation, so a strong ETag no longer holds"""
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    def _should_compress(self, start_message: Message, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start_message["status"] in (204, 304):
+            return False
+        headers = Headers(raw=start_message["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.content_types)
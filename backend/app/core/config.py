@@ -8,6 +8,11 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
+    AUTH_CACHE_TTL_SECONDS: float = 60.0  # Decoded tokens and user records, per process
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    PASSWORD_HASH_ROUNDS: int = 29000  # pbkdf2_sha256 iterations for new hashes
+    PASSWORD_HASH_WORKERS: int = 2  # Hashing processes; 0 hashes inline
+    PASSWORD_HASH_MAX_PENDING: int = 16  # Queued + running hashes before rejecting with 503
     
     # Database
     DATABASE_URL: str = "sqlite:///./EduBit.db"
@@ -21,6 +26,89 @@ class Settings(BaseSettings):
     CLOUDINARY_API_KEY: Optional[str] = None
     CLOUDINARY_API_SECRET: Optional[str] = None
     
+    # Watch heartbeats
+    WATCH_FLUSH_INTERVAL_SECONDS: float = 10.0
+    
+    # Trending (hourly view/completion buckets, exponentially decayed)
+    TRENDING_HALF_LIFE_HOURS: float = 24.0  # Activity counts half as much after this long (changing this or the weight needs trending_service.rebuild())
+    TRENDING_COMPLETION_WEIGHT: float = 3.0  # A completion counts as this many views
+    TRENDING_FLUSH_INTERVAL_SECONDS: float = 10.0
+    TRENDING_RETENTION_DAYS: int = 30  # Older hourly buckets are deleted
+    
+    # Related reels (offline co-watch job: python -m app.jobs.related_reels)
+    RELATED_TOP_N: int = 30  # Neighbors stored per reel
+    RELATED_MIN_COWATCH: int = 2  # Users who must have watched both reels; filters one-off coincidences
+    RELATED_CHUNK_SIZE: int = 2000  # Reels per sparse product; bounds the job's peak memory
+    
+    # Content embeddings (hashed n-gram vectors + clustered ANN index, built by python -m app.jobs.reel_embeddings)
+    EMBEDDING_DIR: str = "./embeddings"  # Memory-mapped vector files, shared by all workers
+    EMBEDDING_DIM: int = 256  # Hash buckets per vector; takes effect at the next build
+    EMBEDDING_NPROBE: int = 8  # Clusters scanned per query; more is slower but closer to exact
+    EMBEDDING_CANDIDATES: int = 200  # Reels the feed's content-similarity signal retrieves
+    EMBEDDING_RELOAD_SECONDS: float = 5.0  # How often workers pick up rebuilds and other workers' uploads
+    
+    # Feed pipeline (names registered in app.services.feed_pipeline)
+    FEED_SOURCES: str = "recent,tags,trending,creators,courses,cowatch,similar"  # Candidate sources, merged in this order
+    FEED_SOURCE_LIMIT: int = 200  # Reel ids per source
+    FEED_RANKER: str = "weighted"
+    FEED_RERANKER: str = "diversity"
+    FEED_DIVERSITY_WINDOW: int = 10  # Reels the caps below apply to (about a page)
+    FEED_MAX_PER_CREATOR: int = 3
+    FEED_MAX_PER_TAG: int = 4
+    
+    # Cold-start feed: users without history share one ranking per (difficulty, tags, popularity)
+    COLD_START_SOURCES: str = "popular,trending,recent"
+    COLD_START_TOP_N: int = 200  # Deeper pages are scored on-line
+    COLD_START_TTL_SECONDS: float = 60.0  # Per worker process; one request per filter combination recomputes
+    
+    # Materialized feeds (worker: python -m app.jobs.materialize_feeds)
+    FEED_MATERIALIZE_TOP_N: int = 200  # Ranked reel ids stored per user; deeper pages are scored on-line
+    FEED_MATERIALIZE_BATCH: int = 500  # Users refreshed per worker pass, stale ones first
+    FEED_MATERIALIZE_NEW_REELS_SECONDS: float = 300.0  # New reels refresh a list at most this often
+    FEED_MATERIALIZE_MAX_AGE_SECONDS: float = 3600.0  # Lists are recomputed at least this often (trending, views)
+    FEED_MATERIALIZE_ACTIVE_DAYS: int = 7  # Lists of users who haven't opened the feed for this long are dropped
+    
+    # Response compression (brotli/zstd are used when their packages are installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller bodies aren't worth the CPU
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # SQL instrumentation
+    N_PLUS_ONE_THRESHOLD: int = 10  # Same statement this many times in one request is flagged
+    N_PLUS_ONE_RAISE: bool = False  # Fail the request instead of logging (for tests)
+    
+    # Metrics
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # Shared dir so /metrics aggregates all workers
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: float = 5.0
+    
+    # On-demand profiling
+    ADMIN_TOKEN: Optional[str] = None  # X-Admin-Token for admin endpoints and X-Profile; unset disables them
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of requests profiled without being asked
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_PROFILES: int = 50
+    
+    # Slow log
+    SLOW_REQUEST_MS: float = 1000.0  # Requests slower than this are logged with full context; 0 disables
+    SLOW_QUERY_MS: float = 200.0  # Same for single SQL statements
+    SLOW_QUERY_EXPLAIN: bool = True  # Attach the plan of slow SELECTs (each statement at most every 5 minutes)
+    SLOW_LOG_FILE: Optional[str] = None  # Rotating file for slow records; unset keeps them in the main log
+    SLOW_LOG_MAX_BYTES: int = 10_000_000
+    SLOW_LOG_BACKUP_COUNT: int = 5
+    
+    # Search
+    SEARCH_MAX_CANDIDATES: int = 2000  # Words matching more reels than this filter results but are not bm25-ranked
+    TAG_INDEX_REBUILD_SECONDS: float = 600.0  # Full recount of the per-worker tag index (picks up other workers' reels); 0 disables
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per-module overrides, e.g. "app.sql=WARNING,app.services.ai_service=DEBUG"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000  # Records buffered for the writer thread; overflow is dropped and counted
+    LOG_SAMPLE_BURST: int = 20  # Identical messages logged in full per window; 0 disables sampling
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
+    LOG_SAMPLE_RATE: int = 100  # Past the burst keep 1 in N (ERROR and above are never sampled)
+    
     # CORS
     BACKEND_CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -0,0 +1,36 @@
+import hashlib
+from fastapi import Request, Response
+
+# Responses are per-user (bearer auth), so only the client may cache them and
+# it must revalidate with If-None-Match before reusing one
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts) -> str:
+    """Strong ETag from the version-bearing values a representation is built from"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already matches `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 carrying the same validators as the full response"""
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
@@ -0,0 +1,243 @@
+"""
+Structured, non-blocking logging for the `app.*` loggers.
+
+Records are formatted as JSON lines (or plain text), tagged with the request
+id of the request that emitted them and handed to a bounded queue; a single
+listener thread does the actual I/O, so logging never blocks the event loop
+or a threadpool worker. Repetitive messages are sampled.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import Counter
+
+LOGS_DROPPED = Counter("edubit_log_records_dropped_total", "Log records dropped because the log queue was full")
+LOGS_SAMPLED_OUT = Counter("edubit_log_records_sampled_out_total", "Repetitive log records suppressed by sampling")
+
+# Set per request by RequestIdMiddleware; threadpool endpoints inherit it with the context
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Slow request/query records (see app.core.slow_log)
+SLOW_LOGGER = "app.slow"
+_INCOMING_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+# Attributes every LogRecord has; anything else came in via `extra=` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "suppressed"}
+
+
+class RequestIdMiddleware:
+    """Adopts a well-formed incoming X-Request-ID or generates one, and echoes it on the response"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id")
+        request_id = incoming if incoming and _INCOMING_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on a record; must run in the emitting thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per message template (logger + unformatted msg), lets `burst` records through
+    per `window` seconds and then only every `rate`-th. The next record let through
+    carries how many were suppressed. ERROR and above, and `exempt` loggers, always pass.
+    """
+
+    def __init__(self, burst: int, window: float, rate: int, exempt: Tuple[str, ...] = ()):
+        super().__init__()
+        self.exempt = exempt
+        self.burst = burst
+        self.window = window
+        self.rate = max(rate, 1)
+        self._lock = threading.Lock()
+        # key -> [window start, seen in window, suppressed since last emitted]
+        self._state: Dict[Tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.burst <= 0 or record.name.startswith(self.exempt):
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                state = self._state[key] = [now, 0, suppressed]
+                if len(self._state) > 10000:
+                    # Unbounded templates (f-strings) would otherwise grow this forever
+                    self._state = {key: state}
+            state[1] += 1
+            seen = state[1]
+            if seen > self.burst and (seen - self.burst) % self.rate:
+                state[2] += 1
+                LOGS_SAMPLED_OUT.inc(logger=record.name)
+                return False
+            if state[2]:
+                record.suppressed = state[2]
+                state[2] = 0
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Make the record picklable/thread-safe without flattening it into one formatted string,
+        # so the listener's formatter still sees extra fields and the traceback separately
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request id, pid and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        line = super().format(record)
+        if getattr(record, "suppressed", 0):
+            line += f" (+{record.suppressed} similar suppressed)"
+        return line
+
+
+class LoggerFilter(logging.Filter):
+    """Passes records from the `prefix` logger tree, or (inverted) everything else"""
+
+    def __init__(self, prefix: str, invert: bool = False):
+        super().__init__()
+        self.prefix = prefix
+        self.invert = invert
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        matches = record.name == self.prefix or record.name.startswith(self.prefix + ".")
+        return matches != self.invert
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """'app.sql=WARNING,app.services.ai_service=DEBUG' -> {logger name: level}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return {name: level for name, level in levels.items() if isinstance(level, int)}
+
+
+def configure_logging(
+    level: str = "INFO",
+    levels: str = "",
+    fmt: str = "json",
+    queue_size: int = 10000,
+    sample_burst: int = 20,
+    sample_window: float = 60.0,
+    sample_rate: int = 100,
+    slow_log_file: Optional[str] = None,
+    slow_log_max_bytes: int = 10_000_000,
+    slow_log_backup_count: int = 5,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Route the `app` logger tree through a bounded queue to a writer thread.
+    `app.slow` records are never sampled and, with `slow_log_file`, go only to
+    that rotating JSON file. Returns the started listener; stop() it on
+    shutdown to drain the queue.
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    # Filters on the queue handler run in the emitting thread, where the request context lives
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(sample_burst, sample_window, sample_rate, exempt=(SLOW_LOGGER,)))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    handlers = [output]
+    if slow_log_file:
+        slow_output = logging.handlers.RotatingFileHandler(
+            slow_log_file, maxBytes=slow_log_max_bytes, backupCount=slow_log_backup_count, delay=True
+        )
+        slow_output.setFormatter(JsonFormatter())
+        slow_output.addFilter(LoggerFilter(SLOW_LOGGER))
+        output.addFilter(LoggerFilter(SLOW_LOGGER, invert=True))
+        handlers.append(slow_output)
+
+    root = logging.getLogger("app")
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    root.propagate = False
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
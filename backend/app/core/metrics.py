@@ -0,0 +1,312 @@
+"""
+Minimal Prometheus-compatible metrics.
+
+Writes are lock-free: every thread updates its own shard of each metric and
+only scrapes aggregate the shards. With a METRICS_MULTIPROC_DIR, each worker
+process also dumps periodic snapshots there and /metrics merges all of them.
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, LabelKey, float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every metric registers itself here on construction
+REGISTRY: List["_Metric"] = []
+
+# Counters and histograms of exited workers, summed into one file of the multiproc directory
+RETIRED_SNAPSHOT = "retired.json"
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        """This thread's private value dict (the lock is only taken once per thread)"""
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.values = shard
+        return shard
+
+    def _merged(self) -> Dict[LabelKey, float]:
+        merged: Dict[LabelKey, float] = {}
+        for shard in list(self._shards):
+            for key, value in dict(shard).items():
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels"""
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        shard = self._shard()
+        key = _label_key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._merged().get(_label_key(labels), 0.0)
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self._merged().items()]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down. Use either inc()/dec() or set() for a given
+    label set; `callback` computes the value at scrape time instead.
+    """
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation)
+        self.callback = callback
+        self._set_values: Dict[LabelKey, float] = {}
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        # A single dict store is atomic under the GIL
+        self._set_values[_label_key(labels)] = value
+
+    def _merged(self):
+        merged = super()._merged()
+        for key, value in dict(self._set_values).items():
+            merged[key] = merged.get(key, 0.0) + value
+        if self.callback is not None:
+            try:
+                merged[()] = float(self.callback())
+            except Exception:
+                pass
+        return merged
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (e.g. latencies in seconds)"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = _label_key(labels)
+        # [per-bucket counts..., +Inf count, sum]
+        row = shard.get(key)
+        if row is None:
+            row = shard[key] = [0.0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def _merged_rows(self) -> Dict[LabelKey, List[float]]:
+        merged: Dict[LabelKey, List[float]] = {}
+        for shard in list(self._shards):
+            for key, row in dict(shard).items():
+                total = merged.setdefault(key, [0.0] * len(row))
+                for i, n in enumerate(list(row)):
+                    total[i] += n
+        return merged
+
+    def count(self, **labels) -> float:
+        row = self._merged_rows().get(_label_key(labels))
+        return sum(row[:-1]) if row else 0.0
+
+    def samples(self):
+        out = []
+        for key, row in self._merged_rows().items():
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                out.append((self.name + "_bucket", key + (("le", repr(float(bound))),), cumulative))
+            cumulative += row[len(self.buckets)]
+            out.append((self.name + "_bucket", key + (("le", "+Inf"),), cumulative))
+            out.append((self.name + "_count", key, cumulative))
+            out.append((self.name + "_sum", key, row[-1]))
+        return out
+
+
+# ========== Snapshots & exposition ==========
+
+def snapshot() -> dict:
+    """This process's metric families as plain data"""
+    return {
+        "pid": os.getpid(),
+        "families": [
+            {
+                "name": metric.name,
+                "type": metric.type_name,
+                "help": metric.documentation,
+                "samples": [[name, list(map(list, key)), value] for name, key, value in metric.samples()],
+            }
+            for metric in REGISTRY
+        ],
+    }
+
+
+def _write_json(directory: str, filename: str, data: dict) -> None:
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, os.path.join(directory, filename))
+
+
+def write_snapshot(directory: str) -> None:
+    """Atomically replace this worker's snapshot file in the shared directory"""
+    _write_json(directory, f"worker-{os.getpid()}.json", snapshot())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _locked(directory: str):
+    """Exclusive across the workers sharing the directory"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _merge(snapshots: Iterable[Tuple[dict, bool]]) -> List[dict]:
+    """Sum (snapshot, alive) pairs sample by sample; gauges only from live workers"""
+    families: Dict[str, dict] = {}
+    values: Dict[Tuple[str, str, LabelKey], float] = {}
+    for data, alive in snapshots:
+        for family in data["families"]:
+            if family["type"] == "gauge" and not alive:
+                continue
+            families.setdefault(family["name"], {k: family[k] for k in ("name", "type", "help")})
+            for name, key, value in family["samples"]:
+                sample_id = (family["name"], name, tuple(map(tuple, key)))
+                values[sample_id] = values.get(sample_id, 0.0) + value
+
+    merged = {name: dict(family, samples=[]) for name, family in families.items()}
+    for (family_name, name, key), value in values.items():
+        merged[family_name]["samples"].append([name, [list(pair) for pair in key], value])
+    return list(merged.values())
+
+
+def collect(directory: Optional[str] = None) -> List[dict]:
+    """
+    Merged metric families. Without a directory this is just the current process;
+    with one, every worker's latest snapshot is summed (gauges only from live workers).
+    Exited workers' counters are folded into RETIRED_SNAPSHOT and their files removed,
+    so the directory doesn't grow with every worker restart.
+    """
+    if not directory:
+        return snapshot()["families"]
+
+    write_snapshot(directory)
+    with _locked(directory):
+        retired = {"pid": None, "families": []}
+        live, dead = [], []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if filename == RETIRED_SNAPSHOT:
+                retired = data
+            elif _pid_alive(data.get("pid", 0)):
+                live.append(data)
+            else:
+                dead.append((path, data))
+
+        if dead:
+            retired = {"pid": None, "families": _merge([(retired, False)] + [(data, False) for _, data in dead])}
+            _write_json(directory, RETIRED_SNAPSHOT, retired)
+            for path, _ in dead:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        return _merge([(retired, False)] + [(data, True) for data in live])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(directory: Optional[str] = None) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for family in collect(directory):
+        lines.append(f"# HELP {family['name']} {_escape(family['help'])}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for name, key, value in family["samples"]:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+            lines.append(f"{name}{{{labels}}} {value!r}" if labels else f"{name} {value!r}")
+    return "\n".join(lines) + "\n"
+
+
+class SnapshotWriter:
+    """Background thread that keeps this worker's snapshot fresh for multi-worker scrapes"""
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+        write_snapshot(self.directory)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.directory)
+            except OSError:
+                pass
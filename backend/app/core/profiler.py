@@ -0,0 +1,187 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.request_stats import route_template
+from app.core.security import verify_admin_token
+
+# Threadpool threads that run sync endpoints and dependencies
+_WORKER_THREAD_PREFIX = "AnyIO worker thread"
+# Frames from these files are scheduler plumbing; a worker thread showing only these is idle
+_IDLE_FILES = ("threading.py", "queue.py", os.path.join("anyio", "_backends", "_asyncio.py"))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    marker = f"{os.sep}app{os.sep}"
+    short = filename[filename.rindex(marker) + 1:] if marker in filename else os.path.basename(filename)
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> List:
+    """Code objects from root to leaf"""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+class RequestProfile:
+    """Folded stack samples (flamegraph.pl / speedscope input) captured during one request"""
+
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.max_concurrent_requests = 1
+        self.stacks: Counter = Counter()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+            "max_concurrent_requests": self.max_concurrent_requests,
+        }
+
+
+class _Sampler(threading.Thread):
+    """
+    Samples the event loop thread and every busy threadpool worker until stopped.
+    Requests running concurrently in this process land in the same profile, which
+    is why each profile records max_concurrent_requests.
+    """
+
+    def __init__(self, profile: RequestProfile, loop_thread_id: int, interval: float, in_flight: Dict[int, int]):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.in_flight = in_flight
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        while not self.done.wait(self.interval):
+            self.profile.samples += 1
+            self.profile.max_concurrent_requests = max(self.profile.max_concurrent_requests, self.in_flight["count"])
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.loop_thread_id:
+                    root = "event-loop"
+                elif names.get(thread_id, "").startswith(_WORKER_THREAD_PREFIX):
+                    root = "worker"
+                else:
+                    continue
+                codes = _stack(frame)
+                if root == "worker" and all(c.co_filename.endswith(_IDLE_FILES) for c in codes):
+                    continue
+                self.profile.stacks[";".join([root] + [_frame_label(c) for c in codes])] += 1
+
+
+class ProfilingMiddleware:
+    """
+    Captures a statistical profile of selected requests: those carrying
+    `X-Profile: 1` with a valid `X-Admin-Token`, plus a random `sample_rate`
+    fraction. Unselected requests pay one header lookup and, if sampling is
+    on, one random() call.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: "ProfileStore",
+        sample_rate: float = 0.0,
+        interval_ms: float = 5.0,
+    ):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.in_flight = {"count": 0}
+
+    def _selected(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") == "1" and verify_admin_token(headers.get("x-admin-token")):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight["count"] += 1
+        try:
+            if not self._selected(scope):
+                await self.app(scope, receive, send)
+                return
+            await self._profile(scope, receive, send)
+        finally:
+            self.in_flight["count"] -= 1
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile = self.store.new(scope["method"], scope["path"])
+        sampler = _Sampler(profile, threading.get_ident(), self.interval, self.in_flight)
+        start = time.perf_counter()
+        sampler.start()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = str(profile.id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.done.set()
+            # The sampler finishes its current sample first; wait off the event loop
+            await anyio.to_thread.run_sync(sampler.join)
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            profile.route = route_template(scope)
+            self.store.add(profile)
+
+
+class ProfileStore:
+    """Bounded in-process store of the most recent request profiles"""
+
+    def __init__(self, max_profiles: int = 50):
+        self._ids = itertools.count(1)
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_profiles)
+
+    def new(self, method: str, path: str) -> RequestProfile:
+        return RequestProfile(next(self._ids), method, path)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+
+    def list(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+profile_store = ProfileStore(max_profiles=settings.PROFILING_MAX_PROFILES)
@@ -0,0 +1,185 @@
+import logging
+import time
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import anyio.to_thread
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.slow_log import log_slow_request
+
+logger = logging.getLogger("app.sql")
+
+HTTP_REQUESTS = Counter("edubit_http_requests_total", "HTTP requests by method, route template and status")
+HTTP_REQUEST_SECONDS = Histogram("edubit_http_request_seconds", "HTTP request latency by method and route template")
+HTTP_IN_FLIGHT = Gauge("edubit_http_requests_in_flight", "HTTP requests currently being served")
+THREADPOOL_BUSY = Gauge("edubit_threadpool_busy_threads", "Threadpool threads running sync endpoints/dependencies")
+THREADPOOL_SIZE = Gauge("edubit_threadpool_size", "Threadpool capacity for sync endpoints/dependencies")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "edubit_db_queries_per_request", "SQL statements executed per request",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+DB_SECONDS_PER_REQUEST = Histogram("edubit_db_seconds_per_request", "Time spent in SQL per request")
+DB_SLOWEST_QUERY_SECONDS = Histogram(
+    "edubit_db_slowest_query_seconds", "Duration of each request's slowest SQL statement (the statement is in the slow request log)"
+)
+N_PLUS_ONE_DETECTED = Counter("edubit_n_plus_one_total", "Requests that repeated one SQL statement past the N+1 threshold")
+
+
+class NPlusOneDetected(Exception):
+    """Raised (when configured to) for a request that repeats the same statement too often"""
+
+
+class RequestStats:
+    """
+    Activity of the current request: SQL filled in by the engine hooks in app.database,
+    the authenticated user by get_current_principal and named phases by request_phase()
+    """
+    __slots__ = (
+        "query_count", "db_seconds", "slowest_seconds", "slowest_statement", "statements",
+        "slow_queries", "user_id", "phases",
+    )
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: TallyCounter = TallyCounter()
+        self.slow_queries = 0
+        self.user_id: Optional[int] = None
+        self.phases: Dict[str, float] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.query_count += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def most_repeated(self):
+        """(statement, count) of the most frequently repeated statement, or (None, 0)"""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+# Set per request by RequestStatsMiddleware; threadpool endpoints inherit a copy of the
+# context, so they mutate the same RequestStats object
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+@contextmanager
+def request_phase(name: str):
+    """Time a named phase of the current request (for the slow log); no-op outside requests"""
+    stats = current_request_stats.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.phases[name] = stats.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route, so metric label cardinality stays bounded"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "<unnamed>")
+    return "<unmatched>"
+
+
+class RequestStatsMiddleware:
+    """
+    Collects per-request HTTP and SQL statistics, exposes them as a Server-Timing header
+    and metrics, and flags requests whose repeated statements look like an N+1 pattern.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        n_plus_one_threshold: int = 10,
+        raise_on_n_plus_one: bool = False,
+        slow_request_ms: float = 0.0,
+    ):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.raise_on_n_plus_one = raise_on_n_plus_one
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        route = None
+        response_start = None
+        HTTP_IN_FLIGHT.inc()
+        self._sample_threadpool()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, route, response_start
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_start = time.perf_counter() - start
+                route = route_template(scope)
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.query_count} queries", '
+                    f'db-slowest;dur={stats.slowest_seconds * 1000:.2f}, app;dur={total_ms:.2f}'
+                )
+                self._finish(scope, route, stats)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            HTTP_IN_FLIGHT.dec()
+            route = route or route_template(scope)
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status_code)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route)
+            log_slow_request(scope, route, status_code, stats, elapsed, response_start, self.slow_request_ms)
+
+    @staticmethod
+    def _sample_threadpool() -> None:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+        THREADPOOL_SIZE.set(limiter.total_tokens)
+
+    def _finish(self, scope: Scope, route: str, stats: RequestStats) -> None:
+        DB_QUERIES_PER_REQUEST.observe(stats.query_count, route=route)
+        DB_SECONDS_PER_REQUEST.observe(stats.db_seconds, route=route)
+        if stats.query_count:
+            DB_SLOWEST_QUERY_SECONDS.observe(stats.slowest_seconds, route=route)
+
+        statement, repeats = stats.most_repeated()
+        if repeats < self.n_plus_one_threshold:
+            return
+
+        N_PLUS_ONE_DETECTED.inc(route=route)
+        if self.raise_on_n_plus_one:
+            raise NPlusOneDetected(
+                f"Possible N+1 on {scope['method']} {route}: statement ran {repeats} times "
+                f"({stats.query_count} queries total): {statement[:200]}"
+            )
+        # A constant template (args kept separate) lets the sampling filter collapse repeats
+        logger.warning(
+            "Possible N+1 on %s %s: statement ran %d times (%d queries total): %s",
+            scope["method"], route, repeats, stats.query_count, statement[:200],
+            extra={"route": route, "repeats": repeats, "query_count": stats.query_count},
+        )
@@ -1,20 +1,122 @@
+import hmac
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge, Histogram
 
+logger = logging.getLogger(__name__)
 
 # Use pbkdf2_sha256 only (no bcrypt, no 72-byte issues)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+# Decoded JWT payloads keyed by raw token; entries never outlive the token's exp
+_token_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "edubit_password_hash_seconds", "Wall time of password hash/verify including queueing",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+PASSWORD_HASH_PENDING = Gauge("edubit_password_hash_pending", "Password hash jobs queued or running")
+PASSWORD_HASH_REJECTED = Counter("edubit_password_hash_rejected_total", "Password hash jobs rejected because the queue was full")
+
+
+class PasswordHashQueueFull(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hash jobs are already in flight"""
+
+
+_hash_slots = threading.BoundedSemaphore(max(settings.PASSWORD_HASH_MAX_PENDING, 1))
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> Optional[ProcessPoolExecutor]:
+    global _hash_executor
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                # spawn: never fork a process that already runs the event loop and worker threads
+                _hash_executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _hash_executor
+
+
+def _discard_hash_executor(broken: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died, so the next job starts a fresh one"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is broken:
+            _hash_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_password_hasher() -> None:
+    """Stop the hashing processes (app shutdown)"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+
+def _run_hash_job(operation: str, fn: Callable, *args):
+    """
+    Run a CPU-heavy hash job off the GIL. The calling threadpool thread only
+    waits, and at most PASSWORD_HASH_MAX_PENDING threads can be waiting at once.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        PASSWORD_HASH_REJECTED.inc()
+        raise PasswordHashQueueFull()
+
+    PASSWORD_HASH_PENDING.inc()
+    start = time.perf_counter()
+    try:
+        executor = _get_hash_executor()
+        if executor is None:
+            return fn(*args)
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash): replace the pool and retry once
+            logger.warning("Password hash pool broken; restarting it", extra={"operation": operation})
+            _discard_hash_executor(executor)
+            return _get_hash_executor().submit(fn, *args).result()
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, operation=operation)
+        PASSWORD_HASH_PENDING.dec()
+        _hash_slots.release()
+
+
+def _verify_in_worker(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_in_worker(password: str) -> str:
+    return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against hashed password"""
     plain_password = str(plain_password)
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_hash_job("verify", _verify_in_worker, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -23,7 +125,7 @@ def get_password_hash(password: str) -> str:
     # Hard safety: avoid insane-length passwords (>72 bytes) just in case
     if len(password.encode("utf-8")) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return _run_hash_job("hash", _hash_in_worker, password)
 
 
 def create_access_token(
@@ -50,13 +152,27 @@ def create_access_token(
 
 
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token (cached per process)"""
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM],
         )
-        return payload
     except JWTError:
         return None
+
+    exp = payload.get("exp")
+    _token_cache.set(token, payload, ttl=exp - time.time() if exp else None)
+    return payload
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """Constant-time check of an X-Admin-Token value; always False when ADMIN_TOKEN is unset"""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), settings.ADMIN_TOKEN.encode("utf-8"))
@@ -0,0 +1,150 @@
+"""
+Slow request and slow SQL logging.
+
+Requests and individual statements over their thresholds are logged on the
+`app.slow` logger with enough context to reproduce them: route, parameters,
+user, query count and phase timings for requests; statement text, bound
+parameter shape (never values) and the query plan for SQL. With
+SLOW_LOG_FILE set these records go to their own rotating file.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter
+
+logger = logging.getLogger("app.slow")
+
+SLOW_REQUESTS = Counter("edubit_slow_requests_total", "Requests over SLOW_REQUEST_MS by route")
+SLOW_QUERIES = Counter("edubit_slow_queries_total", "SQL statements over SLOW_QUERY_MS")
+
+# Query string values that must never reach a log file
+_REDACTED_PARAMS = {"password", "token", "access_token", "refresh_token", "secret", "api_key"}
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+_MAX_STATEMENT_CHARS = 4000
+
+
+def _value_shape(params: Any) -> Any:
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        shape = [type(value).__name__ for value in params[:50]]
+        if len(params) > 50:
+            shape.append(f"... {len(params)} total")
+        return shape
+    return type(params).__name__
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> Any:
+    """Types (and for executemany, row count) of bound parameters; values are never logged"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "params": _value_shape(rows[0]) if rows else []}
+    return _value_shape(parameters or ())
+
+
+def redacted_query_params(query_string: bytes) -> Dict[str, str]:
+    params = {}
+    for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        params[key] = "[redacted]" if key.lower() in _REDACTED_PARAMS else value[:200]
+    return params
+
+
+class SlowQueryLog:
+    """Called from the engine's after_cursor_execute hook for every statement"""
+
+    def __init__(self, threshold_ms: float, explain: bool = True):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        # A hot slow statement is EXPLAINed at most once per 5 minutes
+        self._plans = TTLCache(maxsize=1000, ttl=300)
+
+    def observe(self, cursor, statement: str, parameters, executemany: bool, dialect: str, seconds: float) -> bool:
+        """Log the statement if it was slow; returns whether it was"""
+        if self.threshold <= 0 or seconds < self.threshold:
+            return False
+
+        SLOW_QUERIES.inc()
+        logger.warning(
+            "Slow query (%.1f ms)", seconds * 1000,
+            extra={
+                "kind": "query",
+                "duration_ms": round(seconds * 1000, 2),
+                "statement": statement[:_MAX_STATEMENT_CHARS],
+                "params_shape": parameters_shape(parameters, executemany),
+                "plan": self._plan(cursor, statement, parameters, dialect) if not executemany else None,
+            }
+        )
+        return True
+
+    def _plan(self, cursor, statement: str, parameters, dialect: str) -> Optional[List[str]]:
+        if not self.explain or dialect not in _EXPLAIN_PREFIX:
+            return None
+        if not statement.lstrip()[:6].upper() in ("SELECT", "WITH"):
+            return None
+
+        plan = self._plans.get(statement)
+        if plan is not None:
+            return plan
+        # Raw DBAPI cursor on the same connection, so engine hooks don't see (or time) the EXPLAIN
+        try:
+            plan_cursor = cursor.connection.cursor()
+            try:
+                plan_cursor.execute(_EXPLAIN_PREFIX[dialect] + statement, parameters or ())
+                # SQLite: (id, parent, notused, detail); PostgreSQL/MySQL: the plan text is last
+                plan = [str(row[-1]) for row in plan_cursor.fetchall()]
+            finally:
+                plan_cursor.close()
+        except Exception:
+            return None
+        self._plans.set(statement, plan)
+        return plan
+
+
+def log_slow_request(
+    scope: dict,
+    route: str,
+    status_code: int,
+    stats,
+    total_seconds: float,
+    response_start_seconds: Optional[float],
+    threshold_ms: float,
+) -> bool:
+    """Log a request if it was slow; `stats` is the request's RequestStats. Returns whether it was"""
+    if threshold_ms <= 0 or total_seconds * 1000 < threshold_ms:
+        return False
+
+    SLOW_REQUESTS.inc(route=route)
+    phases = {name: round(seconds * 1000, 2) for name, seconds in stats.phases.items()}
+    phases["db"] = round(stats.db_seconds * 1000, 2)
+    if response_start_seconds is not None:
+        phases["until_response_start"] = round(response_start_seconds * 1000, 2)
+        phases["response_body"] = round((total_seconds - response_start_seconds) * 1000, 2)
+    statement, repeats = stats.most_repeated()
+
+    logger.warning(
+        "Slow request %s %s (%.1f ms)", scope["method"], route, total_seconds * 1000,
+        extra={
+            "kind": "request",
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "path_params": {key: str(value) for key, value in (scope.get("path_params") or {}).items()},
+            "query_params": redacted_query_params(scope.get("query_string", b"")),
+            "user_id": stats.user_id,
+            "status": status_code,
+            "duration_ms": round(total_seconds * 1000, 2),
+            "query_count": stats.query_count,
+            "slow_queries": stats.slow_queries,
+            "phases_ms": phases,
+            "slowest_query_ms": round(stats.slowest_seconds * 1000, 2),
+            "slowest_statement": (stats.slowest_statement or "")[:_MAX_STATEMENT_CHARS] or None,
+            "most_repeated": {"statement": statement[:500], "count": repeats} if statement else None,
+        }
+    )
+    return True
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_MS, explain=settings.SLOW_QUERY_EXPLAIN)
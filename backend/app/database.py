@@ -1,7 +1,17 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Dict, List
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.request_stats import current_request_stats
+from app.core.slow_log import slow_query_log
+from app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
 
 # Create engine
 engine = create_engine(
@@ -9,6 +19,32 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 )
 
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    slow = slow_query_log.observe(cursor, statement, parameters, executemany, conn.dialect.name, elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+        stats.slow_queries += slow
+
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "edubit_db_pool_checked_out", "Connections currently checked out of the pool",
+    callback=lambda: getattr(engine.pool, "checkedout", lambda: 0)()
+)
+DB_POOL_SIZE = Gauge(
+    "edubit_db_pool_size", "Configured connection pool size",
+    callback=lambda: getattr(engine.pool, "size", lambda: 0)()
+)
+
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -25,6 +61,62 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+def _upgrade_schema(connection: Connection) -> List[str]:
+    """
+    Bring tables that already exist up to the models: create_all only creates
+    missing tables, so columns and indexes added to a model since an existing
+    database was created are added here (ALTER TABLE ... ADD COLUMN, with the
+    column's scalar default so existing rows get it). Returns "table.column" for
+    every column added.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} " \
+                  f"{column.type.compile(dialect=connection.dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            try:
+                with connection.begin_nested():
+                    connection.exec_driver_sql(ddl)
+            except DBAPIError:
+                # Another worker starting at the same time added it first
+                if column.name not in {c["name"] for c in inspect(connection).get_columns(table.name)}:
+                    raise
+                continue
+            added.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    return added
+
+
+def init_db() -> Dict[str, List[str]]:
+    """
+    Create missing tables and upgrade existing ones (see _upgrade_schema); returns
+    the tables created and columns added, for one-off backfills
+    """
+    with engine.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        added = _upgrade_schema(connection)
+        Base.metadata.create_all(bind=connection)
+        created = [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+        # Course progress reads only the counters: fill them for databases that predate them,
+        # in the same transaction, so an interrupted start redoes it
+        if "micro_courses.reel_count" in added or ("course_completions" in created and existing):
+            from app.services.progress_service import progress_service
+            with Session(bind=connection) as db:
+                progress_service.rebuild_all(db)
+                db.flush()
+    if added or (created and existing):
+        logger.info("Database schema upgraded", extra={"added_columns": added, "created_tables": created})
+    return {"created_tables": created, "added_columns": added}
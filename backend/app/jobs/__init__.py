@@ -0,0 +1 @@
+# Offline jobs
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Worker: keep active users' precomputed feeds fresh.
+
+    cd backend && python -m app.jobs.materialize_feeds --every 15  # run alongside the API
+    cd backend && python -m app.jobs.materialize_feeds             # one pass
+
+Each pass recomputes up to FEED_MATERIALIZE_BATCH due lists (see
+feed_materializer); one worker is enough, more only duplicate work.
+"""
+import argparse
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.core.logs import configure_logging
+from app.database import SessionLocal, init_db
+from app.services.feed_materializer import feed_materializer
+
+logger = logging.getLogger(__name__)
+
+
+def run_once() -> dict:
+    db = SessionLocal()
+    try:
+        return feed_materializer.refresh(db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds (immediately while a pass fills its batch)")
+    args = parser.parse_args()
+
+    listener = configure_logging(level=settings.LOG_LEVEL, levels=settings.LOG_LEVELS, fmt=settings.LOG_FORMAT)
+    try:
+        init_db()
+        print(json.dumps(run_once()))
+        while args.every > 0:
+            try:
+                stats = run_once()
+            except Exception:
+                logger.exception("Feed materialization pass failed")
+                stats = {"due": 0}
+            if stats["due"] < feed_materializer.batch:
+                time.sleep(args.every)
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Offline job: build the content embedding index from every reel's text.
+
+    cd backend && python -m app.jobs.reel_embeddings               # build once
+    cd backend && python -m app.jobs.reel_embeddings --every 86400  # rebuild daily
+
+Reels uploaded between builds are appended by the API as they are created; a
+rebuild re-clusters them and refreshes the IDF weights.
+"""
+import argparse
+import json
+import time
+
+from app.core.config import settings
+from app.core.logs import configure_logging
+from app.database import SessionLocal, init_db
+from app.services.embedding_service import embedding_index
+
+
+def run_once() -> dict:
+    db = SessionLocal()
+    try:
+        return embedding_index.build(db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--every", type=float, default=0, help="Rebuild every N seconds")
+    args = parser.parse_args()
+
+    listener = configure_logging(level=settings.LOG_LEVEL, levels=settings.LOG_LEVELS, fmt=settings.LOG_FORMAT)
+    try:
+        init_db()
+        print(json.dumps(run_once()))
+        while args.every > 0:
+            time.sleep(args.every)
+            print(json.dumps(run_once()))
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Offline job: transcribe reels that have no timed transcript segments yet.
+
+    cd backend && python -m app.jobs.reel_transcripts               # one batch
+    cd backend && python -m app.jobs.reel_transcripts --all         # every such reel
+
+Uploads are transcribed by the API in the background; this backfills reels
+from before segments existed, or whose transcription failed, by downloading
+each video back from Cloudinary. Rebuild the embedding index afterwards
+(app.jobs.reel_embeddings) so it picks up the new transcripts.
+"""
+import argparse
+import json
+
+from app.core.config import settings
+from app.core.logs import configure_logging
+from app.database import SessionLocal, init_db
+from app.services.ai_service import get_openai_client
+from app.services.reel_processing_service import reel_processing_service
+
+
+def run_once(limit: int, after_id: int = 0) -> dict:
+    db = SessionLocal()
+    try:
+        return reel_processing_service.backfill(db, limit, after_id)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=50, help="Reels per batch")
+    parser.add_argument("--all", action="store_true", help="Continue with further batches until every reel was tried")
+    args = parser.parse_args()
+
+    listener = configure_logging(level=settings.LOG_LEVEL, levels=settings.LOG_LEVELS, fmt=settings.LOG_FORMAT)
+    try:
+        init_db()
+        if not get_openai_client():
+            raise SystemExit("Transcription needs OPENAI_API_KEY")
+        stats = run_once(args.limit)
+        print(json.dumps(stats))
+        # Reels that fail stay without segments: continue after them, not from the start
+        while args.all and stats["reels"]:
+            stats = run_once(args.limit, stats["last_id"])
+            print(json.dumps(stats))
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
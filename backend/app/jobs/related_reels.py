@@ -0,0 +1,44 @@
+"""
+Offline job: recompute co-watch "related reels" neighbor lists.
+
+    cd backend && python -m app.jobs.related_reels             # incremental (first run is full)
+    cd backend && python -m app.jobs.related_reels --full
+    cd backend && python -m app.jobs.related_reels --every 900  # keep refreshing incrementally
+"""
+import argparse
+import json
+import time
+
+from app.core.config import settings
+from app.core.logs import configure_logging
+from app.database import SessionLocal, init_db
+from app.services.related_service import related_service
+
+
+def run_once(full: bool) -> dict:
+    db = SessionLocal()
+    try:
+        return related_service.refresh(db, full=full)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="Recompute every reel instead of only changed ones")
+    parser.add_argument("--every", type=float, default=0, help="Repeat (incrementally) every N seconds")
+    args = parser.parse_args()
+
+    listener = configure_logging(level=settings.LOG_LEVEL, levels=settings.LOG_LEVELS, fmt=settings.LOG_FORMAT)
+    try:
+        init_db()
+        print(json.dumps(run_once(args.full)))
+        while args.every > 0:
+            time.sleep(args.every)
+            print(json.dumps(run_once(False)))
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,76 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.database import init_db
-from app.api import auth, reels, courses, playlists, progress, comments, ai
+from app.database import engine, init_db
+from app.core.security import shutdown_password_hasher
+from app.core.compression import CompressionMiddleware
+from app.core.request_stats import RequestStatsMiddleware
+from app.core import metrics
+from app.core.profiler import ProfilingMiddleware, profile_store
+from app.core.logs import RequestIdMiddleware, configure_logging
+from app.api import auth, reels, tags, courses, playlists, progress, comments, ai, admin
+from app.services.watch_service import watch_service
+from app.services.search_service import search_service
+from app.services.transcript_service import transcript_service
+from app.services.tag_service import tag_index
+from app.services.trending_service import trending_service
+from app.services.embedding_service import embedding_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown work, kept out of import so workers and tools load fast"""
+    log_listener = configure_logging(
+        level=settings.LOG_LEVEL,
+        levels=settings.LOG_LEVELS,
+        fmt=settings.LOG_FORMAT,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sample_burst=settings.LOG_SAMPLE_BURST,
+        sample_window=settings.LOG_SAMPLE_WINDOW_SECONDS,
+        sample_rate=settings.LOG_SAMPLE_RATE,
+        slow_log_file=settings.SLOW_LOG_FILE,
+        slow_log_max_bytes=settings.SLOW_LOG_MAX_BYTES,
+        slow_log_backup_count=settings.SLOW_LOG_BACKUP_COUNT,
+    )
+    # Initialize database tables on startup
+    init_db()
+    # Full-text indexes and their sync triggers (SQLite FTS5)
+    search_service.ensure_index(engine)
+    transcript_service.ensure_index(engine)
+    # Tag autocomplete, built from the reels table
+    tag_index.start()
+    # Content embeddings: map the vector files built by app.jobs.reel_embeddings
+    embedding_index.start()
+    # Flush coalesced watch heartbeats and trending counters in the background
+    watch_service.start()
+    trending_service.start()
+    snapshot_writer = None
+    if settings.METRICS_MULTIPROC_DIR:
+        snapshot_writer = metrics.SnapshotWriter(
+            settings.METRICS_MULTIPROC_DIR, settings.METRICS_SNAPSHOT_INTERVAL_SECONDS
+        )
+        snapshot_writer.start()
+    yield
+    watch_service.stop()
+    trending_service.stop()
+    tag_index.stop()
+    embedding_index.stop()
+    shutdown_password_hasher()
+    if snapshot_writer:
+        snapshot_writer.stop()
+    log_listener.stop()
 
-# Initialize database tables on startup
-init_db()
 
 # Create FastAPI app
 app = FastAPI(
     title="EduBit API",
     description="Bite-sized learning platform API - Instagram Reels meets Udemy",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -23,14 +82,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL counts/timings as Server-Timing, N+1 detection and the slow request log
+app.add_middleware(
+    RequestStatsMiddleware,
+    n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+    raise_on_n_plus_one=settings.N_PLUS_ONE_RAISE,
+    slow_request_ms=settings.SLOW_REQUEST_MS,
+)
+
+# On-demand sampling profiler (X-Profile + X-Admin-Token, or PROFILING_SAMPLE_RATE)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_ms=settings.PROFILING_INTERVAL_MS,
+)
+
+# Compress JSON responses (added after CORS so it wraps the final response)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+)
+
+# Outermost, so every log record emitted while serving a request carries its X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(reels.router, prefix="/api")
+app.include_router(tags.router, prefix="/api")
 app.include_router(courses.router, prefix="/api")
 app.include_router(playlists.router, prefix="/api")
 app.include_router(progress.router, prefix="/api")
 app.include_router(comments.router, prefix="/api")
 app.include_router(ai.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 @app.get("/")
@@ -43,6 +132,15 @@ def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics (async so threadpool saturation is sampled from the event loop)"""
+    RequestStatsMiddleware._sample_threadpool()
+    # With several workers this writes, reads and may prune snapshot files: not on the loop
+    content = await run_in_threadpool(metrics.render, settings.METRICS_MULTIPROC_DIR)
+    return Response(content=content, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table, JSON, Float, LargeBinary, UniqueConstraint, Index, event, inspect
+from sqlalchemy.orm import relationship, column_property
 from datetime import datetime
 from app.database import Base
 
@@ -7,8 +7,8 @@ from app.database import Base
 course_reels = Table(
     'course_reels',
     Base.metadata,
-    Column('course_id', Integer, ForeignKey('micro_courses.id')),
-    Column('reel_id', Integer, ForeignKey('reels.id'))
+    Column('course_id', Integer, ForeignKey('micro_courses.id'), index=True),
+    Column('reel_id', Integer, ForeignKey('reels.id'), index=True)
 )
 
 # Association table for playlist reels
@@ -36,6 +36,8 @@ class User(Base):
     playlists = relationship("Playlist", back_populates="user", cascade="all, delete-orphan")
     progress = relationship("Progress", back_populates="user", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
+    watch_positions = relationship("WatchPosition", back_populates="user", cascade="all, delete-orphan")
+    course_completions = relationship("CourseCompletion", back_populates="user", cascade="all, delete-orphan")
 
 class Reel(Base):
     """Educational reel - 30-90 second video"""
@@ -52,16 +54,32 @@ class Reel(Base):
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     views_count = Column(Integer, default=0)
+    version = Column(Integer, default=1, nullable=False)  # Bumped on content changes (not views), see _bump_version
+    updated_at = Column(DateTime, default=datetime.utcnow)
     
     # AI-generated fields
     ai_summary = Column(Text, nullable=True)  # NEW: AI-generated summary
     ai_key_points = Column(JSON, nullable=True)  # NEW: List of key points
     ai_quiz = Column(JSON, nullable=True)  # NEW: Quiz questions
     transcript = Column(Text, nullable=True)
+    # For cards that show the "AI Enhanced" badge without loading the summary itself
+    has_ai_summary = column_property(ai_summary.isnot(None))
     # Relationships
     creator = relationship("User", back_populates="reels")
     comments = relationship("Comment", back_populates="reel", cascade="all, delete-orphan")
     progress = relationship("Progress", back_populates="reel", cascade="all, delete-orphan")
+    watch_positions = relationship("WatchPosition", back_populates="reel", cascade="all, delete-orphan")
+    transcript_segments = relationship(
+        "TranscriptSegment", back_populates="reel", cascade="all, delete-orphan",
+        order_by="TranscriptSegment.start_ms"
+    )
+    activity = relationship("ReelActivity", cascade="all, delete-orphan")
+    trending = relationship("ReelTrending", cascade="all, delete-orphan")
+    related = relationship(
+        "RelatedReel", foreign_keys="RelatedReel.reel_id", cascade="all, delete-orphan", order_by="RelatedReel.rank"
+    )
+    # Rows listing this reel as another reel's neighbor go with it too
+    related_to = relationship("RelatedReel", foreign_keys="RelatedReel.related_reel_id", cascade="all, delete-orphan")
     courses = relationship("MicroCourse", secondary=course_reels, back_populates="reels")
     playlists = relationship("Playlist", secondary=playlist_reels, back_populates="reels")
 
@@ -75,11 +93,15 @@ class MicroCourse(Base):
     difficulty_level = Column(String(50), default="beginner")
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    reel_count = Column(Integer, default=0)  # Denormalized len(reels)
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     creator = relationship("User", back_populates="micro_courses")
     reels = relationship("Reel", secondary=course_reels, back_populates="courses")
     progress = relationship("Progress", back_populates="course", cascade="all, delete-orphan")
+    completions = relationship("CourseCompletion", back_populates="course", cascade="all, delete-orphan")
 
 class Playlist(Base):
     """User-created playlist of reels"""
@@ -90,18 +112,36 @@ class Playlist(Base):
     description = Column(Text)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="playlists")
     reels = relationship("Reel", secondary=playlist_reels, back_populates="playlists")
 
+# Attributes whose changes don't alter a cacheable representation's version
+_UNVERSIONED_ATTRIBUTES = {"version", "updated_at", "views_count", "reel_count"}
+
+def _bump_version(mapper, connection, target):
+    """Bump version/updated_at when content columns or the `reels` collection change"""
+    state = inspect(target)
+    keys = [attr.key for attr in mapper.column_attrs if attr.key not in _UNVERSIONED_ATTRIBUTES]
+    if "reels" in mapper.relationships:
+        keys.append("reels")
+    if any(state.attrs[key].history.has_changes() for key in keys):
+        target.version = (target.version or 0) + 1
+        target.updated_at = datetime.utcnow()
+
+for _versioned in (Reel, MicroCourse, Playlist):
+    event.listen(_versioned, "before_update", _bump_version)
+
 class Progress(Base):
     """Track user progress on reels and courses"""
     __tablename__ = "progress"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=True, index=True)
     course_id = Column(Integer, ForeignKey("micro_courses.id"), nullable=True)
     completed = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True)
@@ -125,3 +165,114 @@ class Comment(Base):
     # Relationships
     user = relationship("User", back_populates="comments")
     reel = relationship("Reel", back_populates="comments")
+
+class WatchPosition(Base):
+    """Furthest playback position a user reached in a reel (fed by heartbeats)"""
+    __tablename__ = "watch_positions"
+    __table_args__ = (UniqueConstraint("user_id", "reel_id", name="uq_watch_positions_user_reel"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=False, index=True)
+    position_seconds = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", back_populates="watch_positions")
+    reel = relationship("Reel", back_populates="watch_positions")
+
+class TranscriptSegment(Base):
+    """One timed stretch of a reel's transcript (Whisper segment), times in milliseconds"""
+    __tablename__ = "transcript_segments"
+    __table_args__ = (Index("ix_transcript_segments_reel_start", "reel_id", "start_ms"),)
+    
+    id = Column(Integer, primary_key=True)
+    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=False)
+    start_ms = Column(Integer, nullable=False)
+    end_ms = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    
+    # Relationships
+    reel = relationship("Reel", back_populates="transcript_segments")
+
+class ReelActivity(Base):
+    """Views and completions of a reel in one hour (hour = hours since the Unix epoch)"""
+    __tablename__ = "reel_activity"
+    __table_args__ = (UniqueConstraint("reel_id", "hour", name="uq_reel_activity_reel_hour"),)
+    
+    id = Column(Integer, primary_key=True)
+    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=False)
+    hour = Column(Integer, nullable=False, index=True)
+    views = Column(Integer, default=0, nullable=False)
+    completions = Column(Integer, default=0, nullable=False)
+
+class ReelTrending(Base):
+    """
+    Time-decayed activity of a reel as ln(sum of weight * e^(decay * hour)) over its
+    activity: ordering by it is ordering by the current decayed score, at any time
+    """
+    __tablename__ = "reel_trending"
+    
+    reel_id = Column(Integer, ForeignKey("reels.id"), primary_key=True)
+    trend_key = Column(Float, nullable=False, index=True)
+
+class RelatedReel(Base):
+    """Precomputed co-watch neighbor of a reel (item-item cosine), rank 0 = most similar"""
+    __tablename__ = "related_reels"
+    __table_args__ = (UniqueConstraint("reel_id", "rank", name="uq_related_reels_reel_rank"),)
+    
+    id = Column(Integer, primary_key=True)
+    reel_id = Column(Integer, ForeignKey("reels.id"), nullable=False)
+    related_reel_id = Column(Integer, ForeignKey("reels.id"), nullable=False, index=True)
+    rank = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+
+class JobState(Base):
+    """Progress marker of an offline job, e.g. the last Progress id it has processed"""
+    __tablename__ = "job_state"
+    
+    name = Column(String(100), primary_key=True)
+    watermark = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MaterializedFeed(Base):
+    """
+    A user's precomputed feed: the top reel ids in order, refreshed by
+    app.jobs.materialize_feeds. Progress writes mark it stale (and bump
+    profile_version, so a refresh computed from the old profile doesn't clear it)
+    """
+    __tablename__ = "materialized_feeds"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    reel_ids = Column(JSON, nullable=True)  # None until first computed
+    stale = Column(Boolean, default=True, nullable=False)
+    profile_version = Column(Integer, default=0, nullable=False)
+    catalog_watermark = Column(Integer, default=0, nullable=False)  # Newest reel id when computed
+    computed_at = Column(DateTime, nullable=True, index=True)
+    requested_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # Last feed open (hourly resolution)
+
+class UserWatchedSet(Base):
+    """
+    Every reel a user has a Progress row for, as a sorted little-endian uint32
+    array (see watched_set_service); updated by progress writes
+    """
+    __tablename__ = "user_watched_sets"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    reel_ids = Column(LargeBinary, nullable=False)
+    size = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CourseCompletion(Base):
+    """Denormalized count of completed reels per (user, course)"""
+    __tablename__ = "course_completions"
+    __table_args__ = (UniqueConstraint("user_id", "course_id", name="uq_course_completions_user_course"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("micro_courses.id"), nullable=False, index=True)
+    completed_reels = Column(Integer, default=0)
+    
+    # Relationships
+    user = relationship("User", back_populates="course_completions")
+    course = relationship("MicroCourse", back_populates="completions")
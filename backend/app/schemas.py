@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -84,6 +84,55 @@ class ReelResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ReelCard(BaseModel):
+    """Compact reel projection for list/feed pages (no AI payloads or transcript)"""
+    id: int
+    title: str
+    description: Optional[str] = None
+    video_url: str
+    tags: Optional[str] = None
+    difficulty_level: str
+    duration_seconds: int
+    creator_id: int
+    created_at: datetime
+    views_count: int
+    has_ai_summary: bool = False
+    creator_name: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class TrendingReel(ReelCard):
+    trending_score: float  # Views plus weighted completions, decayed by age
+
+class RelatedReelCard(ReelCard):
+    similarity: float  # Co-watch cosine similarity, 0-1
+
+class SimilarReelCard(ReelCard):
+    similarity: float  # Content (text embedding) cosine similarity, 0-1
+
+class ReelSearchHit(ReelCard):
+    snippet: Optional[str] = None  # Best-matching fragment, hits wrapped in <mark>
+
+class ReelSearchPage(BaseModel):
+    results: List[ReelSearchHit]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; null on the last page
+
+class TranscriptMoment(BaseModel):
+    """A transcript segment; times in seconds"""
+    start: float
+    end: float
+    at: float  # Where the searched phrase starts (segment start when not searching)
+    text: str
+
+class ReelMoments(BaseModel):
+    reel: ReelCard
+    moments: List[TranscriptMoment]
+
+class TagSuggestion(BaseModel):
+    tag: str
+    count: int  # Reels carrying the tag
+
 # ========== MicroCourse Schemas ==========
 class MicroCourseBase(BaseModel):
     title: str
@@ -140,6 +189,14 @@ class ProgressResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WatchHeartbeat(BaseModel):
+    reel_id: int
+    position_seconds: float = Field(..., ge=0)
+
+class WatchPositionResponse(BaseModel):
+    reel_id: int
+    position_seconds: float
+
 class CourseProgressResponse(BaseModel):
     course_id: int
     total_reels: int
@@ -179,6 +236,17 @@ class QuizQuestion(BaseModel):
 class QuizResponse(BaseModel):
     questions: List[QuizQuestion]
 
+# ========== Admin Schemas ==========
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    started_at: float
+    duration_ms: float
+    samples: int
+    max_concurrent_requests: int
+
 class FeedRequest(BaseModel):
     limit: int = 20
     offset: int = 0
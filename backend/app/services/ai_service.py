@@ -1,86 +1,150 @@
+import functools
+import logging
 from typing import List, Dict, Any, Optional
 import json
 import os
 import tempfile
-import requests
-from moviepy.editor import VideoFileClip
+import time
 from app.core.config import settings
+from app.core.metrics import Counter, Histogram
 
-# Initialize OpenAI client
-try:
-    from openai import OpenAI
-    if settings.OPENAI_API_KEY:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        AI_ENABLED = True
-    else:
-        AI_ENABLED = False
-        client = None
-except Exception:
-    AI_ENABLED = False
-    client = None
+logger = logging.getLogger(__name__)
+
+AI_REQUESTS = Counter("edubit_ai_requests_total", "AI operations by operation and outcome (ok, error, disabled)")
+AI_SECONDS = Histogram(
+    "edubit_ai_request_seconds", "Latency of AI operations that reached the provider",
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+
+def _record_ai_call(operation: str, outcome: str, start: Optional[float] = None) -> None:
+    AI_REQUESTS.inc(operation=operation, outcome=outcome)
+    if start is not None:
+        AI_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+def _segment_field(segment: Any, name: str):
+    # Older SDKs return verbose_json segments as plain dicts, newer ones as objects
+    return segment.get(name) if isinstance(segment, dict) else getattr(segment, name, None)
+
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client():
+    """OpenAI client, created on first use (None when AI is disabled or unavailable)"""
+    if not settings.OPENAI_API_KEY:
+        return None
+    try:
+        from openai import OpenAI
+        return OpenAI(api_key=settings.OPENAI_API_KEY)
+    except Exception:
+        return None
 
 class AIService:
     """Service for AI-powered video transcription and content generation"""
     
     @staticmethod
-    def transcribe_video(video_url: str) -> Optional[str]:
+    def transcribe_video(video_url: str) -> Optional[Dict[str, Any]]:
         """
-        Download video, extract audio, and transcribe using OpenAI Whisper
-        Returns transcript text or None if failed
+        Download a stored video and transcribe it (see transcribe_file); for reels
+        whose upload is no longer on local disk. None if failed
         """
-        if not AI_ENABLED or not client:
-            print("AI not enabled")
+        if not get_openai_client():
+            logger.debug("AI not enabled, skipping transcription")
+            _record_ai_call("transcribe", "disabled")
             return None
         
         temp_video_path = None
-        temp_audio_path = None
-        
         try:
-            # Step 1: Download video from Cloudinary URL
-            print(f"Downloading video from {video_url}")
+            import requests
+            
+            logger.info("Downloading video for transcription", extra={"video_url": video_url})
             response = requests.get(video_url, stream=True, timeout=60)
             response.raise_for_status()
             
-            # Save to temp video file
             temp_video_path = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4').name
             with open(temp_video_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
             
-            print(f"Video downloaded to {temp_video_path}")
+            logger.debug("Video downloaded", extra={"path": temp_video_path})
+            return AIService.transcribe_file(temp_video_path)
+        
+        except Exception:
+            logger.exception("Video download for transcription failed", extra={"video_url": video_url})
+            _record_ai_call("transcribe", "error")
+            return None
+        
+        finally:
+            if temp_video_path and os.path.exists(temp_video_path):
+                try:
+                    os.unlink(temp_video_path)
+                except:
+                    pass
+    
+    @staticmethod
+    def transcribe_file(video_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract a local video's audio and transcribe it using OpenAI Whisper
+        Returns {"text": ..., "segments": [{"start", "end", "text"}, ...]} (times in
+        seconds) or None if failed
+        """
+        client = get_openai_client()
+        if not client:
+            logger.debug("AI not enabled, skipping transcription")
+            _record_ai_call("transcribe", "disabled")
+            return None
+        
+        temp_audio_path = None
+        start = time.perf_counter()
+        
+        try:
+            # Heavy import (moviepy pulls in numpy, imageio and ffmpeg probing) only when transcribing
+            from moviepy.editor import VideoFileClip
             
-            # Step 2: Extract audio using moviepy
-            print("Extracting audio from video...")
-            video = VideoFileClip(temp_video_path)
+            # Step 1: Extract audio using moviepy
+            video = VideoFileClip(video_path)
             temp_audio_path = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3').name
             video.audio.write_audiofile(temp_audio_path, codec='mp3', verbose=False, logger=None)
             video.close()
             
-            print(f"Audio extracted to {temp_audio_path}")
+            logger.debug("Audio extracted", extra={"path": temp_audio_path})
             
-            # Step 3: Transcribe audio with OpenAI Whisper
-            print("Transcribing audio with Whisper...")
+            # Step 2: Transcribe audio with OpenAI Whisper (verbose_json keeps segment timings)
             with open(temp_audio_path, 'rb') as audio_file:
-                transcript = client.audio.transcriptions.create(
+                transcription = client.audio.transcriptions.create(
                     model="whisper-1",
                     file=audio_file,
-                    response_format="text"
+                    response_format="verbose_json"
                 )
             
-            print(f"Transcription completed: {len(transcript)} characters")
+            segments = [
+                {
+                    "start": float(_segment_field(segment, "start") or 0),
+                    "end": float(_segment_field(segment, "end") or 0),
+                    "text": (_segment_field(segment, "text") or "").strip(),
+                }
+                for segment in getattr(transcription, "segments", None) or []
+            ]
+            transcript = {"text": transcription.text, "segments": segments}
+            
+            logger.info(
+                "Transcription completed",
+                extra={
+                    "characters": len(transcription.text),
+                    "segments": len(segments),
+                    "seconds": round(time.perf_counter() - start, 2),
+                }
+            )
+            _record_ai_call("transcribe", "ok", start)
             return transcript
             
-        except Exception as e:
-            print(f"Transcription error: {str(e)}")
+        except Exception:
+            logger.exception("Transcription failed", extra={"video_path": video_path})
+            _record_ai_call("transcribe", "error", start)
             return None
         
         finally:
-            # Cleanup temp files
-            if temp_video_path and os.path.exists(temp_video_path):
-                try:
-                    os.unlink(temp_video_path)
-                except:
-                    pass
+            # Cleanup temp audio
             if temp_audio_path and os.path.exists(temp_audio_path):
                 try:
                     os.unlink(temp_audio_path)
@@ -97,7 +161,9 @@ class AIService:
     ) -> Dict[str, Any]:
         """Generate summary from video transcript using GPT"""
         
-        if not AI_ENABLED or not client:
+        client = get_openai_client()
+        if not client:
+            _record_ai_call("summary", "disabled")
             return {
                 "summary": f"This content covers {title}. {description[:100] if description else 'Educational video content.'}",
                 "key_points": [
@@ -107,6 +173,7 @@ class AIService:
                 ]
             }
         
+        start = time.perf_counter()
         try:
             # Truncate transcript if too long (GPT token limit)
             max_transcript_length = 3000
@@ -152,10 +219,12 @@ Format as JSON:
                 content = content.strip()
             
             result = json.loads(content)
+            _record_ai_call("summary", "ok", start)
             return result
             
-        except Exception as e:
-            print(f"Summary generation error: {e}")
+        except Exception:
+            logger.exception("Summary generation failed")
+            _record_ai_call("summary", "error", start)
             return {
                 "summary": f"Learn about {title} in this educational video.",
                 "key_points": [
@@ -174,7 +243,9 @@ Format as JSON:
     ) -> Dict[str, Any]:
         """Generate quiz questions based on video transcript"""
         
-        if not AI_ENABLED or not client:
+        client = get_openai_client()
+        if not client:
+            _record_ai_call("quiz", "disabled")
             return {
                 "questions": [
                     {
@@ -185,6 +256,7 @@ Format as JSON:
                 ]
             }
         
+        start = time.perf_counter()
         try:
             max_transcript_length = 3000
             truncated_transcript = transcript[:max_transcript_length] if len(transcript) > max_transcript_length else transcript
@@ -236,10 +308,12 @@ The correct_answer should be the actual text of the correct option, not an index
                 content = content.strip()
             
             result = json.loads(content)
+            _record_ai_call("quiz", "ok", start)
             return result
             
-        except Exception as e:
-            print(f"Quiz generation error: {e}")
+        except Exception:
+            logger.exception("Quiz generation failed")
+            _record_ai_call("quiz", "error", start)
             return {
                 "questions": [
                     {
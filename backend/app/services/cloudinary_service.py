@@ -1,20 +1,37 @@
-import cloudinary
-import cloudinary.uploader
+import functools
+import logging
+import time
 from typing import Dict, Any
 from fastapi import UploadFile, HTTPException
 from app.core.config import settings
+from app.core.metrics import Counter, Histogram
 
-# Initialize Cloudinary
-if settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY and settings.CLOUDINARY_API_SECRET:
+logger = logging.getLogger(__name__)
+
+UPLOADS = Counter("edubit_video_uploads_total", "Video uploads to Cloudinary by outcome")
+UPLOAD_BYTES = Counter("edubit_video_upload_bytes_total", "Bytes of video sent to Cloudinary")
+UPLOAD_SECONDS = Histogram(
+    "edubit_video_upload_seconds", "Cloudinary upload latency",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+CLOUDINARY_ENABLED = bool(
+    settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY and settings.CLOUDINARY_API_SECRET
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_uploader():
+    """Import and configure the Cloudinary SDK on first use"""
+    import cloudinary
+    import cloudinary.uploader
     cloudinary.config(
         cloud_name=settings.CLOUDINARY_CLOUD_NAME,
         api_key=settings.CLOUDINARY_API_KEY,
         api_secret=settings.CLOUDINARY_API_SECRET,
         secure=True
     )
-    CLOUDINARY_ENABLED = True
-else:
-    CLOUDINARY_ENABLED = False
+    return cloudinary.uploader
 
 class CloudinaryService:
     """Service for uploading videos to Cloudinary"""
@@ -34,10 +51,12 @@ class CloudinaryService:
                 detail=f"Invalid file type. Expected video/*, got {file.content_type}"
             )
         
+        start = time.perf_counter()
         try:
             contents = await file.read()
+            UPLOAD_BYTES.inc(len(contents))
             
-            result = cloudinary.uploader.upload(
+            result = get_uploader().upload(
                 contents,
                 resource_type="video",
                 folder=folder,
@@ -46,6 +65,16 @@ class CloudinaryService:
                 eager=[{"width": 720, "height": 1280, "crop": "limit", "quality": "auto"}],
                 eager_async=True
             )
+            UPLOADS.inc(outcome="ok")
+            UPLOAD_SECONDS.observe(time.perf_counter() - start)
+            logger.info(
+                "Video uploaded",
+                extra={
+                    "public_id": result.get("public_id"),
+                    "bytes": len(contents),
+                    "seconds": round(time.perf_counter() - start, 2),
+                }
+            )
             
             return {
                 "secure_url": result.get("secure_url"),
@@ -58,7 +87,8 @@ class CloudinaryService:
             }
             
         except Exception as e:
-            print(f"Cloudinary upload error: {str(e)}")
+            logger.exception("Cloudinary upload failed", extra={"upload_filename": file.filename})
+            UPLOADS.inc(outcome="error")
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to upload video to Cloudinary: {str(e)}"
@@ -71,10 +101,10 @@ class CloudinaryService:
             return False
         
         try:
-            result = cloudinary.uploader.destroy(public_id, resource_type="video")
+            result = get_uploader().destroy(public_id, resource_type="video")
             return result.get("result") == "ok"
-        except Exception as e:
-            print(f"Cloudinary delete error: {str(e)}")
+        except Exception:
+            logger.exception("Cloudinary delete failed", extra={"public_id": public_id})
             return False
 
 cloudinary_service = CloudinaryService()
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, load_only
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models import Reel, Progress
+from app.services.feed_pipeline import FeedPipeline, FeedContext
+from app.services.watched_set_service import WatchedSet
+
+logger = logging.getLogger(__name__)
+
+COLD_START_REFRESHES = Counter("edubit_feed_cold_start_refreshes_total", "Shared cold-start rankings recomputed")
+
+# Distinct (difficulty, tags, popularity) rankings kept per process; tags are free
+# text, so the cache is emptied rather than allowed to grow without bound
+MAX_RANKINGS = 1000
+
+# No user has id 0: the pipeline sees an empty profile
+_NOBODY = 0
+
+RankingKey = Tuple[str, str, str]
+
+
+class ColdStartFeed:
+    """
+    One feed ranking per (difficulty, tags, popularity) shared by every user
+    without history, instead of a pipeline run per user.
+
+    With an empty profile the weighted ranker orders by popularity alone, so every
+    new user would get the same list anyway; a signup spike now costs one
+    recomputation per filter combination and TTL (others keep serving the previous
+    list meanwhile, or wait for the first one) rather than one per request.
+    """
+
+    def __init__(
+        self,
+        sources: str = settings.COLD_START_SOURCES,
+        top_n: int = settings.COLD_START_TOP_N,
+        ttl: float = settings.COLD_START_TTL_SECONDS,
+    ):
+        self.top_n = top_n
+        self.ttl = ttl
+        self.pipeline = FeedPipeline.from_settings(sources, top_n)
+        # key -> (monotonic computed time, ranked reel ids)
+        self._rankings: Dict[RankingKey, Tuple[float, List[int]]] = {}
+        # keys being recomputed -> set once done
+        self._refreshing: Dict[RankingKey, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def applies(db: Session, user_id: int) -> bool:
+        """True when the user has watched nothing yet (one index probe)"""
+        return db.query(Progress.id).filter(
+            Progress.user_id == user_id, Progress.reel_id.isnot(None)
+        ).first() is None
+
+    def read(
+        self, db: Session, offset: int, limit: int,
+        tags: Optional[str] = None, difficulty: Optional[str] = None, popularity: str = "lifetime",
+    ) -> Optional[List[int]]:
+        """Reel ids of one page of the shared ranking, or None for pages past its top-N"""
+        reel_ids = self.ranking(db, tags, difficulty, popularity)
+        # A list shorter than top_n is the whole feed, so any page can be cut from it
+        if offset + limit > len(reel_ids) and len(reel_ids) >= self.top_n:
+            return None
+        return reel_ids[offset:offset + limit]
+
+    def ranking(self, db: Session, tags: Optional[str], difficulty: Optional[str], popularity: str) -> List[int]:
+        key = (difficulty or "", tags or "", popularity)
+        while True:
+            with self._lock:
+                entry = self._rankings.get(key)
+                pending = self._refreshing.get(key)
+                if entry is not None and (pending is not None or time.monotonic() - entry[0] < self.ttl):
+                    return entry[1]
+                if pending is None:
+                    done = self._refreshing[key] = threading.Event()
+                    break
+            # First request for this key is computing it: wait instead of piling on
+            if not pending.wait(timeout=30):
+                logger.warning("Cold-start ranking still computing; computing here too", extra={"key": key})
+                done = None
+                break
+
+        reel_ids: Optional[List[int]] = None
+        try:
+            reel_ids = self._compute(db, tags, difficulty, popularity)
+            COLD_START_REFRESHES.inc()
+        finally:
+            # Store before waking the waiters, so they find the new ranking
+            with self._lock:
+                if reel_ids is not None:
+                    if key not in self._rankings and len(self._rankings) >= MAX_RANKINGS:
+                        self._rankings.clear()
+                    self._rankings[key] = (time.monotonic(), reel_ids)
+                if done is not None:
+                    self._refreshing.pop(key, None)
+            if done is not None:
+                done.set()
+        return reel_ids
+
+    def _compute(self, db: Session, tags: Optional[str], difficulty: Optional[str], popularity: str) -> List[int]:
+        filters = []
+        if tags:
+            filters.append(Reel.tags.contains(tags))
+        if difficulty:
+            filters.append(Reel.difficulty_level == difficulty)
+        query = db.query(Reel).options(load_only(
+            Reel.id, Reel.tags, Reel.difficulty_level, Reel.views_count, Reel.creator_id
+        )).filter(*filters)
+        context = FeedContext(db=db, user_id=_NOBODY, query=query, filters=filters, popularity=popularity)
+        # The empty profile is known: don't look it up (or store a watched set) for a user that doesn't exist
+        context.watched, context.recent = WatchedSet(), []
+        ranked = self.pipeline.run(context, limit=self.top_n)
+        return [item["reel"].id for item in ranked[:self.top_n]]
+
+cold_start_feed = ColdStartFeed()
@@ -0,0 +1,496 @@
+"""
+Content embeddings for "more like this" retrieval, CPU only.
+
+A reel's vector is a hashed bag of words and word bigrams over its title,
+description and transcript: each n-gram is hashed (crc32, so every process
+agrees) to one of `dim` buckets with a +/-1 sign, weighted by sublinear term
+frequency and the bucket's IDF, and the result is L2-normalized, so a dot
+product is a cosine. There is no vocabulary to keep in sync; the IDF is frozen
+when the index is built and reused for reels added later.
+
+Vectors live in a float32 file that every worker memory-maps (the page cache
+holds one copy). The approximate nearest-neighbor index is an inverted file:
+vectors are clustered with spherical k-means and stored grouped by cluster, so a
+query scores the centroids and then only the `nprobe` closest clusters, each a
+contiguous slice of the file. Reels added after the build are appended as an
+unclustered tail, which every query scans exhaustively until the next build.
+
+On disk (EMBEDDING_DIR), each build is a generation directory named by the
+CURRENT file, which the build job replaces atomically:
+
+    gen-<n>/vectors.f32  rows x dim float32: built rows by cluster, then the tail
+    gen-<n>/ids.i64      reel id of each row (-1 once the reel is deleted)
+    gen-<n>/index.npz    centroids, cluster offsets and idf
+    gen-<n>/meta.json    dim, rows, built_rows; rewritten on every append
+
+Appends and generation swaps are serialized across processes by a file lock.
+NumPy is imported lazily so the API starts without paying for it.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Reel
+from app.services.search_service import iter_words
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_FIELDS = ("title", "description", "transcript")
+# A title word says more about a reel than one transcript word among hundreds
+FIELD_WEIGHTS = {"title": 3.0, "description": 1.5, "transcript": 1.0}
+# Reels per vectorization/assignment batch in builds
+BUILD_BATCH = 2000
+# Rows k-means is trained on (per cluster, and at most)
+TRAIN_ROWS_PER_CLUSTER = 64
+MAX_TRAIN_ROWS = 100_000
+KMEANS_ITERATIONS = 8
+
+
+def ngram_hashes(value: Optional[str]) -> Iterator[int]:
+    """crc32 of every normalized word and adjacent word pair"""
+    previous = None
+    for _, _, word in iter_words(value):
+        encoded = word.encode()
+        yield zlib.crc32(encoded)
+        if previous is not None:
+            yield zlib.crc32(encoded, previous)
+        previous = zlib.crc32(b" ", zlib.crc32(encoded))
+
+
+def term_weights(fields: Dict[str, Optional[str]], dim: int) -> Dict[int, float]:
+    """bucket -> signed, sublinear-tf weight of a reel's text (before IDF)"""
+    counts: Dict[int, float] = {}
+    for name, weight in FIELD_WEIGHTS.items():
+        field_counts: Dict[int, int] = {}
+        for h in ngram_hashes(fields.get(name)):
+            field_counts[h] = field_counts.get(h, 0) + 1
+        for h, count in field_counts.items():
+            counts[h] = counts.get(h, 0.0) + weight * (1.0 + math.log(count))
+    buckets: Dict[int, float] = {}
+    for h, value in counts.items():
+        bucket = h % dim
+        buckets[bucket] = buckets.get(bucket, 0.0) + (value if h & 0x80000000 else -value)
+    return buckets
+
+
+def reel_fields(reel: Any) -> Dict[str, Optional[str]]:
+    return {name: getattr(reel, name, None) for name in EMBEDDED_FIELDS}
+
+
+class _Generation:
+    """One build's memory-mapped files, as seen at load time (immutable once published)"""
+
+    def __init__(self, path: str, previous: Optional["_Generation"] = None):
+        import numpy as np
+
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.rows = meta["rows"]
+        self.built_rows = meta["built_rows"]
+        index = np.load(os.path.join(path, "index.npz"))
+        self.centroids = index["centroids"]
+        self.offsets = index["offsets"]
+        self.idf = index["idf"]
+        self.vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(self.rows, self.dim)) \
+            if self.rows else np.zeros((0, self.dim), dtype=np.float32)
+        self.ids = np.memmap(os.path.join(path, "ids.i64"), dtype=np.int64, mode="r", shape=(self.rows,)) \
+            if self.rows else np.zeros(0, dtype=np.int64)
+        # id -> row: a sorted copy of the built rows' ids (shared with the previous load of
+        # this generation, only the tail changes) and a dict for the tail
+        if previous is not None and previous.path == path and previous.built_rows == self.built_rows:
+            self.sorted_ids, self.sorted_rows = previous.sorted_ids, previous.sorted_rows
+        else:
+            self.sorted_rows = np.argsort(self.ids[:self.built_rows], kind="stable")
+            self.sorted_ids = np.asarray(self.ids[:self.built_rows])[self.sorted_rows]
+        # For a reused id the latest row wins
+        self.tail = {reel_id: row for row, reel_id in enumerate(self.ids[self.built_rows:].tolist(), self.built_rows)}
+
+    def row(self, reel_id: int) -> Optional[int]:
+        import numpy as np
+
+        row = self.tail.get(reel_id)
+        if row is None:
+            position = int(np.searchsorted(self.sorted_ids, reel_id))
+            if position == len(self.sorted_ids) or self.sorted_ids[position] != reel_id:
+                return None
+            row = int(self.sorted_rows[position])
+        # Deleted since load (ids are updated in place)
+        return row if self.ids[row] == reel_id else None
+
+
+class EmbeddingIndex:
+    """Builds, appends to and queries the memory-mapped content embedding index"""
+
+    def __init__(
+        self,
+        directory: str = settings.EMBEDDING_DIR,
+        dim: int = settings.EMBEDDING_DIM,
+        nprobe: int = settings.EMBEDDING_NPROBE,
+        reload_interval: float = settings.EMBEDDING_RELOAD_SECONDS,
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = nprobe
+        self.reload_interval = reload_interval
+        self._generation: Optional[_Generation] = None
+        self._loaded_stamp: Optional[Tuple[str, float]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- files ----
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across processes (and, via flock on a fresh fd, threads)"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _current_path(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "CURRENT")) as f:
+                return os.path.join(self.directory, f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def _stamp(self) -> Optional[Tuple[str, float]]:
+        path = self._current_path()
+        if path is None:
+            return None
+        try:
+            return path, os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def reload(self, force: bool = False) -> bool:
+        """Map the current generation if it (or its tail) changed; True when (re)loaded"""
+        stamp = self._stamp()
+        if stamp is None or (stamp == self._loaded_stamp and not force):
+            return False
+        self._generation = _Generation(stamp[0], previous=self._generation)
+        self._loaded_stamp = stamp
+        return True
+
+    @staticmethod
+    def _write_meta(path: str, meta: Dict[str, Any]) -> None:
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    # ---- vectors ----
+
+    def vectorize(self, fields_list: List[Dict[str, Optional[str]]], idf=None):
+        """Rows of L2-normalized vectors (IDF-weighted when `idf` is given)"""
+        import numpy as np
+
+        matrix = np.zeros((len(fields_list), self.dim), dtype=np.float32)
+        for i, fields in enumerate(fields_list):
+            weights = term_weights(fields, self.dim)
+            if weights:
+                matrix[i, list(weights)] = list(weights.values())
+        if idf is not None:
+            matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def __len__(self) -> int:
+        generation = self._generation
+        return generation.rows if generation else 0
+
+    # ---- incremental updates ----
+
+    def add(self, reel: Reel) -> bool:
+        """Append a new reel's vector to the current generation; False when no index has been built yet"""
+        if self._current_path() is None:
+            return False
+        with self._locked():
+            path = self._current_path()
+            if path is None:
+                return False
+            generation = _Generation(path, previous=self._generation)
+            vector = self.vectorize([reel_fields(reel)], generation.idf)
+            self._append(generation, vector, [reel.id])
+        self.reload()
+        return True
+
+    def remove(self, reel_id: int) -> None:
+        """Tombstone a deleted reel's rows so queries stop returning it"""
+        import numpy as np
+
+        if self._current_path() is None:
+            return
+        with self._locked():
+            path = self._current_path()
+            generation = _Generation(path, previous=self._generation)
+            rows = np.flatnonzero(np.asarray(generation.ids) == reel_id)
+            if not len(rows):
+                return
+            ids = np.memmap(os.path.join(path, "ids.i64"), dtype=np.int64, mode="r+", shape=(generation.rows,))
+            ids[rows] = -1
+            ids.flush()
+            del ids
+            self._write_meta(path, {"dim": generation.dim, "rows": generation.rows, "built_rows": generation.built_rows})
+        self.reload()
+
+    def _append(self, generation: _Generation, vectors, reel_ids: List[int]) -> None:
+        """Append tail rows; caller holds the lock"""
+        import numpy as np
+
+        path = generation.path
+        # Trim anything a crashed writer left past the committed row count
+        for name, width in (("vectors.f32", 4 * generation.dim), ("ids.i64", 8)):
+            with open(os.path.join(path, name), "r+b") as f:
+                f.truncate(generation.rows * width)
+                f.seek(0, os.SEEK_END)
+                f.write((np.asarray(vectors, dtype=np.float32) if name == "vectors.f32"
+                         else np.asarray(reel_ids, dtype=np.int64)).tobytes())
+        self._write_meta(path, {
+            "dim": generation.dim, "rows": generation.rows + len(reel_ids), "built_rows": generation.built_rows
+        })
+
+    # ---- queries ----
+
+    def vector(self, reel_id: int):
+        generation = self._generation
+        if generation is None:
+            return None
+        row = generation.row(reel_id)
+        return None if row is None else generation.vectors[row]
+
+    def search(self, query, k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """(reel id, cosine) of the ~k nearest vectors to `query`, best first"""
+        import numpy as np
+
+        generation = self._generation
+        if generation is None or not generation.rows:
+            return []
+        exclude = set(exclude)
+        blocks = []
+        if generation.built_rows:
+            lists = len(generation.centroids)
+            closest = generation.centroids @ query
+            probe = np.argpartition(-closest, self.nprobe)[:self.nprobe] if lists > self.nprobe else range(lists)
+            for cluster in probe:
+                begin, end = int(generation.offsets[cluster]), int(generation.offsets[cluster + 1])
+                if end > begin:
+                    blocks.append((begin, generation.vectors[begin:end] @ query))
+        if generation.rows > generation.built_rows:
+            blocks.append((generation.built_rows, generation.vectors[generation.built_rows:] @ query))
+        if not blocks:
+            return []
+
+        rows = np.concatenate([np.arange(begin, begin + len(scores)) for begin, scores in blocks])
+        scores = np.concatenate([scores for _, scores in blocks])
+        wanted = k + len(exclude)
+        if len(scores) > wanted:
+            best = np.argpartition(-scores, wanted)[:wanted]
+            rows, scores = rows[best], scores[best]
+        results = []
+        for i in np.argsort(-scores, kind="stable"):
+            reel_id = int(generation.ids[rows[i]])
+            if reel_id < 0 or reel_id in exclude or scores[i] <= 0:
+                continue
+            results.append((reel_id, round(float(scores[i]), 6)))
+            exclude.add(reel_id)
+            if len(results) == k:
+                break
+        return results
+
+    def similar(self, reel_id: int, k: int) -> List[Tuple[int, float]]:
+        """Reels whose content is closest to one reel's"""
+        vector = self.vector(reel_id)
+        return [] if vector is None else self.search(vector, k, exclude=(reel_id,))
+
+    def more_like(self, reel_ids: Iterable[int], k: int) -> Dict[int, float]:
+        """reel id -> cosine to the centroid of `reel_ids` (e.g. recent watches), excluding them"""
+        reel_ids = list(reel_ids)
+        vectors = [vector for vector in (self.vector(reel_id) for reel_id in reel_ids) if vector is not None]
+        if not vectors:
+            return {}
+        import numpy as np
+
+        query = np.mean(vectors, axis=0)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return {}
+        return dict(self.search(query / norm, k, exclude=reel_ids))
+
+    # ---- full build (offline job) ----
+
+    def build(self, db: Session) -> Dict[str, Any]:
+        """
+        Embed every reel into a new generation, cluster it and make it current.
+        Reels appended to the previous generation during the build are carried over.
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"gen-{time.time_ns()}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+
+        # Pass 1: raw term weights into a scratch file, counting document frequencies
+        count = db.query(Reel.id).count()
+        raw_path = os.path.join(path, "raw.f32")
+        raw = np.memmap(raw_path, dtype=np.float32, mode="w+", shape=(max(count, 1), self.dim))
+        reel_ids = np.zeros(count, dtype=np.int64)
+        document_frequency = np.zeros(self.dim, dtype=np.int64)
+        row = 0
+        batch_ids, batch_fields = [], []
+        query = db.query(Reel.id, *[getattr(Reel, name) for name in EMBEDDED_FIELDS]).order_by(Reel.id)
+        for record in query.yield_per(BUILD_BATCH):
+            if row + len(batch_ids) == count:
+                break  # Inserted after the count; picked up as tail rows below
+            batch_ids.append(record[0])
+            batch_fields.append(dict(zip(EMBEDDED_FIELDS, record[1:])))
+            if len(batch_ids) == BUILD_BATCH:
+                row = self._raw_batch(raw, reel_ids, document_frequency, row, batch_ids, batch_fields)
+                batch_ids, batch_fields = [], []
+        row = self._raw_batch(raw, reel_ids, document_frequency, row, batch_ids, batch_fields)
+        count = row
+        reel_ids = reel_ids[:count]
+        idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        # Pass 2: IDF-weight and normalize in place
+        for begin in range(0, count, BUILD_BATCH):
+            block = raw[begin:begin + BUILD_BATCH] * idf
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            np.divide(block, norms, out=block, where=norms > 0)
+            raw[begin:begin + BUILD_BATCH] = block
+
+        # Cluster, then write the vectors grouped by cluster
+        lists = max(1, int(math.sqrt(count))) if count else 0
+        centroids = self._train(raw[:count], lists)
+        assignment = np.zeros(count, dtype=np.int64)
+        for begin in range(0, count, BUILD_BATCH * 4):
+            assignment[begin:begin + BUILD_BATCH * 4] = np.argmax(raw[begin:begin + BUILD_BATCH * 4] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(lists + 1)).astype(np.int64)
+        with open(os.path.join(path, "vectors.f32"), "wb") as f:
+            for begin in range(0, count, BUILD_BATCH * 4):
+                f.write(np.ascontiguousarray(raw[order[begin:begin + BUILD_BATCH * 4]]).tobytes())
+        reel_ids[order].tofile(os.path.join(path, "ids.i64"))
+        del raw
+        os.remove(raw_path)
+        np.savez(os.path.join(path, "index.npz"), centroids=centroids, offsets=offsets, idf=idf)
+        self._write_meta(path, {"dim": self.dim, "rows": count, "built_rows": count})
+
+        with self._locked():
+            previous = self._current_path()
+            carried = self._carry_over(previous, path, int(reel_ids.max()) if count else 0)
+            tmp_path = os.path.join(self.directory, "CURRENT.tmp")
+            with open(tmp_path, "w") as f:
+                f.write(name)
+            os.replace(tmp_path, os.path.join(self.directory, "CURRENT"))
+        self._prune_generations(keep={name, os.path.basename(previous) if previous else name})
+        self.reload(force=True)
+
+        stats = {
+            "reels": count,
+            "carried_over": carried,
+            "clusters": lists,
+            "dim": self.dim,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        logger.info("Embedding index built", extra=stats)
+        return stats
+
+    def _raw_batch(self, raw, reel_ids, document_frequency, row: int, batch_ids, batch_fields) -> int:
+        if not batch_ids:
+            return row
+        block = self.vectorize(batch_fields)
+        raw[row:row + len(block)] = block
+        reel_ids[row:row + len(block)] = batch_ids
+        document_frequency += (block != 0).sum(axis=0)
+        return row + len(block)
+
+    def _train(self, vectors, lists: int):
+        """Spherical k-means centroids (unit rows) from a sample of `vectors`"""
+        import numpy as np
+
+        if not lists:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), max(lists * TRAIN_ROWS_PER_CLUSTER, lists), MAX_TRAIN_ROWS)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters restart from a random sample row
+            empty = norms[:, 0] == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1, keepdims=True)
+            centroids = sums / np.where(norms > 0, norms, 1)
+        return centroids.astype(np.float32)
+
+    def _carry_over(self, previous: Optional[str], path: str, max_reel_id: int) -> int:
+        """Append the previous generation's rows for reels newer than the build's; caller holds the lock"""
+        import numpy as np
+
+        if previous is None or not os.path.exists(os.path.join(previous, "meta.json")):
+            return 0
+        old = _Generation(previous)
+        rows = np.flatnonzero(np.asarray(old.ids) > max_reel_id)
+        if len(rows):
+            # These keep the previous build's IDF weighting until the next build
+            self._append(_Generation(path), np.asarray(old.vectors[rows]), old.ids[rows].tolist())
+        return len(rows)
+
+    def _prune_generations(self, keep: set) -> None:
+        # Workers still mapping an older generation keep their mapping after unlink
+        for entry in os.listdir(self.directory):
+            if entry.startswith("gen-") and entry not in keep:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+    # ---- lifecycle (API workers) ----
+
+    def start(self) -> None:
+        """Map the current index, then poll for rebuilds and other workers' appends"""
+        try:
+            if self.reload():
+                logger.info("Embedding index loaded", extra={"rows": len(self)})
+        except Exception:
+            logger.exception("Embedding index could not be loaded")
+        if self.reload_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="embedding-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Embedding index reload failed")
+
+embedding_index = EmbeddingIndex()
@@ -0,0 +1,147 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.models import Reel, MaterializedFeed
+from app.services.feed_pipeline import feed_pipeline, FeedContext
+
+logger = logging.getLogger(__name__)
+
+FEED_SERVED = Counter("edubit_feed_served_total", "Feed pages by how they were produced (materialized, cold_start or online)")
+FEED_MATERIALIZED_LAG = Histogram(
+    "edubit_feed_materialized_lag_seconds",
+    "Age of the stored list behind each materialized feed page served",
+    buckets=(10, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+FEED_MATERIALIZED = Counter("edubit_feed_materialized_total", "Feed lists recomputed by the materialization worker")
+
+# requested_at is only rewritten when older than this, so reads stay reads
+_REQUESTED_RESOLUTION = timedelta(hours=1)
+
+
+class FeedMaterializer:
+    """
+    Serves stored per-user feeds and refreshes them in the background.
+
+    Users get a row when they first open the feed (served on-line that time). The
+    worker then keeps their top-N ids current: at once when a progress write marks
+    the list stale, within FEED_MATERIALIZE_NEW_REELS_SECONDS of new reels, and at
+    least every FEED_MATERIALIZE_MAX_AGE_SECONDS. Lists of users who stop opening
+    the feed are dropped, so only active users cost anything.
+    """
+
+    def __init__(
+        self,
+        top_n: int = settings.FEED_MATERIALIZE_TOP_N,
+        batch: int = settings.FEED_MATERIALIZE_BATCH,
+        new_reels_interval: float = settings.FEED_MATERIALIZE_NEW_REELS_SECONDS,
+        max_age: float = settings.FEED_MATERIALIZE_MAX_AGE_SECONDS,
+        active_days: int = settings.FEED_MATERIALIZE_ACTIVE_DAYS,
+    ):
+        self.top_n = top_n
+        self.batch = batch
+        self.new_reels_interval = timedelta(seconds=new_reels_interval)
+        self.max_age = timedelta(seconds=max_age)
+        self.active_days = active_days
+
+    # ---- serving ----
+
+    def read(self, db: Session, user_id: int, offset: int, limit: int) -> Optional[List[int]]:
+        """
+        Reel ids of one page from the user's stored list, or None when it has to be
+        computed on-line (no list yet, stale, or a page past the stored top-N).
+        Registers the user on first call, so callers send users without history
+        to the shared cold-start ranking instead
+        """
+        now = datetime.utcnow()
+        row = db.query(MaterializedFeed).filter(MaterializedFeed.user_id == user_id).first()
+        if row is None:
+            # First feed open: register the user for the worker
+            db.add(MaterializedFeed(user_id=user_id, requested_at=now))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # A concurrent request registered them
+            return None
+        if row.requested_at < now - _REQUESTED_RESOLUTION:
+            row.requested_at = now
+            db.commit()
+
+        reel_ids = row.reel_ids
+        # A list shorter than top_n is the user's whole feed, so any page can be cut from it
+        if row.stale or reel_ids is None or (offset + limit > len(reel_ids) and len(reel_ids) >= self.top_n):
+            return None
+        FEED_MATERIALIZED_LAG.observe((now - row.computed_at).total_seconds())
+        return reel_ids[offset:offset + limit]
+
+    @staticmethod
+    def mark_stale(db: Session, user_id: int) -> None:
+        """The user's profile changed (progress write); not committed"""
+        db.query(MaterializedFeed).filter(MaterializedFeed.user_id == user_id).update({
+            MaterializedFeed.stale: True,
+            MaterializedFeed.profile_version: MaterializedFeed.profile_version + 1,
+        }, synchronize_session=False)
+
+    # ---- worker ----
+
+    def compute(self, db: Session, user_id: int) -> List[int]:
+        """The user's top-N reel ids through the feed pipeline (unfiltered, lifetime popularity)"""
+        query = db.query(Reel).options(load_only(
+            Reel.id, Reel.tags, Reel.difficulty_level, Reel.views_count, Reel.creator_id
+        ))
+        ranked = feed_pipeline.run(FeedContext(db=db, user_id=user_id, query=query), limit=self.top_n)
+        return [item["reel"].id for item in ranked[:self.top_n]]
+
+    def refresh(self, db: Session) -> Dict[str, Any]:
+        """Recompute up to `batch` due lists, stale ones first, and drop inactive users' lists"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        newest_reel = db.query(func.max(Reel.id)).scalar() or 0
+        due = db.query(
+            MaterializedFeed.user_id, MaterializedFeed.profile_version, MaterializedFeed.computed_at
+        ).filter(or_(
+            MaterializedFeed.stale.is_(True),
+            MaterializedFeed.computed_at < now - self.max_age,
+            (MaterializedFeed.catalog_watermark < newest_reel) & (MaterializedFeed.computed_at < now - self.new_reels_interval),
+        )).order_by(MaterializedFeed.stale.desc(), MaterializedFeed.computed_at).limit(self.batch).all()
+
+        refreshed = 0
+        oldest_lag = 0.0
+        for user_id, profile_version, computed_at in due:
+            if computed_at is not None:
+                oldest_lag = max(oldest_lag, (now - computed_at).total_seconds())
+            reel_ids = self.compute(db, user_id)
+            # Only clears `stale` if no progress write arrived while computing
+            updated = db.query(MaterializedFeed).filter(
+                MaterializedFeed.user_id == user_id, MaterializedFeed.profile_version == profile_version
+            ).update({
+                MaterializedFeed.reel_ids: reel_ids,
+                MaterializedFeed.stale: False,
+                MaterializedFeed.catalog_watermark: newest_reel,
+                MaterializedFeed.computed_at: datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+            refreshed += updated
+        FEED_MATERIALIZED.inc(refreshed)
+
+        dropped = db.query(MaterializedFeed).filter(
+            MaterializedFeed.requested_at < now - timedelta(days=self.active_days)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        stats = {
+            "refreshed": refreshed,
+            "due": len(due),
+            "dropped": dropped,
+            "oldest_lag_seconds": round(oldest_lag, 1),
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        logger.info("Materialized feeds refreshed", extra=stats)
+        return stats
+
+feed_materializer = FeedMaterializer()
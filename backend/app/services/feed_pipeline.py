@@ -0,0 +1,362 @@
+"""
+Multi-stage feed: candidate generation -> ranking -> re-ranking.
+
+Several cheap candidate sources each return a bounded list of reel ids (one or
+two indexed queries apiece); only their union is loaded and scored by the
+ranker, and a re-ranker turns the scores into the final order (drops watched
+reels, caps how much of a page one creator or tag can take). Implementations
+register under a name, and the pipeline is assembled from settings
+(FEED_SOURCES, FEED_RANKER, FEED_RERANKER), so a stage can be swapped or a
+source disabled without touching the endpoint.
+
+Every stage is timed and counted (edubit_feed_stage_seconds,
+edubit_feed_candidates_total) and shows up in the request's phases.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Type
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, Query
+from app.core.config import settings
+from app.core.metrics import Counter as MetricCounter, Histogram
+from app.core.request_stats import request_phase
+from app.models import Reel, ReelTrending, MicroCourse, CourseCompletion, course_reels
+from app.services.feed_service import feed_service, RELATED_SEEDS
+from app.services.related_service import related_service
+from app.services.embedding_service import embedding_index
+from app.services.tag_service import split_tags
+from app.services.trending_service import trending_service
+from app.services.watched_set_service import watched_set_service, WatchedSet
+
+logger = logging.getLogger(__name__)
+
+FEED_STAGE_SECONDS = Histogram("edubit_feed_stage_seconds", "Time spent per feed pipeline stage (sources by name, rank, rerank)")
+FEED_CANDIDATES = MetricCounter("edubit_feed_candidates_total", "Reel ids produced per feed candidate source")
+
+# Reels loaded per IN (...) when materializing the merged candidates
+_LOAD_CHUNK = 500
+
+
+@dataclass
+class FeedContext:
+    """One feed request: who it is for, its filters, and what the user watched (loaded once, on demand)"""
+    db: Session
+    user_id: int
+    query: Query  # Reels with the request's filters, loading what the response needs
+    filters: List[Any] = field(default_factory=list)  # The same filters, for id-only source queries
+    popularity: str = "lifetime"
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    @cached_property
+    def watched(self) -> WatchedSet:
+        """Every watched reel (the stored set: one row, however long the history)"""
+        return watched_set_service.get(self.db, self.user_id)
+
+    @cached_property
+    def recent(self) -> List[int]:
+        """The most recent watches, newest first; they seed personalized sources"""
+        return watched_set_service.recent(self.db, self.user_id, RELATED_SEEDS)
+
+    @cached_property
+    def recent_reels(self) -> List[Any]:
+        """(id, tags, creator_id) of the recent watches"""
+        if not self.recent:
+            return []
+        return self.db.query(Reel.id, Reel.tags, Reel.creator_id).filter(Reel.id.in_(self.recent)).all()
+
+    @cached_property
+    def trending(self) -> Optional[Dict[int, float]]:
+        return trending_service.scores(self.db) if self.popularity == "trending" else None
+
+
+class CandidateSource(ABC):
+    """Returns up to `limit` reel ids worth scoring, best first"""
+    name = ""
+
+    @abstractmethod
+    def generate(self, ctx: FeedContext, limit: int) -> List[int]:
+        ...
+
+
+class Ranker(ABC):
+    """Scores the merged candidates: [{"reel": Reel, "score": float}], best first"""
+    name = ""
+
+    @abstractmethod
+    def rank(self, ctx: FeedContext, reels: List[Reel]) -> List[Dict[str, Any]]:
+        ...
+
+
+class ReRanker(ABC):
+    """Turns ranked candidates into the final feed order"""
+    name = ""
+
+    @abstractmethod
+    def rerank(self, ctx: FeedContext, scored: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Only the first `limit` positions need to be final; the rest may keep ranker order"""
+
+
+SOURCES: Dict[str, Type[CandidateSource]] = {}
+RANKERS: Dict[str, Type[Ranker]] = {}
+RERANKERS: Dict[str, Type[ReRanker]] = {}
+
+
+def register(registry: Dict[str, type], name: str) -> Callable[[type], type]:
+    """Class decorator adding an implementation to SOURCES, RANKERS or RERANKERS"""
+    def decorator(cls: type) -> type:
+        cls.name = name
+        registry[name] = cls
+        return cls
+    return decorator
+
+
+# ---- candidate sources ----
+
+@register(SOURCES, "recent")
+class RecentSource(CandidateSource):
+    """Newest reels; also what users without history get"""
+
+    def generate(self, ctx, limit):
+        rows = ctx.db.query(Reel.id).filter(*ctx.filters).order_by(Reel.id.desc()).limit(limit)
+        return [reel_id for (reel_id,) in rows]
+
+
+@register(SOURCES, "popular")
+class PopularSource(CandidateSource):
+    """Most viewed reels of all time; a catalog scan, so meant for shared rankings (cold start)"""
+
+    def generate(self, ctx, limit):
+        rows = ctx.db.query(Reel.id).filter(*ctx.filters).order_by(Reel.views_count.desc(), Reel.id.desc()).limit(limit)
+        return [reel_id for (reel_id,) in rows]
+
+
+@register(SOURCES, "tags")
+class TagSource(CandidateSource):
+    """Newest reels sharing one of the tags the user watches most"""
+    top_tags = 5
+
+    def generate(self, ctx, limit):
+        tags = Counter(tag for reel in ctx.recent_reels for tag in split_tags(reel.tags))
+        if not tags:
+            return []
+        rows = ctx.db.query(Reel.id).filter(
+            *ctx.filters, or_(*[Reel.tags.contains(tag) for tag, _ in tags.most_common(self.top_tags)])
+        ).order_by(Reel.id.desc()).limit(limit)
+        return [reel_id for (reel_id,) in rows]
+
+
+@register(SOURCES, "trending")
+class TrendingSource(CandidateSource):
+    """Reels with the most recent momentum (index range scan on the trending key)"""
+
+    def generate(self, ctx, limit):
+        rows = ctx.db.query(ReelTrending.reel_id).filter(
+            ReelTrending.trend_key > trending_service.min_key()
+        ).order_by(ReelTrending.trend_key.desc()).limit(limit)
+        return [reel_id for (reel_id,) in rows]
+
+
+@register(SOURCES, "creators")
+class CreatorSource(CandidateSource):
+    """Newest reels by creators the user keeps watching"""
+    top_creators = 10
+
+    def generate(self, ctx, limit):
+        creators = Counter(reel.creator_id for reel in ctx.recent_reels)
+        if not creators:
+            return []
+        rows = ctx.db.query(Reel.id).filter(
+            *ctx.filters, Reel.creator_id.in_([creator_id for creator_id, _ in creators.most_common(self.top_creators)])
+        ).order_by(Reel.id.desc()).limit(limit)
+        return [reel_id for (reel_id,) in rows]
+
+
+@register(SOURCES, "courses")
+class CourseSource(CandidateSource):
+    """Unwatched reels of courses the user has started but not finished"""
+
+    def generate(self, ctx, limit):
+        rows = ctx.db.query(course_reels.c.reel_id).join(
+            CourseCompletion, CourseCompletion.course_id == course_reels.c.course_id
+        ).join(MicroCourse, MicroCourse.id == CourseCompletion.course_id).filter(
+            CourseCompletion.user_id == ctx.user_id,
+            CourseCompletion.completed_reels > 0,
+            CourseCompletion.completed_reels < MicroCourse.reel_count,
+        ).order_by(CourseCompletion.course_id)
+        return [reel_id for (reel_id,) in rows if reel_id not in ctx.watched][:limit]
+
+
+@register(SOURCES, "cowatch")
+class CoWatchSource(CandidateSource):
+    """Reels most co-watched with the recent watches (precomputed neighbor lists)"""
+
+    def generate(self, ctx, limit):
+        affinity = related_service.affinity(ctx.db, ctx.recent)
+        return sorted(affinity, key=affinity.__getitem__, reverse=True)[:limit]
+
+
+@register(SOURCES, "similar")
+class SimilarContentSource(CandidateSource):
+    """Reels whose text is closest to the recent watches (embedding nearest neighbors)"""
+
+    def generate(self, ctx, limit):
+        return list(embedding_index.more_like(ctx.recent, limit))
+
+
+# ---- rankers ----
+
+@register(RANKERS, "weighted")
+class WeightedRanker(Ranker):
+    """FeedService's profile scoring: tags, difficulty, co-watch, content similarity, popularity"""
+
+    def rank(self, ctx, reels):
+        return feed_service.score_reels_for_user(ctx.db, ctx.user_id, reels, ctx.trending, ctx.watched, ctx.recent)
+
+
+@register(RANKERS, "recent")
+class RecencyRanker(Ranker):
+    """Newest first; no per-user work at all"""
+
+    def rank(self, ctx, reels):
+        return [{"reel": reel, "score": float(reel.id)} for reel in sorted(reels, key=lambda reel: reel.id, reverse=True)]
+
+
+# ---- re-rankers ----
+
+@register(RERANKERS, "diversity")
+class DiversityReRanker(ReRanker):
+    """
+    Drops watched reels, then fills the feed a window (page) at a time in score
+    order, deferring reels whose creator or a tag already has its share of the
+    window to the next one; nothing else is dropped, so deep pages still see them.
+    Each window is a pass over what is left, so passes stop once `limit` is reached.
+    """
+
+    def __init__(
+        self,
+        window: int = settings.FEED_DIVERSITY_WINDOW,
+        max_per_creator: int = settings.FEED_MAX_PER_CREATOR,
+        max_per_tag: int = settings.FEED_MAX_PER_TAG,
+    ):
+        self.window = window
+        self.max_per_creator = max_per_creator
+        self.max_per_tag = max_per_tag
+
+    def rerank(self, ctx, scored, limit=None):
+        pending = [
+            (item, item["reel"].creator_id, split_tags(item["reel"].tags))
+            for item in scored if item["reel"].id not in ctx.watched
+        ]
+        result = []
+        while pending and (limit is None or len(result) < limit):
+            creators: Counter = Counter()
+            tags: Counter = Counter()
+            window, deferred = [], []
+            for entry in pending:
+                _, creator_id, reel_tags = entry
+                if len(window) < self.window and creators[creator_id] < self.max_per_creator \
+                        and all(tags[tag] < self.max_per_tag for tag in reel_tags):
+                    window.append(entry)
+                    creators[creator_id] += 1
+                    tags.update(reel_tags)
+                else:
+                    deferred.append(entry)
+            result.extend(item for item, _, _ in window)
+            pending = deferred
+        result.extend(item for item, _, _ in pending)
+        return result
+
+
+@register(RERANKERS, "none")
+class PassthroughReRanker(ReRanker):
+    """Ranker order as is, watched reels included"""
+
+    def rerank(self, ctx, scored, limit=None):
+        return scored
+
+
+# ---- pipeline ----
+
+class FeedPipeline:
+    """Sources -> merge and load -> rank -> rerank, each stage timed and counted"""
+
+    def __init__(self, sources: List[CandidateSource], ranker: Ranker, reranker: ReRanker, source_limit: int):
+        self.sources = sources
+        self.ranker = ranker
+        self.reranker = reranker
+        self.source_limit = source_limit
+
+    @classmethod
+    def from_settings(cls, sources: Optional[str] = None, source_limit: Optional[int] = None) -> "FeedPipeline":
+        """The configured pipeline; `sources` (comma-separated names) overrides FEED_SOURCES"""
+        names = [name.strip() for name in (sources or settings.FEED_SOURCES).split(",") if name.strip()]
+        unknown = [name for name in names if name not in SOURCES]
+        if unknown or settings.FEED_RANKER not in RANKERS or settings.FEED_RERANKER not in RERANKERS:
+            raise ValueError(
+                f"Unknown feed pipeline stage in settings: sources={unknown}, "
+                f"ranker={settings.FEED_RANKER!r}, reranker={settings.FEED_RERANKER!r}"
+            )
+        return cls(
+            [SOURCES[name]() for name in names],
+            RANKERS[settings.FEED_RANKER](),
+            RERANKERS[settings.FEED_RERANKER](),
+            source_limit or settings.FEED_SOURCE_LIMIT,
+        )
+
+    def run(self, ctx: FeedContext, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        The ordered feed for `ctx`, final up to position `limit` (everything when None);
+        per-stage counts and milliseconds are left in ctx.stats
+        """
+        stats = ctx.stats
+        with request_phase("load_candidates"):
+            candidates: Dict[int, None] = {}
+            stats["sources"] = {}
+            for source in self.sources:
+                start = time.perf_counter()
+                try:
+                    found = source.generate(ctx, self.source_limit)
+                except Exception:
+                    # A broken source (e.g. missing embedding files) degrades the feed, not the request
+                    logger.exception("Feed candidate source failed", extra={"source": source.name})
+                    found = []
+                elapsed = time.perf_counter() - start
+                FEED_STAGE_SECONDS.observe(elapsed, stage=f"source_{source.name}")
+                FEED_CANDIDATES.inc(len(found), source=source.name)
+                new = len(candidates)
+                candidates.update(dict.fromkeys(found))
+                stats["sources"][source.name] = {
+                    "candidates": len(found), "new": len(candidates) - new, "ms": round(elapsed * 1000, 2)
+                }
+
+            start = time.perf_counter()
+            ids = list(candidates)
+            reels = []
+            for offset in range(0, len(ids), _LOAD_CHUNK):
+                reels.extend(ctx.query.filter(Reel.id.in_(ids[offset:offset + _LOAD_CHUNK])).all())
+            stats["load"] = self._observe("load", start, len(reels))
+
+        with request_phase("score"):
+            start = time.perf_counter()
+            scored = self.ranker.rank(ctx, reels)
+            stats["rank"] = self._observe("rank", start, len(scored))
+
+        with request_phase("rerank"):
+            start = time.perf_counter()
+            ranked = self.reranker.rerank(ctx, scored, limit)
+            stats["rerank"] = self._observe("rerank", start, len(ranked))
+
+        logger.debug("Feed pipeline", extra={"user_id": ctx.user_id, "stages": stats})
+        return ranked
+
+    @staticmethod
+    def _observe(stage: str, start: float, count: int) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        FEED_STAGE_SECONDS.observe(elapsed, stage=stage)
+        return {"reels": count, "ms": round(elapsed * 1000, 2)}
+
+feed_pipeline = FeedPipeline.from_settings()
@@ -1,25 +1,52 @@
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from app.models import Reel, Progress, User
+from app.models import Reel, User
+from app.core.metrics import Counter as MetricCounter, Histogram
+from app.services.related_service import related_service
+from app.services.embedding_service import embedding_index
+from app.services.watched_set_service import watched_set_service, WatchedSet
+from app.core.config import settings
 from collections import Counter
 
+FEED_SCORING_SECONDS = Histogram("edubit_feed_scoring_seconds", "Time to build the profile and score a feed")
+FEED_REELS_SCORED = MetricCounter("edubit_feed_reels_scored_total", "Candidate reels scored for feeds")
+# Most recent watches whose related-reel lists feed the co-watch score
+RELATED_SEEDS = 50
+
 class FeedService:
     """Service for personalized feed scoring and recommendations"""
     
     @staticmethod
-    def score_reels_for_user(db: Session, user_id: int, reels: List[Reel]) -> List[Dict[str, Any]]:
+    def score_reels_for_user(
+        db: Session,
+        user_id: int,
+        reels: List[Reel],
+        trending: Optional[Dict[int, float]] = None,
+        watched: Optional[WatchedSet] = None,
+        recent: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Score reels based on user's watch history and preferences
+        With `trending` (reel id -> decayed views, see trending_service.scores) popularity
+        is recent momentum instead of lifetime views
+        `watched` and `recent` are loaded when not given (see watched_set_service)
         Returns list of dicts with reel and score
         """
+        start = time.perf_counter()
+        
         # Get user's watch history
-        watched = db.query(Progress).filter(
-            Progress.user_id == user_id,
-            Progress.reel_id.isnot(None)
-        ).all()
+        if watched is None:
+            watched = watched_set_service.get(db, user_id)
+        if recent is None:
+            recent = watched_set_service.recent(db, user_id, RELATED_SEEDS)
         
         # Extract tags and difficulty levels from watched reels
-        watched_reel_ids = [p.reel_id for p in watched]
+        watched_reel_ids = list(watched)
+        # Reels co-watched with the most recent watches (precomputed neighbor lists)
+        related = related_service.affinity(db, recent)
+        # Reels whose content is closest to the same recent watches (approximate nearest neighbors)
+        similar = embedding_index.more_like(recent, settings.EMBEDDING_CANDIDATES)
         watched_reels = db.query(Reel).filter(Reel.id.in_(watched_reel_ids)).all() if watched_reel_ids else []
         
         # Build user preference profile
@@ -56,11 +83,20 @@ class FeedService:
                 elif abs(FeedService._difficulty_to_num(reel.difficulty_level) - FeedService._difficulty_to_num(preferred_difficulty)) == 1:
                     score += 10
             
+            # Co-watch score (max +20 points)
+            if related:
+                score += min(related.get(reel.id, 0.0) * 20, 20)
+            
+            # Content similarity score (max +20 points)
+            if similar:
+                score += similar.get(reel.id, 0.0) * 20
+            
             # Popularity score (max +15 points)
-            score += min((reel.views_count / 100) * 5, 15)
+            views = trending.get(reel.id, 0.0) if trending is not None else reel.views_count
+            score += min((views / 100) * 5, 15)
             
             # Avoid already watched (penalty -50 points)
-            if reel.id in watched_reel_ids:
+            if reel.id in watched:
                 score -= 50
             
             scored_reels.append({
@@ -70,6 +106,8 @@ class FeedService:
         
         # Sort by score descending
         scored_reels.sort(key=lambda x: x["score"], reverse=True)
+        FEED_REELS_SCORED.inc(len(reels))
+        FEED_SCORING_SECONDS.observe(time.perf_counter() - start)
         return scored_reels
     
     @staticmethod
@@ -0,0 +1,127 @@
+from typing import List, Iterable, Dict, Any, Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import MicroCourse, Progress, CourseCompletion, course_reels
+
+
+class ProgressService:
+    """Maintains denormalized per-(user, course) completion counters"""
+
+    @staticmethod
+    def on_reel_completion_changed(
+        db: Session, user_id: int, reel_id: int, delta: int, progress_id: Optional[int] = None
+    ) -> None:
+        """
+        Apply +1/-1 to the user's counter for every course containing the reel.
+        Caller commits; must only be called when `completed` of Progress row
+        `progress_id` (None for one not added yet) actually flips. Counters count
+        distinct reels, like recompute_course, so nothing changes while another
+        completed row of the user's (reel-only or reel+course) covers the reel.
+        """
+        others = db.query(Progress.id).filter(
+            Progress.user_id == user_id,
+            Progress.reel_id == reel_id,
+            Progress.completed == True
+        )
+        if progress_id is not None:
+            others = others.filter(Progress.id != progress_id)
+        if others.first() is not None:
+            return
+
+        course_ids = [
+            row[0] for row in db.query(course_reels.c.course_id).filter(course_reels.c.reel_id == reel_id)
+        ]
+        if not course_ids:
+            return
+
+        existing = db.query(CourseCompletion).filter(
+            CourseCompletion.user_id == user_id,
+            CourseCompletion.course_id.in_(course_ids)
+        ).with_for_update()
+        updated = set()
+        for row in existing:
+            row.completed_reels = max((row.completed_reels or 0) + delta, 0)
+            updated.add(row.course_id)
+
+        if delta > 0:
+            for course_id in course_ids:
+                if course_id in updated:
+                    continue
+                try:
+                    with db.begin_nested():
+                        db.add(CourseCompletion(user_id=user_id, course_id=course_id, completed_reels=delta))
+                except IntegrityError:
+                    # A concurrent first completion in this course created it meanwhile
+                    row = db.query(CourseCompletion).filter(
+                        CourseCompletion.user_id == user_id,
+                        CourseCompletion.course_id == course_id
+                    ).with_for_update().one()
+                    row.completed_reels = (row.completed_reels or 0) + delta
+
+    @staticmethod
+    def recompute_course(db: Session, course_id: int) -> None:
+        """Rebuild reel_count and all users' counters after a course's reel set changed. Caller commits."""
+        reel_count = db.query(func.count()).select_from(course_reels).filter(
+            course_reels.c.course_id == course_id
+        ).scalar()
+        db.query(MicroCourse).filter(MicroCourse.id == course_id).update(
+            {MicroCourse.reel_count: reel_count}, synchronize_session=False
+        )
+
+        counts = db.query(Progress.user_id, func.count(func.distinct(Progress.reel_id))).join(
+            course_reels, course_reels.c.reel_id == Progress.reel_id
+        ).filter(
+            course_reels.c.course_id == course_id,
+            Progress.completed == True
+        ).group_by(Progress.user_id).all()
+
+        db.query(CourseCompletion).filter(CourseCompletion.course_id == course_id).delete(synchronize_session=False)
+        db.bulk_save_objects([
+            CourseCompletion(user_id=user_id, course_id=course_id, completed_reels=completed)
+            for user_id, completed in counts
+        ])
+
+    @staticmethod
+    def rebuild_all(db: Session) -> None:
+        """Recount every course's reel_count and every user's counters (schema upgrades, bulk loads). Caller commits."""
+        db.query(MicroCourse).update({
+            MicroCourse.reel_count: select(func.count()).select_from(course_reels).where(
+                course_reels.c.course_id == MicroCourse.id
+            ).scalar_subquery()
+        }, synchronize_session=False)
+        db.query(CourseCompletion).delete(synchronize_session=False)
+        db.execute(insert(CourseCompletion).from_select(
+            ["user_id", "course_id", "completed_reels"],
+            select(Progress.user_id, course_reels.c.course_id, func.count(func.distinct(Progress.reel_id))).join(
+                course_reels, course_reels.c.reel_id == Progress.reel_id
+            ).where(Progress.completed == True).group_by(Progress.user_id, course_reels.c.course_id)
+        ))
+
+    @staticmethod
+    def get_courses_progress(db: Session, user_id: int, course_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Progress for many courses from a single query over the counters"""
+        course_ids = list(dict.fromkeys(course_ids))
+        if not course_ids:
+            return []
+
+        rows = db.query(MicroCourse.id, MicroCourse.reel_count, CourseCompletion.completed_reels).outerjoin(
+            CourseCompletion,
+            (CourseCompletion.course_id == MicroCourse.id) & (CourseCompletion.user_id == user_id)
+        ).filter(MicroCourse.id.in_(course_ids)).all()
+
+        by_id = {}
+        for course_id, total_reels, completed in rows:
+            total_reels = total_reels or 0
+            completed = min(completed or 0, total_reels)
+            by_id[course_id] = {
+                "course_id": course_id,
+                "total_reels": total_reels,
+                "completed_reels": completed,
+                "completion_percentage": round((completed / total_reels) * 100, 2) if total_reels else 0.0
+            }
+
+        # Preserve the requested order
+        return [by_id[course_id] for course_id in course_ids if course_id in by_id]
+
+progress_service = ProgressService()
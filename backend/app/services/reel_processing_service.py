@@ -0,0 +1,108 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, Optional
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Reel, TranscriptSegment
+from app.services.ai_service import ai_service
+from app.services.transcript_service import transcript_service
+from app.services.embedding_service import embedding_index
+
+logger = logging.getLogger(__name__)
+
+
+class ReelProcessingService:
+    """
+    Work on a reel after its upload is answered: the timed transcript, the
+    embedding index entry and the AI summary and quiz.
+
+    Extracting audio and running Whisper takes about as long as the video, so the
+    upload returns its 201 first and this runs as a background task, transcribing
+    the uploaded file while it is still on local disk instead of downloading it
+    back from Cloudinary. Reels without segments (uploaded before they existed, or
+    whose transcription failed) are filled in by the reel_transcripts job.
+    """
+
+    @staticmethod
+    def save_upload(source: BinaryIO, suffix: str = ".mp4") -> str:
+        """Copy an uploaded file to a temp file that outlives the request; returns its path"""
+        source.seek(0)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as target:
+            shutil.copyfileobj(source, target)
+        return target.name
+
+    def process_upload(self, reel_id: int, video_path: str) -> None:
+        """Transcribe, index and describe a new reel from its local upload, then remove the file"""
+        db = SessionLocal()
+        try:
+            reel = db.get(Reel, reel_id)
+            if reel is None:
+                return  # Deleted meanwhile
+            self.store_transcript(db, reel, ai_service.transcribe_file(video_path))
+            embedding_index.add(reel)
+            self.describe(db, reel)
+        except Exception:
+            db.rollback()
+            logger.exception("Reel processing failed", extra={"reel_id": reel_id})
+        finally:
+            db.close()
+            try:
+                os.unlink(video_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def store_transcript(db: Session, reel: Reel, transcription: Optional[Dict[str, Any]]) -> int:
+        """Full text for search and summaries, segments for in-video search; committed. Returns segments stored"""
+        if not transcription:
+            return 0
+        reel.transcript = transcription["text"]
+        stored = transcript_service.replace_segments(db, reel.id, transcription["segments"])
+        db.commit()
+        return stored
+
+    @staticmethod
+    def describe(db: Session, reel: Reel) -> None:
+        """AI summary and quiz; without a transcript the description stands in for it"""
+        try:
+            source_text = reel.transcript or reel.description or ""
+            summary_data = ai_service.generate_summary_from_transcript(
+                title=reel.title,
+                transcript=source_text,
+                description=reel.description or "",
+                tags=reel.tags or "",
+                difficulty=reel.difficulty_level
+            )
+            reel.ai_summary = summary_data.get("summary")
+            reel.ai_key_points = summary_data.get("key_points")
+            reel.ai_quiz = ai_service.generate_quiz_from_transcript(
+                title=reel.title,
+                transcript=source_text,
+                tags=reel.tags or "",
+                num_questions=3
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("AI metadata generation failed", extra={"reel_id": reel.id})
+
+    def backfill(self, db: Session, limit: int, after_id: int = 0) -> Dict[str, int]:
+        """
+        Download and transcribe up to `limit` reels without segments, by id after
+        `after_id`; pass back `last_id` to continue past ones that failed
+        """
+        reels = db.query(Reel).filter(
+            Reel.id > after_id, ~exists().where(TranscriptSegment.reel_id == Reel.id)
+        ).order_by(Reel.id).limit(limit).all()
+        stats = {"reels": len(reels), "transcribed": 0, "segments": 0, "last_id": reels[-1].id if reels else after_id}
+        for reel in reels:
+            stored = self.store_transcript(db, reel, ai_service.transcribe_video(reel.video_url))
+            if stored:
+                stats["transcribed"] += 1
+                stats["segments"] += stored
+        return stats
+
+reel_processing_service = ReelProcessingService()
@@ -0,0 +1,188 @@
+"""
+Item-item collaborative filtering over co-watch data.
+
+Every reel is a column of a binary user x reel matrix X built from Progress.
+Reel i's neighbors are the reels j maximizing the cosine similarity
+
+    cos(i, j) = co_watch(i, j) / sqrt(watchers(i) * watchers(j))
+
+where co_watch = (X^T X)[i, j]. X^T X is never materialized: it is computed a
+chunk of reels at a time as X^T[chunk] @ X, reduced to each row's top-N and
+written to related_reels, so peak memory is bounded by the chunk size.
+
+NumPy and SciPy are only needed by the job, not by the API process.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Progress, RelatedReel, JobState
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "related_reels"
+
+
+class RelatedService:
+    """Computes (offline) and serves precomputed co-watch neighbors"""
+
+    def __init__(
+        self,
+        top_n: int = settings.RELATED_TOP_N,
+        min_cowatch: int = settings.RELATED_MIN_COWATCH,
+        chunk_size: int = settings.RELATED_CHUNK_SIZE,
+    ):
+        self.top_n = top_n
+        self.min_cowatch = min_cowatch
+        self.chunk_size = chunk_size
+
+    # ---- serving ----
+
+    @staticmethod
+    def neighbors(db: Session, reel_id: int, limit: int) -> List[Tuple[int, float]]:
+        """(related reel id, cosine) by rank: one index range scan"""
+        return db.query(RelatedReel.related_reel_id, RelatedReel.score).filter(
+            RelatedReel.reel_id == reel_id
+        ).order_by(RelatedReel.rank).limit(limit).all()
+
+    @staticmethod
+    def affinity(db: Session, seed_reel_ids: Iterable[int]) -> Dict[int, float]:
+        """Summed similarity of every reel to the seeds (e.g. a user's recent watches)"""
+        seed_reel_ids = list(seed_reel_ids)
+        if not seed_reel_ids:
+            return {}
+        totals: Dict[int, float] = {}
+        rows = db.query(RelatedReel.related_reel_id, RelatedReel.score).filter(RelatedReel.reel_id.in_(seed_reel_ids))
+        for related_reel_id, score in rows:
+            totals[related_reel_id] = totals.get(related_reel_id, 0.0) + score
+        return totals
+
+    # ---- offline job ----
+
+    def refresh(self, db: Session, full: bool = False) -> Dict[str, Any]:
+        """
+        Recompute neighbor lists and commit. Incrementally (the default) only reels
+        whose lists can have changed since the last run are recomputed: reels with
+        new Progress rows, reels their new watchers had watched before (new co-watch
+        pairs) and reels listing one of them (changed watcher counts).
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        state = db.query(JobState).filter(JobState.name == JOB_NAME).first()
+        # (progress id, user id, reel id) of every reel interaction, fetched in partitions
+        # so no list of Python tuples for the whole table is ever built
+        result = db.execute(
+            select(Progress.id, Progress.user_id, Progress.reel_id).where(Progress.reel_id.isnot(None)),
+            execution_options={"yield_per": 100_000}
+        )
+        parts = [np.array(part, dtype=np.int64) for part in result.partitions()]
+        progress = np.concatenate(parts) if parts else np.empty((0, 3), dtype=np.int64)
+        watermark = int(progress[:, 0].max()) if len(progress) else 0
+
+        if full or state is None:
+            targets = None
+        else:
+            new = progress[progress[:, 0] > state.watermark]
+            touched = np.unique(new[:, 2])
+            co_watched = progress[np.isin(progress[:, 1], np.unique(new[:, 1])), 2]
+            targets = np.union1d(np.union1d(touched, co_watched), self._reels_listing(db, touched))
+
+        reels = self._compute(db, progress[:, 1:], targets)
+
+        if state is None:
+            state = JobState(name=JOB_NAME)
+            db.add(state)
+        state.watermark = max(watermark, state.watermark or 0)
+        db.commit()
+
+        stats = {
+            "mode": "full" if targets is None else "incremental",
+            "reels_recomputed": reels,
+            "watermark": state.watermark,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        logger.info("Related reels refreshed", extra=stats)
+        return stats
+
+    def _reels_listing(self, db: Session, reel_ids) -> List[int]:
+        listing: Set[int] = set()
+        reel_ids = [int(reel_id) for reel_id in reel_ids]
+        for start in range(0, len(reel_ids), self.chunk_size):
+            listing.update(row[0] for row in db.query(RelatedReel.reel_id).filter(
+                RelatedReel.related_reel_id.in_(reel_ids[start:start + self.chunk_size])
+            ).distinct())
+        return sorted(listing)
+
+    def _compute(self, db: Session, pairs, targets=None) -> int:
+        """
+        Replace the neighbor lists of `targets` (all reels when None) from (user id,
+        reel id) watch pairs; returns the number of reels recomputed
+        """
+        import numpy as np
+        from scipy import sparse
+
+        pairs = np.unique(pairs, axis=0) if len(pairs) else pairs.reshape(0, 2)
+        reel_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+        # Watcher counts are global, whatever subset of users is multiplied below
+        norms = np.sqrt(np.bincount(columns, minlength=len(reel_ids)).astype(np.float64))
+
+        if targets is None:
+            db.query(RelatedReel).delete(synchronize_session=False)
+            targets = reel_ids
+        else:
+            # Only users who watched a target contribute to its co-watch counts
+            users = np.unique(pairs[np.isin(pairs[:, 1], targets), 0])
+            keep = np.isin(pairs[:, 0], users)
+            pairs, columns = pairs[keep], columns[keep]
+        if not len(targets):
+            return 0
+
+        _, rows = np.unique(pairs[:, 0], return_inverse=True)
+        x = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+            shape=(int(rows.max()) + 1 if len(rows) else 0, len(reel_ids))
+        )
+        xt = x.T.tocsr()
+
+        for start in range(0, len(targets), self.chunk_size):
+            chunk_ids = np.asarray(targets[start:start + self.chunk_size], dtype=np.int64)
+            positions = np.searchsorted(reel_ids, chunk_ids)
+            # Targets nobody has watched (any more) just lose their lists
+            watched = positions < len(reel_ids)
+            watched[watched] = reel_ids[positions[watched]] == chunk_ids[watched]
+            chunk = positions[watched]
+            results: Dict[int, List[Tuple[int, float]]] = {}
+            cowatch = (xt[chunk] @ x).tocsr() if len(chunk) else None
+            for offset, column in enumerate(chunk):
+                begin, end = cowatch.indptr[offset], cowatch.indptr[offset + 1]
+                neighbors = cowatch.indices[begin:end]
+                together = cowatch.data[begin:end]
+                keep = (neighbors != column) & (together >= self.min_cowatch)
+                neighbors, together = neighbors[keep], together[keep]
+                if not len(neighbors):
+                    continue
+                scores = together / (norms[column] * norms[neighbors])
+                if len(scores) > self.top_n:
+                    best = np.argpartition(-scores, self.top_n)[:self.top_n]
+                    neighbors, scores = neighbors[best], scores[best]
+                # Best first; ties broken by reel id so reruns store identical lists
+                order = np.lexsort((reel_ids[neighbors], -scores))
+                results[int(reel_ids[column])] = [
+                    (int(reel_ids[neighbors[i]]), round(float(scores[i]), 6)) for i in order
+                ]
+            self._store(db, chunk_ids.tolist(), results)
+        return len(targets)
+
+    @staticmethod
+    def _store(db: Session, reel_ids: List[int], results: Dict[int, List[Tuple[int, float]]]) -> None:
+        db.query(RelatedReel).filter(RelatedReel.reel_id.in_(reel_ids)).delete(synchronize_session=False)
+        db.bulk_insert_mappings(RelatedReel, [
+            {"reel_id": reel_id, "related_reel_id": related_reel_id, "rank": rank, "score": score}
+            for reel_id in reel_ids
+            for rank, (related_reel_id, score) in enumerate(results.get(reel_id, []))
+        ])
+
+related_service = RelatedService()
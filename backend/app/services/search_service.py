@@ -0,0 +1,287 @@
+import base64
+import html
+import json
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Reel
+
+logger = logging.getLogger(__name__)
+
+FTS_COLUMNS = ("title", "description", "tags", "ai_summary", "transcript")
+# bm25() weights in FTS_COLUMNS order: a title hit outranks a transcript hit
+BM25_WEIGHTS = (10.0, 2.0, 5.0, 3.0, 1.0)
+# Where snippets are taken from, best first
+SNIPPET_COLUMNS = ("title", "tags", "ai_summary", "description", "transcript")
+SNIPPET_TOKENS = 12
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+# External-content FTS5 index over reels: the text lives once, in `reels`; triggers keep
+# the index in sync, and only edits to indexed columns (not views_count) touch it
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS reels_fts USING fts5(
+        {_columns}, content='reels', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS reels_fts_insert AFTER INSERT ON reels BEGIN
+        INSERT INTO reels_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS reels_fts_delete AFTER DELETE ON reels BEGIN
+        INSERT INTO reels_fts(reels_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS reels_fts_update AFTER UPDATE OF {_columns} ON reels BEGIN
+        INSERT INTO reels_fts(reels_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO reels_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+
+# bm25() computes each term's IDF by walking that term's whole doclist, so a word in
+# most reels costs O(catalog) per query however few rows are returned; FTS5 also
+# re-expands a prefix term for every rowid looked up individually. So each word is first
+# probed with a newest-first scan that stops after `max_candidates` matches: rare words
+# are ranked with bm25, common ones are checked against the fetched rows' text in
+# Python, and a query made only of common words is served newest-first (which also
+# stops early). Snippets are cut from the page's text in Python for the same reason.
+_COMMON_PROBE_SQL = text(
+    "SELECT rowid FROM reels_fts WHERE reels_fts MATCH :query ORDER BY rowid DESC LIMIT 1 OFFSET :offset"
+)
+_RANKED_SQL = text(f"""
+    SELECT id, score FROM (
+        SELECT rowid AS id, bm25(reels_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS score
+        FROM reels_fts WHERE reels_fts MATCH :query
+    )
+    WHERE score > :after_score OR (score = :after_score AND id > :after_id)
+    ORDER BY score, id
+    LIMIT :limit
+""")
+_RECENT_SQL = text(
+    "SELECT rowid AS id FROM reels_fts WHERE reels_fts MATCH :query AND rowid < :before_id "
+    "ORDER BY rowid DESC LIMIT :limit"
+)
+
+# Same token boundaries as FTS5's unicode61 tokenizer (underscore separates tokens)
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that wasn't produced by search()"""
+
+
+def normalize_token(token: str) -> str:
+    """Fold case and strip diacritics the way `unicode61 remove_diacritics 2` does"""
+    if token.isascii():
+        return token.lower()
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def query_prefixes(q: str) -> List[str]:
+    """Normalized search words, each matched as a prefix (`pyth lis` finds "Python list ...")"""
+    return list(dict.fromkeys(normalize_token(token) for token in _TOKEN.findall(q)))[:16]
+
+
+def fts_query(prefixes: Sequence[str]) -> str:
+    # Quoting keeps FTS5 operators and punctuation in user input inert
+    return " ".join(f'"{prefix}"*' for prefix in prefixes)
+
+
+def encode_cursor(position: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """["rank", score, id] or ["recent", id] of the last hit returned"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if position[0] == "rank":
+            return ["rank", float(position[1]), int(position[2])]
+        if position[0] == "recent":
+            return ["recent", int(position[1])]
+    except (ValueError, TypeError, IndexError, KeyError):
+        pass
+    raise InvalidCursor(cursor)
+
+
+def iter_words(value: Optional[str]) -> Iterator[Tuple[int, int, str]]:
+    """(start, end, normalized word) for each word of `value`, as FTS5 splits it"""
+    for match in _TOKEN.finditer(value or ""):
+        yield match.start(), match.end(), normalize_token(match.group())
+
+
+def create_fts_index(engine: Engine, table: str, ddl: Sequence[str]) -> bool:
+    """
+    Run `ddl` (an external-content FTS5 table plus its sync triggers) and, if
+    `table` is new, index the existing rows once. False where FTS5 isn't available.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+            ).first() is not None
+            for statement in ddl:
+                conn.exec_driver_sql(statement)
+            if not existed:
+                conn.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    except Exception:
+        logger.exception("FTS5 unavailable, %s not created", table)
+        return False
+    return True
+
+
+def contains_all(texts: Sequence[Optional[str]], prefixes: Sequence[str]) -> bool:
+    """Whether each prefix starts some word of the texts"""
+    folded = normalize_token(" ".join(value or "" for value in texts))
+    # Cheap substring test first; only a plausible row is split into words
+    if not all(prefix in folded for prefix in prefixes):
+        return False
+    remaining = set(prefixes)
+    for value in texts:
+        for _, _, token in iter_words(value):
+            remaining = {prefix for prefix in remaining if not token.startswith(prefix)}
+            if not remaining:
+                return True
+    return not remaining
+
+
+def make_snippet(texts: Dict[str, Optional[str]], prefixes: Sequence[str]) -> Optional[str]:
+    """Up to SNIPPET_TOKENS words around the first hit in the best column, hits wrapped in <mark>"""
+    for column in SNIPPET_COLUMNS:
+        value = texts.get(column) or ""
+        folded = normalize_token(value)
+        if not any(prefix in folded for prefix in prefixes):
+            continue
+        spans = [(start, end, word.startswith(tuple(prefixes))) for start, end, word in iter_words(value)]
+        first = next((i for i, span in enumerate(spans) if span[2]), None)
+        if first is None:
+            continue
+        lo = max(first - SNIPPET_TOKENS // 3, 0)
+        hi = min(lo + SNIPPET_TOKENS, len(spans))
+        parts = ["…"] if lo > 0 else []
+        position = spans[lo][0]
+        for start, end, hit in spans[lo:hi]:
+            word = html.escape(value[start:end])
+            parts.append(html.escape(value[position:start]))
+            parts.append(f"<mark>{word}</mark>" if hit else word)
+            position = end
+        if hi < len(spans):
+            parts.append("…")
+        return "".join(parts)
+    return None
+
+
+class SearchService:
+    """Full-text reel search backed by SQLite FTS5 (LIKE fallback on other databases)"""
+
+    def __init__(self, max_candidates: int = settings.SEARCH_MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        self.fts_enabled = False
+
+    def ensure_index(self, engine: Engine) -> None:
+        """Create the FTS5 table and sync triggers if missing, indexing existing reels once"""
+        self.fts_enabled = create_fts_index(engine, "reels_fts", SEARCH_DDL)
+
+    def search(
+        self,
+        db: Session,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple[int, Optional[str]]], Optional[str]]:
+        """
+        One page of (reel id, snippet) in relevance order, plus the cursor for the next
+        page (None on the last page). Raises InvalidCursor for a malformed cursor.
+        """
+        prefixes = query_prefixes(q)
+        position = decode_cursor(cursor) if cursor else None
+        if not prefixes:
+            return [], None
+
+        if not self.fts_enabled:
+            page, next_cursor = self._search_like(db, prefixes, limit, position)
+        else:
+            common = [prefix for prefix in prefixes if self._is_common(db, prefix)]
+            rare = [prefix for prefix in prefixes if prefix not in common]
+            # Later pages keep the first page's mode even if the index changed in between
+            mode = position[0] if position else ("rank" if rare else "recent")
+            if mode == "recent":
+                page, next_cursor = self._recent_page(db, prefixes, limit, position)
+            else:
+                page, next_cursor = self._ranked_page(db, rare or prefixes, common if rare else [], limit, position)
+
+        texts = self._texts(db, page)
+        return [(reel_id, make_snippet(texts.get(reel_id, {}), prefixes)) for reel_id in page], next_cursor
+
+    def _is_common(self, db: Session, prefix: str) -> bool:
+        return db.execute(
+            _COMMON_PROBE_SQL, {"query": fts_query([prefix]), "offset": self.max_candidates}
+        ).first() is not None
+
+    @staticmethod
+    def _recent_page(db: Session, prefixes: List[str], limit: int, position):
+        before_id = position[1] if position else 2 ** 63 - 1
+        rows = db.execute(
+            _RECENT_SQL, {"query": fts_query(prefixes), "before_id": before_id, "limit": limit + 1}
+        ).all()
+        page = [row.id for row in rows[:limit]]
+        next_cursor = encode_cursor(["recent", page[-1]]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def _ranked_page(self, db: Session, ranked: List[str], common: List[str], limit: int, position):
+        """bm25 over the `ranked` prefixes; hits must also contain every `common` prefix"""
+        after_score, after_id = (position[1], position[2]) if position else (float("-inf"), 0)
+        query = fts_query(ranked)
+        page: List[Tuple[int, float]] = []
+        while len(page) <= limit:
+            batch = db.execute(_RANKED_SQL, {
+                "query": query, "after_score": after_score, "after_id": after_id, "limit": limit * 2 + 1
+            }).all()
+            if not batch:
+                break
+            after_score, after_id = batch[-1].score, batch[-1].id
+            if common:
+                texts = self._texts(db, [row.id for row in batch])
+                batch = [row for row in batch if contains_all(list(texts.get(row.id, {}).values()), common)]
+            page.extend((row.id, row.score) for row in batch)
+
+        next_cursor = None
+        if len(page) > limit:
+            last_id, last_score = page[limit - 1]
+            next_cursor = encode_cursor(["rank", last_score, last_id])
+        return [reel_id for reel_id, _ in page[:limit]], next_cursor
+
+    @staticmethod
+    def _texts(db: Session, reel_ids: List[int]) -> Dict[int, Dict[str, Optional[str]]]:
+        if not reel_ids:
+            return {}
+        columns = [getattr(Reel, name) for name in FTS_COLUMNS]
+        return {
+            row[0]: dict(zip(FTS_COLUMNS, row[1:]))
+            for row in db.query(Reel.id, *columns).filter(Reel.id.in_(reel_ids))
+        }
+
+    @staticmethod
+    def _search_like(db: Session, prefixes: List[str], limit: int, position):
+        """Unranked fallback: every word must appear in some indexed column, newest first"""
+        query = db.query(Reel.id)
+        if position:
+            if position[0] != "recent":
+                raise InvalidCursor(position)
+            query = query.filter(Reel.id < position[1])
+        for prefix in prefixes:
+            pattern = f"%{prefix}%"
+            query = query.filter(or_(*(getattr(Reel, column).ilike(pattern) for column in FTS_COLUMNS)))
+        ids = [row[0] for row in query.order_by(Reel.id.desc()).limit(limit + 1)]
+        next_cursor = encode_cursor(["recent", ids[limit - 1]]) if len(ids) > limit else None
+        return ids[:limit], next_cursor
+
+search_service = SearchService()
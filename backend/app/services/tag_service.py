@@ -0,0 +1,149 @@
+import bisect
+import heapq
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import Reel
+
+logger = logging.getLogger(__name__)
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Comma-separated tags as typed -> distinct normalized tags"""
+    return list(dict.fromkeys(tag.strip().lower() for tag in (tags or "").split(",") if tag.strip()))
+
+
+# Most completions kept per prefix; suggest() limits above this are capped
+MAX_SUGGESTIONS = 50
+
+
+def _rank(item: Tuple[str, int]) -> Tuple[int, str]:
+    # Most used first, alphabetical among equals
+    return -item[1], item[0]
+
+
+class TagIndex:
+    """
+    In-memory tag autocomplete: a sorted array of distinct tags with usage counts.
+    A prefix is a contiguous slice of the array (two bisects) from which the
+    MAX_SUGGESTIONS most used tags are picked once; that list is cached per prefix
+    and patched in place when a tag under the prefix is counted or uncounted.
+    """
+
+    def __init__(self, rebuild_interval: float = settings.TAG_INDEX_REBUILD_SECONDS):
+        self.rebuild_interval = rebuild_interval
+        self._tags: List[str] = []
+        self._counts: Dict[str, int] = {}
+        self._top: Dict[str, List[Tuple[str, int]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def rebuild(self, db: Optional[Session] = None) -> int:
+        """Recount every reel's tags; returns the number of distinct tags"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            counts: Dict[str, int] = {}
+            for (tags,) in db.query(Reel.tags).filter(Reel.tags.isnot(None), Reel.tags != "").yield_per(10000):
+                for tag in split_tags(tags):
+                    counts[tag] = counts.get(tag, 0) + 1
+        finally:
+            if own_session:
+                db.close()
+
+        with self._lock:
+            self._counts = counts
+            self._tags = sorted(counts)
+            # The widest (slowest to rank) prefixes are computed up front
+            self._top = {prefix: self._rank_prefix(prefix) for prefix in {""} | {tag[0] for tag in counts}}
+        return len(counts)
+
+    def add(self, tags: Optional[str]) -> None:
+        """Count a new reel's tags"""
+        self._update(split_tags(tags), 1)
+
+    def remove(self, tags: Optional[str]) -> None:
+        """Uncount a deleted reel's tags"""
+        self._update(split_tags(tags), -1)
+
+    def _update(self, tags: Iterable[str], delta: int) -> None:
+        with self._lock:
+            for tag in tags:
+                count = self._counts.get(tag, 0) + delta
+                if count > 0:
+                    if tag not in self._counts:
+                        bisect.insort(self._tags, tag)
+                    self._counts[tag] = count
+                elif tag in self._counts:
+                    del self._counts[tag]
+                    del self._tags[bisect.bisect_left(self._tags, tag)]
+                for end in range(len(tag) + 1):
+                    self._patch_top(tag[:end], tag, max(count, 0))
+
+    def _patch_top(self, prefix: str, tag: str, count: int) -> None:
+        top = self._top.get(prefix)
+        if top is None:
+            return
+        entries = [item for item in top if item[0] != tag]
+        if len(entries) < len(top) == MAX_SUGGESTIONS and (
+            _rank((tag, count)) > _rank(top[-1]) or (tag == top[-1][0] and count < top[-1][1])
+        ):
+            # A listed tag fell past the cut-off; whatever replaces it is unknown
+            del self._top[prefix]
+            return
+        if count > 0:
+            entries.append((tag, count))
+            entries.sort(key=_rank)
+        self._top[prefix] = entries[:MAX_SUGGESTIONS]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Most used tags starting with `prefix`, as (tag, reel count)"""
+        prefix = prefix.strip().lower()
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._rank_prefix(prefix)
+                if len(self._top) >= 10000:
+                    self._top = {}
+                self._top[prefix] = top
+        return top[:limit]
+
+    def _rank_prefix(self, prefix: str) -> List[Tuple[str, int]]:
+        lo = bisect.bisect_left(self._tags, prefix)
+        # Every tag with the prefix sorts before prefix + the highest code point
+        hi = bisect.bisect_left(self._tags, prefix + "\U0010ffff", lo)
+        counts = self._counts
+        # nlargest is stable, so equally used tags stay alphabetical (as in _rank)
+        return [(tag, counts[tag]) for tag in heapq.nlargest(MAX_SUGGESTIONS, self._tags[lo:hi], key=counts.__getitem__)]
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def start(self) -> None:
+        """Build the index, then rebuild it periodically so reels created by other workers show up"""
+        tag_count = self.rebuild()
+        logger.info("Tag index built", extra={"tags": tag_count})
+        if self.rebuild_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tag-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.rebuild_interval):
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Tag index rebuild failed")
+
+tag_index = TagIndex()
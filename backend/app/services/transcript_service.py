@@ -0,0 +1,150 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models import TranscriptSegment
+from app.services.search_service import create_fts_index, iter_words, query_prefixes
+
+# Same layout as reels_fts: the segment text lives once, in transcript_segments
+SEGMENTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transcript_segments_fts USING fts5(
+        text, content='transcript_segments', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_insert AFTER INSERT ON transcript_segments BEGIN
+        INSERT INTO transcript_segments_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_delete AFTER DELETE ON transcript_segments BEGIN
+        INSERT INTO transcript_segments_fts(transcript_segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_update AFTER UPDATE OF text ON transcript_segments BEGIN
+        INSERT INTO transcript_segments_fts(transcript_segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO transcript_segments_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+_MOMENTS_SQL = text("""
+    SELECT s.reel_id, s.start_ms, s.end_ms, s.text
+    FROM (
+        SELECT rowid AS id, rank FROM transcript_segments_fts
+        WHERE transcript_segments_fts MATCH :query ORDER BY rank LIMIT :scan
+    ) AS hit
+    JOIN transcript_segments AS s ON s.id = hit.id
+    ORDER BY hit.rank
+""")
+# Matching segments looked at per reel requested; reels with many hits use up the budget faster
+_SCAN_PER_REEL = 4
+_MAX_SCAN = 2000
+
+
+def phrase_query(prefixes: Sequence[str]) -> str:
+    """FTS5 phrase with the last word as a prefix: ["binary", "sea"] -> '"binary sea"*'"""
+    return '"' + " ".join(prefixes) + '"*'
+
+
+def phrase_offset(value: str, prefixes: Sequence[str]) -> Optional[int]:
+    """Character offset of the first occurrence of the phrase in `value`, or None"""
+    words = list(iter_words(value))
+    n = len(prefixes)
+    for i in range(len(words) - n + 1):
+        window = words[i:i + n]
+        if all(word == prefix for (_, _, word), prefix in zip(window[:-1], prefixes[:-1])) \
+                and window[-1][2].startswith(prefixes[-1]):
+            return window[0][0]
+    return None
+
+
+def moment(start_ms: int, end_ms: int, segment_text: str, prefixes: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Segment times in seconds. `at` is when the phrase starts, interpolated by its
+    character position in the segment (Whisper only times whole segments).
+    """
+    at_ms = start_ms
+    if prefixes and segment_text:
+        offset = phrase_offset(segment_text, prefixes)
+        if offset:
+            at_ms = start_ms + (end_ms - start_ms) * offset // len(segment_text)
+    return {
+        "start": start_ms / 1000,
+        "end": end_ms / 1000,
+        "at": round(at_ms / 1000, 2),
+        "text": segment_text,
+    }
+
+
+class TranscriptService:
+    """Timed transcript segments and phrase search within them"""
+
+    def __init__(self):
+        self.fts_enabled = False
+
+    def ensure_index(self, engine: Engine) -> None:
+        """Create the segment FTS5 table and sync triggers if missing"""
+        self.fts_enabled = create_fts_index(engine, "transcript_segments_fts", SEGMENTS_DDL)
+
+    @staticmethod
+    def replace_segments(db: Session, reel_id: int, segments: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store a reel's transcript as segments ({"start", "end", "text"}, seconds, as
+        returned by ai_service.transcribe_file), replacing any previous ones. Not committed.
+        """
+        db.query(TranscriptSegment).filter(TranscriptSegment.reel_id == reel_id).delete(synchronize_session=False)
+        rows = []
+        for segment in segments:
+            segment_text = (segment.get("text") or "").strip()
+            if not segment_text:
+                continue
+            start_ms = int(round(float(segment.get("start") or 0) * 1000))
+            end_ms = max(int(round(float(segment.get("end") or 0) * 1000)), start_ms)
+            rows.append(TranscriptSegment(reel_id=reel_id, start_ms=start_ms, end_ms=end_ms, text=segment_text))
+        db.add_all(rows)
+        return len(rows)
+
+    @staticmethod
+    def reel_segments(db: Session, reel_id: int, q: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A reel's segments in playback order; with `q`, only those where the phrase is spoken"""
+        prefixes = query_prefixes(q) if q else []
+        rows = db.query(
+            TranscriptSegment.start_ms, TranscriptSegment.end_ms, TranscriptSegment.text
+        ).filter(TranscriptSegment.reel_id == reel_id).order_by(TranscriptSegment.start_ms)
+        return [
+            moment(row.start_ms, row.end_ms, row.text, prefixes)
+            for row in rows
+            if not prefixes or phrase_offset(row.text, prefixes) is not None
+        ]
+
+    def search_moments(self, db: Session, q: str, limit: int = 10, per_reel: int = 3) -> List[Dict[str, Any]]:
+        """
+        Reels where the phrase is spoken, best match first, each with up to `per_reel`
+        moments in playback order: [{"reel_id": ..., "moments": [...]}]
+        """
+        prefixes = query_prefixes(q)
+        if not prefixes:
+            return []
+
+        if self.fts_enabled:
+            rows = db.execute(_MOMENTS_SQL, {
+                "query": phrase_query(prefixes), "scan": min(limit * per_reel * _SCAN_PER_REEL, _MAX_SCAN)
+            }).all()
+        else:
+            rows = db.query(
+                TranscriptSegment.reel_id, TranscriptSegment.start_ms, TranscriptSegment.end_ms, TranscriptSegment.text
+            ).filter(TranscriptSegment.text.ilike(f"%{prefixes[0]}%")).order_by(TranscriptSegment.id.desc()).limit(_MAX_SCAN)
+
+        by_reel: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if phrase_offset(row.text, prefixes) is None:
+                continue
+            moments = by_reel.get(row.reel_id)
+            if moments is None:
+                if len(by_reel) == limit:
+                    continue
+                moments = by_reel[row.reel_id] = []
+            if len(moments) < per_reel:
+                moments.append(moment(row.start_ms, row.end_ms, row.text, prefixes))
+        return [
+            {"reel_id": reel_id, "moments": sorted(moments, key=lambda m: m["start"])}
+            for reel_id, moments in by_reel.items()
+        ]
+
+transcript_service = TranscriptService()
@@ -0,0 +1,215 @@
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.database import SessionLocal
+from app.models import Reel, ReelActivity, ReelTrending
+
+logger = logging.getLogger(__name__)
+
+TRENDING_EVENTS = Counter("edubit_trending_events_total", "Views and completions counted towards trending, by kind")
+
+# Reels whose decayed score is below this are treated as not trending at all
+MIN_SCORE = 0.01
+
+
+def current_hour(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // 3600)
+
+
+def logaddexp(a: float, b: float) -> float:
+    """ln(e^a + e^b) without overflow"""
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+
+class TrendingService:
+    """
+    Hourly view/completion buckets and an exponentially decayed trending score.
+
+    An event of weight w in hour h adds e^(decay * h) * w to a reel's sum, so the
+    sum never has to be re-decayed: the score at time t is sum * e^(-decay * t),
+    which orders reels the same way as the sum itself. ReelTrending stores the sum
+    as a logarithm (trend_key) to stay in float range, and updates it with one
+    logaddexp per flushed bucket. Events are coalesced in memory and flushed
+    periodically, like watch heartbeats.
+    """
+
+    def __init__(
+        self,
+        half_life_hours: float = settings.TRENDING_HALF_LIFE_HOURS,
+        completion_weight: float = settings.TRENDING_COMPLETION_WEIGHT,
+        flush_interval: float = settings.TRENDING_FLUSH_INTERVAL_SECONDS,
+        retention_days: int = settings.TRENDING_RETENTION_DAYS,
+    ):
+        self.decay = math.log(2) / half_life_hours
+        self.completion_weight = completion_weight
+        self.flush_interval = flush_interval
+        self.retention_hours = retention_days * 24
+        # (reel_id, hour) -> [views, completions]
+        self._pending: Dict[Tuple[int, int], List[int]] = {}
+        self._pruned_hour = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_view(self, reel_id: int) -> None:
+        self._record(reel_id, 0)
+        TRENDING_EVENTS.inc(kind="view")
+
+    def record_completion(self, reel_id: int) -> None:
+        self._record(reel_id, 1)
+        TRENDING_EVENTS.inc(kind="completion")
+
+    def _record(self, reel_id: int, index: int) -> None:
+        key = (reel_id, current_hour())
+        with self._lock:
+            counts = self._pending.get(key)
+            if counts is None:
+                counts = self._pending[key] = [0, 0]
+            counts[index] += 1
+
+    def event_key(self, hour: int, views: int, completions: int) -> Optional[float]:
+        """ln(weight * e^(decay * hour)) of one bucket's activity; None when it has none"""
+        weight = views + completions * self.completion_weight
+        return math.log(weight) + self.decay * hour if weight > 0 else None
+
+    def score(self, trend_key: float, now: Optional[float] = None) -> float:
+        """Decayed activity now, in view-equivalents"""
+        hours = (time.time() if now is None else now) / 3600
+        return math.exp(trend_key - self.decay * hours)
+
+    def min_key(self, now: Optional[float] = None) -> float:
+        """trend_key below which a reel's score is under MIN_SCORE"""
+        hours = (time.time() if now is None else now) / 3600
+        return math.log(MIN_SCORE) + self.decay * hours
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Add pending events to the buckets and trending keys; returns the number of buckets touched"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            # Views are not validated against deletes in flight, so drop reels that are gone
+            reel_ids = {
+                row[0] for row in db.query(Reel.id).filter(Reel.id.in_({reel_id for reel_id, _ in batch}))
+            }
+            batch = {key: counts for key, counts in batch.items() if key[0] in reel_ids}
+
+            # Buckets first: increments are atomic, and on SQLite this first write takes the
+            # database write lock, so the trending keys read below can't change under us
+            for (reel_id, hour), (views, completions) in batch.items():
+                updated = db.query(ReelActivity).filter(
+                    ReelActivity.reel_id == reel_id, ReelActivity.hour == hour
+                ).update({
+                    ReelActivity.views: ReelActivity.views + views,
+                    ReelActivity.completions: ReelActivity.completions + completions,
+                }, synchronize_session=False)
+                if not updated:
+                    db.add(ReelActivity(reel_id=reel_id, hour=hour, views=views, completions=completions))
+
+            deltas: Dict[int, float] = {}
+            for (reel_id, hour), (views, completions) in batch.items():
+                key = self.event_key(hour, views, completions)
+                if key is not None:
+                    deltas[reel_id] = logaddexp(deltas[reel_id], key) if reel_id in deltas else key
+            rows = {
+                row.reel_id: row
+                for row in db.query(ReelTrending).filter(ReelTrending.reel_id.in_(deltas)).with_for_update()
+            } if deltas else {}
+            for reel_id, key in deltas.items():
+                row = rows.get(reel_id)
+                if row is None:
+                    db.add(ReelTrending(reel_id=reel_id, trend_key=key))
+                else:
+                    row.trend_key = logaddexp(row.trend_key, key)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Trending flush failed", extra={"buckets": len(batch)})
+            # Put the batch back so the next flush retries it
+            with self._lock:
+                for key, (views, completions) in batch.items():
+                    counts = self._pending.setdefault(key, [0, 0])
+                    counts[0] += views
+                    counts[1] += completions
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+        self._prune()
+        return len(batch)
+
+    def _prune(self) -> None:
+        """Delete buckets past retention, at most once an hour"""
+        hour = current_hour()
+        if hour == self._pruned_hour:
+            return
+        self._pruned_hour = hour
+        db = SessionLocal()
+        try:
+            deleted = db.query(ReelActivity).filter(
+                ReelActivity.hour < hour - self.retention_hours
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.info("Pruned trending buckets", extra={"buckets": deleted})
+        except Exception:
+            db.rollback()
+            logger.exception("Trending bucket pruning failed")
+        finally:
+            db.close()
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute every trending key from the buckets (e.g. after changing the half-life
+        or completion weight); returns the number of reels with activity. Not committed.
+        """
+        keys: Dict[int, float] = {}
+        rows = db.query(ReelActivity.reel_id, ReelActivity.hour, ReelActivity.views, ReelActivity.completions)
+        for reel_id, hour, views, completions in rows.yield_per(10000):
+            key = self.event_key(hour, views or 0, completions or 0)
+            if key is not None:
+                keys[reel_id] = logaddexp(keys[reel_id], key) if reel_id in keys else key
+        db.query(ReelTrending).delete(synchronize_session=False)
+        db.bulk_insert_mappings(ReelTrending, [{"reel_id": reel_id, "trend_key": key} for reel_id, key in keys.items()])
+        return len(keys)
+
+    def scores(self, db: Session) -> Dict[int, float]:
+        """Current score of every reel that is trending at all (an index range scan)"""
+        now = time.time()
+        rows = db.query(ReelTrending.reel_id, ReelTrending.trend_key).filter(ReelTrending.trend_key > self.min_key(now))
+        return {reel_id: self.score(key, now) for reel_id, key in rows}
+
+    def start(self) -> None:
+        """Start the periodic background flusher"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and flush whatever is left"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+trending_service = TrendingService()
@@ -0,0 +1,123 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import Reel, WatchPosition
+
+logger = logging.getLogger(__name__)
+
+
+class WatchService:
+    """Coalesces playback heartbeats in memory and flushes them in batches"""
+
+    def __init__(self, flush_interval: float = settings.WATCH_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[int, int], float] = {}
+        # The batch a flush has taken out of _pending but not committed yet
+        self._inflight: Dict[Tuple[int, int], float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, user_id: int, reel_id: int, position_seconds: float) -> None:
+        """Record a heartbeat, keeping only the furthest position per (user, reel)"""
+        key = (user_id, reel_id)
+        with self._lock:
+            if position_seconds > self._pending.get(key, -1.0):
+                self._pending[key] = position_seconds
+
+    def get_position(self, db: Session, user_id: int, reel_id: int) -> float:
+        """Resume position for a reel, including heartbeats not yet flushed"""
+        key = (user_id, reel_id)
+        with self._lock:
+            pending = max(self._pending.get(key, 0.0), self._inflight.get(key, 0.0))
+
+        row = db.query(WatchPosition.position_seconds).filter(
+            WatchPosition.user_id == user_id,
+            WatchPosition.reel_id == reel_id
+        ).first()
+        stored = row[0] if row else 0.0
+        return max(pending, stored or 0.0)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write pending positions to the database; returns the number of rows inserted or advanced"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                return self._write(batch, db)
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def _write(self, batch: Dict[Tuple[int, int], float], db: Optional[Session]) -> int:
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            user_ids = {user_id for user_id, _ in batch}
+            # Heartbeats are not validated on ingest, so drop reels that don't exist (anymore)
+            reel_ids = {
+                row[0] for row in db.query(Reel.id).filter(Reel.id.in_({reel_id for _, reel_id in batch}))
+            }
+            existing = {
+                (row.user_id, row.reel_id): row
+                for row in db.query(WatchPosition).filter(
+                    WatchPosition.user_id.in_(user_ids),
+                    WatchPosition.reel_id.in_(reel_ids)
+                )
+            }
+
+            written = 0
+            for (user_id, reel_id), position in batch.items():
+                if reel_id not in reel_ids:
+                    continue
+                row = existing.get((user_id, reel_id))
+                if row is None:
+                    db.add(WatchPosition(user_id=user_id, reel_id=reel_id, position_seconds=position))
+                elif position > (row.position_seconds or 0.0):
+                    row.position_seconds = position
+                else:
+                    continue
+                written += 1
+
+            db.commit()
+            logger.debug("Flushed watch positions", extra={"positions": len(batch), "written": written})
+            return written
+        except Exception:
+            db.rollback()
+            logger.exception("Watch position flush failed", extra={"positions": len(batch)})
+            # Put the batch back so the next flush retries it
+            for (user_id, reel_id), position in batch.items():
+                self.record(user_id, reel_id, position)
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+    def start(self) -> None:
+        """Start the periodic background flusher"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="watch-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and flush whatever is left"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+watch_service = WatchService()
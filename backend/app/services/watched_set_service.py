@@ -0,0 +1,133 @@
+"""
+Per-user watched-reel sets for feed exclusion.
+
+A heavy user's tens of thousands of watched ids as a Python list cost ~36 bytes
+each (pointer plus int object) and an O(n) scan per `in`; a set is faster but
+larger still. WatchedSet keeps them as a sorted uint32 array: 4 bytes per id,
+membership by binary search, and (de)serialized to the stored blob with a single
+copy. user_watched_sets holds one blob per user, updated in place by progress
+writes, so the feed reads one row instead of the user's whole Progress history.
+"""
+import bisect
+import sys
+from array import array
+from typing import Iterable, Iterator, List
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Progress, UserWatchedSet
+
+# array typecode of an unsigned 32-bit int on this platform
+_UINT32 = "I" if array("I").itemsize == 4 else "L"
+
+
+class WatchedSet:
+    """Distinct reel ids in a sorted uint32 array; stored little-endian"""
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, reel_ids: Iterable[int] = ()):
+        self._ids = array(_UINT32, sorted(set(reel_ids)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WatchedSet":
+        watched = cls()
+        watched._ids.frombytes(data)
+        if sys.byteorder == "big":
+            watched._ids.byteswap()
+        return watched
+
+    def to_bytes(self) -> bytes:
+        if sys.byteorder == "big":
+            ids = array(_UINT32, self._ids)
+            ids.byteswap()
+            return ids.tobytes()
+        return self._ids.tobytes()
+
+    def add(self, reel_id: int) -> bool:
+        """Insert in order; False when already present"""
+        position = bisect.bisect_left(self._ids, reel_id)
+        if position < len(self._ids) and self._ids[position] == reel_id:
+            return False
+        self._ids.insert(position, reel_id)
+        return True
+
+    def __contains__(self, reel_id: object) -> bool:
+        position = bisect.bisect_left(self._ids, reel_id)
+        return position < len(self._ids) and self._ids[position] == reel_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._ids) * self._ids.itemsize
+
+
+class WatchedSetService:
+    """Loads and maintains the stored sets"""
+
+    def get(self, db: Session, user_id: int) -> WatchedSet:
+        """
+        The user's watched set: one primary key read. Users without a stored set
+        yet (none since it was introduced) get one built from Progress and saved
+        in a session of its own, so the caller's transaction is left alone. An
+        empty one isn't saved: the user's first progress write creates the row.
+        """
+        row = db.query(UserWatchedSet.reel_ids).filter(UserWatchedSet.user_id == user_id).first()
+        if row is not None:
+            return WatchedSet.from_bytes(row[0])
+        watched = self._build(db, user_id)
+        if not watched:
+            return watched
+        own = Session(bind=db.get_bind())
+        try:
+            own.add(UserWatchedSet(user_id=user_id, reel_ids=watched.to_bytes(), size=len(watched)))
+            own.commit()
+        except IntegrityError:
+            own.rollback()  # A concurrent progress write or feed request saved it first
+        finally:
+            own.close()
+        return watched
+
+    def add(self, db: Session, user_id: int, reel_id: int) -> None:
+        """Record a new watch with the caller's progress write; not committed"""
+        row = db.query(UserWatchedSet).filter(UserWatchedSet.user_id == user_id).with_for_update().first()
+        if row is None:
+            watched = self._build(db, user_id)
+            watched.add(reel_id)  # The caller's Progress row may not be flushed yet
+            try:
+                with db.begin_nested():
+                    db.add(UserWatchedSet(user_id=user_id, reel_ids=watched.to_bytes(), size=len(watched)))
+                return
+            except IntegrityError:
+                # A feed request saved one meanwhile: add to that instead
+                row = db.query(UserWatchedSet).filter(UserWatchedSet.user_id == user_id).with_for_update().one()
+        watched = WatchedSet.from_bytes(row.reel_ids)
+        if watched.add(reel_id):
+            row.reel_ids = watched.to_bytes()
+            row.size = len(watched)
+
+    @staticmethod
+    def recent(db: Session, user_id: int, limit: int) -> List[int]:
+        """The user's `limit` most recently watched distinct reel ids, newest first"""
+        recent: List[int] = []
+        rows = db.query(Progress.reel_id).filter(
+            Progress.user_id == user_id, Progress.reel_id.isnot(None)
+        ).order_by(Progress.id.desc()).yield_per(limit)
+        for (reel_id,) in rows:
+            if reel_id not in recent:
+                recent.append(reel_id)
+                if len(recent) == limit:
+                    break
+        return recent
+
+    @staticmethod
+    def _build(db: Session, user_id: int) -> WatchedSet:
+        return WatchedSet(reel_id for (reel_id,) in db.query(Progress.reel_id).filter(
+            Progress.user_id == user_id, Progress.reel_id.isnot(None)
+        ))
+
+watched_set_service = WatchedSetService()
@@ -0,0 +1,52 @@
+"""
+CPU cost vs bytes saved for compressing realistic feed pages.
+
+Runs every available codec over a ReelCard page and a full ReelResponse page
+(the course/playlist shape, with AI summaries and quizzes) at several levels.
+
+    cd backend && python -m benchmarks.bench_compression
+"""
+import gzip
+import time
+
+from app.core.compression import brotli, zstandard
+from benchmarks.bench_serialization import make_page, old_path, card_path
+
+REPEAT = 50
+
+
+def codecs():
+    for level in (1, 5, 9):
+        yield f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)
+    if brotli is not None:
+        for quality in (1, 4, 6, 11):
+            yield f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality, mode=brotli.MODE_TEXT)
+    if zstandard is not None:
+        for level in (1, 3, 9):
+            yield f"zstd-{level}", zstandard.ZstdCompressor(level=level).compress
+
+
+def run() -> dict:
+    reels = make_page()
+    pages = {"reel_card_page": card_path(reels), "reel_response_page": old_path(reels)}
+    results = {}
+    for page_name, body in pages.items():
+        for codec_name, compress in codecs():
+            compress(body)  # warm up
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                compressed = compress(body)
+            seconds = (time.perf_counter() - start) / REPEAT
+            results[f"{page_name}/{codec_name}"] = {
+                "bytes_in": len(body),
+                "bytes_out": len(compressed),
+                "ratio": round(len(body) / len(compressed), 2),
+                "ms_per_page": round(seconds * 1000, 3),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:34s} {result['bytes_in']:>8d} -> {result['bytes_out']:>7d} bytes "
+              f"(x{result['ratio']:<5})  {result['ms_per_page']:>7.3f} ms/page")
@@ -0,0 +1,149 @@
+"""
+Content embedding index: build time, query latency and recall at catalog scale.
+
+Builds a throwaway SQLite database with N synthetic reels (each written mostly
+from one of a few thousand topic vocabularies, so there are true neighbors to
+find), runs the full embedding build, then times "similar to this reel" and
+"more like these watches" queries against the clustered index, an upload's
+incremental append, and recall@10 against an exact scan of every vector.
+
+    cd backend && python -m benchmarks.bench_embeddings [--reels 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, Reel
+from app.services.embedding_service import EmbeddingIndex
+
+VOCABULARY_SIZE = 50000
+TOPICS = 2000
+TOPIC_WORDS = 40
+
+
+def word(rng: random.Random) -> str:
+    return f"w{min(int(rng.paretovariate(0.9)), VOCABULARY_SIZE)}"
+
+
+def text(rng: random.Random, topic: list, length: int) -> str:
+    return " ".join(rng.choice(topic) if rng.random() < 0.7 else word(rng) for _ in range(length))
+
+
+def build_db(path: str, reels: int, seed: int = 3):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    topics = [[f"t{rng.randrange(VOCABULARY_SIZE)}" for _ in range(TOPIC_WORDS)] for _ in range(TOPICS)]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        conn.execute(insert(User), [{"id": 1, "email": "c@example.com", "hashed_password": "x", "role": "creator"}])
+        for start in range(0, reels, 20000):
+            rows = []
+            for _ in range(min(20000, reels - start)):
+                topic = topics[rng.randrange(TOPICS)]
+                rows.append({
+                    "title": text(rng, topic, 6),
+                    "description": text(rng, topic, 25),
+                    "video_url": "https://cdn/v.mp4",
+                    "difficulty_level": "beginner",
+                    "duration_seconds": 60,
+                    "creator_id": 1,
+                    "views_count": 0,
+                    "version": 1,
+                    "transcript": text(rng, topic, 120) if rng.random() < 0.3 else None,
+                })
+            conn.execute(insert(Reel), rows)
+    return engine, topics
+
+
+def percentiles(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))] * 1000, 2),
+    }
+
+
+def timed(fn, runs: int) -> dict:
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def recall_at_10(index: EmbeddingIndex, reel_ids: list) -> float:
+    """Share of the exact top 10 (full scan of the memory-mapped vectors) the index returns"""
+    generation = index._generation
+    found = total = 0
+    for reel_id in reel_ids:
+        query = index.vector(reel_id)
+        scores = np.concatenate([
+            generation.vectors[begin:begin + 100000] @ query for begin in range(0, generation.rows, 100000)
+        ])
+        scores[generation.row(reel_id)] = -1
+        exact = {int(generation.ids[row]) for row in np.argpartition(-scores, 10)[:10]}
+        found += len(exact & {similar_id for similar_id, _ in index.similar(reel_id, 10)})
+        total += len(exact)
+    return round(found / total, 3)
+
+
+def run(reels: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.db")
+        start = time.perf_counter()
+        engine, topics = build_db(path, reels)
+        results = {"reels": reels, "db_build_s": round(time.perf_counter() - start, 1)}
+
+        db = sessionmaker(bind=engine)()
+        index = EmbeddingIndex(directory=os.path.join(tmp, "index"), reload_interval=0)
+        stats = index.build(db)
+        results.update({
+            "index_build_s": stats["seconds"],
+            "clusters": stats["clusters"],
+            "vectors_mb": round(os.path.getsize(os.path.join(index._current_path(), "vectors.f32")) / 1e6, 1),
+        })
+
+        rng = random.Random(5)
+        sample = [rng.randint(1, reels) for _ in range(runs)]
+        results["similar_10"] = timed(lambda i: index.similar(sample[i], 10), runs)
+        results["more_like_200_from_20_watches"] = timed(
+            lambda i: index.more_like(rng.sample(range(1, reels + 1), 20), 200), runs
+        )
+        results["more_like_200_from_20_watches"]["exact_scan_ms"] = timed(
+            lambda i: np.argpartition(-(index._generation.vectors @ index.vector(sample[i])), 200)[:200], 3
+        )["p50_ms"]
+
+        class Upload:
+            def __init__(self, i):
+                topic = topics[i % TOPICS]
+                self.id = reels + 1 + i
+                self.title, self.description, self.transcript = text(rng, topic, 6), text(rng, topic, 25), None
+
+        results["upload_append"] = timed(lambda i: index.add(Upload(i)), min(runs, 50))
+        results["similar_10_after_appends"] = timed(lambda i: index.similar(sample[i], 10), runs)
+        for nprobe in (index.nprobe, index.nprobe * 2, index.nprobe * 4):
+            index.nprobe = nprobe
+            results[f"recall_at_10_nprobe_{nprobe}"] = recall_at_10(index, sample[:20])
+            results[f"similar_10_nprobe_{nprobe}"] = timed(lambda i: index.similar(sample[i], 10), runs)
+        db.close()
+        engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reels", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.reels, args.runs), indent=2))
@@ -0,0 +1,282 @@
+"""
+Reproducible micro-benchmarks for the hot paths, saved as JSON for
+commit-to-commit comparison.
+
+Covers feed scoring at several catalog/history sizes, ReelResponse
+serialization of feed pages, JWT encode/decode, course progress
+computation and tag autocomplete. Data is synthetic with fixed seeds in
+an in-memory SQLite database, so runs on the same machine are comparable.
+
+    cd backend && python -m benchmarks.bench_micro                       # writes benchmarks/results/<commit>.json
+    cd backend && python -m benchmarks.bench_micro --quick --compare benchmarks/results/<older>.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import User, Reel, MicroCourse, Progress, CourseCompletion, course_reels
+from app.schemas import ReelResponse
+from app.core import security
+from app.services.feed_service import feed_service
+from app.services.progress_service import progress_service
+from app.services.tag_service import TagIndex
+from benchmarks.bench_serialization import make_page
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+TAGS = ["python", "git", "sql", "react", "statistics", "spanish", "finance", "design", "physics", "docker"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+# A regression is flagged when the best-of-repeats time gets this much slower
+REGRESSION_THRESHOLD = 0.10
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    """
+    Calibrate a loop count that runs for at least `min_time`, then time `repeat`
+    such loops. Reports per-call milliseconds; --compare uses the minimum, which is
+    far less sensitive to scheduler noise than the median.
+    """
+    fn()  # warm up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "stdev_ms": round(statistics.pstdev(timings) * 1000, 4),
+        "loops": number,
+    }
+
+
+def make_session(catalog: int, history: int, courses: int = 0, course_users: int = 0, seed: int = 7):
+    """In-memory database with `catalog` reels and one user (id 1) who watched `history` of them"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    now = datetime(2024, 6, 1)
+    user_count = max(course_users, 1) + 1
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "hashed_password": "x", "full_name": f"User {i}",
+             "role": "creator" if i == user_count else "learner"}
+            for i in range(1, user_count + 1)
+        ])
+        conn.execute(insert(Reel), [
+            {"id": i, "title": f"Reel {i}", "description": "d", "video_url": f"https://cdn/{i}.mp4",
+             "tags": ",".join(rng.sample(TAGS, rng.randint(1, 3))), "difficulty_level": rng.choice(DIFFICULTIES),
+             "duration_seconds": 60, "creator_id": user_count, "views_count": rng.randint(0, 5000),
+             "created_at": now - timedelta(minutes=i), "updated_at": now, "version": 1}
+            for i in range(1, catalog + 1)
+        ])
+        watched = rng.sample(range(1, catalog + 1), min(history, catalog))
+        progress_rows = [
+            {"user_id": 1, "reel_id": reel_id, "completed": True, "completed_at": now} for reel_id in watched
+        ]
+        members = {}
+        for course_id in range(1, courses + 1):
+            members[course_id] = rng.sample(range(1, catalog + 1), 10)
+        if courses:
+            conn.execute(insert(MicroCourse), [
+                {"id": c, "title": f"Course {c}", "difficulty_level": "beginner", "creator_id": user_count,
+                 "reel_count": 10, "version": 1}
+                for c in members
+            ])
+            conn.execute(insert(course_reels), [{"course_id": c, "reel_id": r} for c, rs in members.items() for r in rs])
+            for user_id in range(2, course_users + 1):
+                for reel_id in rng.sample(members[1], rng.randint(1, 10)):
+                    progress_rows.append({"user_id": user_id, "reel_id": reel_id, "completed": True, "completed_at": now})
+        if progress_rows:
+            conn.execute(insert(Progress), progress_rows)
+
+    db = sessionmaker(bind=engine)()
+    if courses:
+        for course_id in members:
+            progress_service.recompute_course(db, course_id)
+        db.commit()
+    return db
+
+
+def bench_feed_scoring(catalogs: List[int], histories: List[int], repeat: int, min_time: float) -> dict:
+    results = {}
+    for catalog in catalogs:
+        for history in histories:
+            db = make_session(catalog, history)
+            reels = db.query(Reel).all()
+            results[f"feed_scoring[catalog={catalog},history={history}]"] = measure(
+                lambda: feed_service.score_reels_for_user(db, 1, reels), repeat, min_time
+            )
+            db.close()
+    return results
+
+
+def bench_reel_response(page_sizes: List[int], repeat: int, min_time: float) -> dict:
+    results = {}
+    for size in page_sizes:
+        page = make_page(size)
+
+        def serialize():
+            out = []
+            for reel in page:
+                response = ReelResponse.model_validate(reel)
+                response.creator_name = reel.creator.full_name
+                out.append(response)
+            return [r.model_dump_json() for r in out]
+
+        results[f"reel_response_serialize[page={size}]"] = measure(serialize, repeat, min_time)
+    return results
+
+
+def bench_jwt(repeat: int, min_time: float) -> dict:
+    claims = {"sub": "learner42@example.com", "user_id": 42}
+    token = security.create_access_token(claims)
+    return {
+        "jwt_encode": measure(lambda: security.create_access_token(claims), repeat, min_time),
+        "jwt_decode_uncached": measure(
+            lambda: security.jwt.decode(token, security.settings.SECRET_KEY, algorithms=[security.settings.ALGORITHM]),
+            repeat, min_time
+        ),
+        "jwt_decode_cached": measure(lambda: security.decode_access_token(token), repeat, min_time),
+    }
+
+
+def bench_course_progress(repeat: int, min_time: float) -> dict:
+    db = make_session(catalog=2000, history=300, courses=50, course_users=500)
+    course_ids = list(range(1, 51))
+    results = {
+        "course_progress_batch[courses=50]": measure(
+            lambda: progress_service.get_courses_progress(db, 1, course_ids), repeat, min_time
+        ),
+        "course_progress_single": measure(
+            lambda: progress_service.get_courses_progress(db, 1, [1]), repeat, min_time
+        ),
+    }
+
+    def recompute():
+        progress_service.recompute_course(db, 1)
+        db.commit()
+
+    results["course_recompute[users=500]"] = measure(recompute, repeat, min_time)
+    assert db.query(CourseCompletion).filter(CourseCompletion.course_id == 1).count() > 0
+    db.close()
+    return results
+
+
+def bench_tag_suggest(tag_count: int, repeat: int, min_time: float) -> dict:
+    rng = random.Random(11)
+    index = TagIndex(rebuild_interval=0)
+    for n in range(tag_count):
+        # Zipf-ish reuse: a few tags on many reels, a long tail used once
+        index.add(",".join(f"{rng.choice(TAGS)}-{int(rng.paretovariate(1.0))}" for _ in range(3)))
+        index.add(f"{rng.choice(TAGS)}{n}")
+
+    def uncached(prefix: str):
+        def suggest():
+            index._top.clear()
+            return index.suggest(prefix, 10)
+        return suggest
+
+    return {
+        f"tag_suggest_uncached[tags={len(index)},prefix=1]": measure(uncached("p"), repeat, min_time),
+        f"tag_suggest_uncached[tags={len(index)},prefix=4]": measure(uncached("pyth"), repeat, min_time),
+        f"tag_suggest_cached[tags={len(index)}]": measure(lambda: index.suggest("py", 10), repeat, min_time),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Lines describing per-benchmark changes in min_ms; regressions are marked"""
+    lines = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            lines.append(f"  {name:50s} new")
+            continue
+        change = result["min_ms"] / old["min_ms"] - 1 if old["min_ms"] else 0.0
+        flag = "  REGRESSION" if change > REGRESSION_THRESHOLD else ""
+        lines.append(f"  {name:50s} {old['min_ms']:>10.4f} -> {result['min_ms']:>10.4f} ms  {change:+7.1%}{flag}")
+    return lines
+
+
+def run(quick: bool = False) -> dict:
+    repeat, min_time = (3, 0.05) if quick else (7, 0.2)
+    catalogs = [1000, 5000] if quick else [1000, 10000, 50000]
+    histories = [0, 100] if quick else [0, 100, 1000]
+
+    results = {}
+    results.update(bench_feed_scoring(catalogs, histories, repeat, min_time))
+    results.update(bench_reel_response([20, 100], repeat, min_time))
+    results.update(bench_jwt(repeat, min_time))
+    results.update(bench_course_progress(repeat, min_time))
+    results.update(bench_tag_suggest(5000 if quick else 50000, repeat, min_time))
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EduBit micro-benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and fewer repeats")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to diff against")
+    args = parser.parse_args()
+
+    report = run(args.quick)
+    for name, result in report["results"].items():
+        print(f"{name:52s} {result['median_ms']:>10.4f} ms  (min {result['min_ms']:.4f}, loops {result['loops']})")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
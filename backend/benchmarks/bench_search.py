@@ -0,0 +1,113 @@
+"""
+Reel full-text search latency (FTS5 + bm25 + snippets) at catalog scale.
+
+Builds a throwaway SQLite database with N synthetic reels (Zipf-distributed
+vocabulary, so there are both rare and very common terms), indexes it, then
+times search_service.search for several query shapes.
+
+    cd backend && python -m benchmarks.bench_search [--reels 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, Reel
+from app.services.search_service import SearchService
+
+VOCABULARY_SIZE = 20000
+QUERIES = {
+    "common_word": "w1",
+    "mid_word": "w120",
+    "rare_word": "w15000",
+    "prefix_2_chars": "w9",
+    "two_words": "w3 w40",
+}
+
+
+def word(rng: random.Random) -> str:
+    return f"w{min(int(rng.paretovariate(0.9)), VOCABULARY_SIZE)}"
+
+
+def build(path: str, reels: int, seed: int = 3):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        conn.execute(insert(User), [{"id": 1, "email": "c@example.com", "hashed_password": "x", "role": "creator"}])
+        for start in range(0, reels, 20000):
+            conn.execute(insert(Reel), [
+                {
+                    "title": " ".join(word(rng) for _ in range(6)),
+                    "description": " ".join(word(rng) for _ in range(25)),
+                    "video_url": "https://cdn/v.mp4",
+                    "tags": ",".join(word(rng) for _ in range(3)),
+                    "difficulty_level": "beginner",
+                    "duration_seconds": 60,
+                    "creator_id": 1,
+                    "views_count": 0,
+                    "version": 1,
+                    "ai_summary": " ".join(word(rng) for _ in range(30)),
+                    "transcript": " ".join(word(rng) for _ in range(120)) if rng.random() < 0.3 else None,
+                }
+                for _ in range(min(20000, reels - start))
+            ])
+    service = SearchService()
+    start = time.perf_counter()
+    service.ensure_index(engine)  # new index: one bulk 'rebuild' over the existing rows
+    return engine, service, time.perf_counter() - start
+
+
+def time_query(db, service: SearchService, q: str, runs: int, pages: int = 1) -> dict:
+    timings = []
+    for _ in range(runs):
+        cursor = None
+        start = time.perf_counter()
+        for _ in range(pages):
+            hits, cursor = service.search(db, q, limit=20, cursor=cursor)
+            if not cursor:
+                break
+        timings.append((time.perf_counter() - start) / pages)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))] * 1000, 2),
+        "hits_first_page": len(hits) if pages == 1 else None,
+    }
+
+
+def run(reels: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        build_start = time.perf_counter()
+        engine, service, index_seconds = build(path, reels)
+        results = {
+            "reels": reels,
+            "build_s": round(time.perf_counter() - build_start, 1),
+            "index_rebuild_s": round(index_seconds, 1),
+            "db_mb": round(os.path.getsize(path) / 1e6, 1),
+            "queries": {},
+        }
+        db = sessionmaker(bind=engine)()
+        for name, q in QUERIES.items():
+            results["queries"][name] = time_query(db, service, q, runs)
+        results["queries"]["common_word_page_5"] = time_query(db, service, QUERIES["common_word"], max(runs // 5, 3), pages=5)
+        db.close()
+        engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reels", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(run(args.reels, args.runs), indent=2))
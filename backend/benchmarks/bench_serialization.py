@@ -0,0 +1,90 @@
+"""
+Bytes and serialization time for one 100-reel feed page.
+
+Compares the old path (ReelResponse.model_validate + stdlib JSON, full AI
+payloads) against ReelCard dicts rendered with orjson.
+
+    cd backend && python -m benchmarks.bench_serialization
+"""
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.api.reels import REEL_CARD_FIELDS, reel_card_dict
+from app.models import Reel, User
+from app.schemas import ReelResponse
+
+PAGE_SIZE = 100
+REPEAT = 200
+
+
+def make_page(n: int = PAGE_SIZE, seed: int = 42):
+    """Transient Reel objects with realistic AI summaries, key points and quizzes"""
+    rng = random.Random(seed)
+    creator = User(id=1, email="creator@example.com", full_name="Dr. Kim", role="creator")
+    words = "python list comprehension recursion git rebase merge vector matrix spanish verb roi".split()
+    reels = []
+    for i in range(n):
+        sentence = lambda k: " ".join(rng.choice(words) for _ in range(k)).capitalize() + "."
+        reels.append(Reel(
+            id=i + 1,
+            title=sentence(6),
+            description=sentence(30),
+            video_url=f"https://res.cloudinary.com/demo/video/upload/v1/edubit/reels/{i}.mp4",
+            tags=",".join(rng.sample(words, 3)),
+            difficulty_level=rng.choice(["beginner", "intermediate", "advanced"]),
+            duration_seconds=rng.randint(30, 90),
+            creator_id=1,
+            creator=creator,
+            created_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+            views_count=rng.randint(0, 50000),
+            ai_summary=sentence(50),
+            ai_key_points=[sentence(12) for _ in range(5)],
+            ai_quiz={"questions": [
+                {"question": sentence(12) + "?", "options": [sentence(4) for _ in range(4)], "correct_answer": "A"}
+                for _ in range(3)
+            ]},
+        ))
+    return reels
+
+
+def old_path(reels) -> bytes:
+    results = []
+    for reel in reels:
+        response = ReelResponse.model_validate(reel)
+        response.creator_name = reel.creator.full_name or reel.creator.email
+        results.append(response.model_dump(mode="json"))
+    return json.dumps(results).encode()
+
+
+def card_path(reels, fields=REEL_CARD_FIELDS) -> bytes:
+    return orjson.dumps([reel_card_dict(reel, fields) for reel in reels])
+
+
+def measure(fn, *args):
+    fn(*args)  # warm up
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        body = fn(*args)
+    return len(body), (time.perf_counter() - start) / REPEAT
+
+
+def run() -> dict:
+    reels = make_page()
+    results = {}
+    for name, fn, args in [
+        ("reel_response_json", old_path, ()),
+        ("reel_card_orjson", card_path, ()),
+        ("reel_card_orjson_sparse", card_path, (("id", "title", "video_url"),)),
+    ]:
+        size, seconds = measure(fn, reels, *args)
+        results[name] = {"bytes": size, "ms_per_page": round(seconds * 1000, 3)}
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:26s} {result['bytes']:>8d} bytes  {result['ms_per_page']:>8.3f} ms/page")
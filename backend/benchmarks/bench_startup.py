@@ -0,0 +1,55 @@
+"""
+Worker startup cost: `import app.main` time and time-to-first-request.
+
+Each sample runs in a fresh interpreter against a throwaway SQLite database,
+so module caches and an existing schema don't flatter the numbers.
+
+    cd backend && python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    client.get("/health")
+    first_request = time.perf_counter()
+heavy = [m for m in ("moviepy.editor", "openai", "cloudinary", "numpy") if m in __import__("sys").modules]
+print(json.dumps({"import": imported - start, "first_request": first_request - start, "heavy_modules": heavy}))
+"""
+
+
+def sample(backend_dir: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=backend_dir, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(runs: int = 5) -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = [sample(backend_dir) for _ in range(runs)]
+    return {
+        "import_ms": round(statistics.median(s["import"] for s in samples) * 1000, 1),
+        "time_to_first_request_ms": round(statistics.median(s["first_request"] for s in samples) * 1000, 1),
+        "heavy_modules_loaded": samples[-1]["heavy_modules"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs), indent=2))
@@ -0,0 +1,101 @@
+"""
+Watched-set representations for feed exclusion: memory, membership and load time.
+
+For users with N watched reels (out of a catalog of a million), compares the
+Python list the feed used to build, a set, and WatchedSet (sorted uint32 array):
+bytes held, time to test one feed's worth of candidates, and time to get the
+ids from the database (every Progress row as before, vs the stored blob).
+Also times the incremental update a progress write makes.
+
+    cd backend && python -m benchmarks.bench_watched_set [--sizes 1000,10000,40000,100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, Progress, UserWatchedSet
+from app.services.watched_set_service import WatchedSet, watched_set_service
+
+CATALOG = 1_000_000
+# Candidates tested per feed request (a few sources' worth)
+CANDIDATES = 800
+
+
+def deep_size(container) -> int:
+    return sys.getsizeof(container) + sum(sys.getsizeof(item) for item in container)
+
+
+def per_call_us(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return round((time.perf_counter() - start) / runs * 1e6, 2)
+
+
+def build_db(path: str, watched: list):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "l@example.com", "hashed_password": "x", "role": "learner"}])
+        conn.execute(insert(Progress), [{"user_id": 1, "reel_id": reel_id, "completed": True} for reel_id in watched])
+        conn.execute(insert(UserWatchedSet), [{"user_id": 1, "reel_ids": WatchedSet(watched).to_bytes(), "size": len(watched)}])
+    return engine
+
+
+def run(sizes: list, runs: int) -> list:
+    rng = random.Random(7)
+    candidates = [rng.randrange(1, CATALOG) for _ in range(CANDIDATES)]
+    results = []
+    for size in sizes:
+        ids = rng.sample(range(1, CATALOG), size)
+        as_list, as_set, watched = list(ids), set(ids), WatchedSet(ids)
+        result = {
+            "watched": size,
+            "memory_kb": {
+                "list": round(deep_size(as_list) / 1024, 1),
+                "set": round(deep_size(as_set) / 1024, 1),
+                "watched_set": round((sys.getsizeof(watched._ids)) / 1024, 1),
+            },
+            f"check_{CANDIDATES}_candidates_us": {
+                "list": per_call_us(lambda: [c in as_list for c in candidates], max(1, runs // 20)),
+                "set": per_call_us(lambda: [c in as_set for c in candidates], runs),
+                "watched_set": per_call_us(lambda: [c in watched for c in candidates], runs),
+            },
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_db(os.path.join(tmp, "watched.db"), ids)
+            db = sessionmaker(bind=engine)()
+            result["load_ms"] = {
+                "progress_rows": round(per_call_us(lambda: [p.reel_id for p in db.query(Progress).filter(
+                    Progress.user_id == 1, Progress.reel_id.isnot(None)
+                ).all()], 5) / 1000, 2),
+                "stored_set": round(per_call_us(lambda: watched_set_service.get(db, 1), runs) / 1000, 3),
+            }
+            fresh = iter(range(CATALOG, CATALOG + runs))
+
+            def write():
+                watched_set_service.add(db, 1, next(fresh))
+                db.commit()
+
+            result["progress_write_update_ms"] = round(per_call_us(write, min(runs, 50)) / 1000, 3)
+            db.close()
+            engine.dispose()
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,40000,100000")
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run([int(size) for size in args.sizes.split(",")], args.runs), indent=2))
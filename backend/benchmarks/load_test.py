@@ -0,0 +1,187 @@
+"""
+Scripted end-to-end load test against a running API.
+
+Each virtual user logs in as a seeded learner (see benchmarks.seed) and loops
+through a session: scroll the feed, open a reel, count the view, send watch
+heartbeats, mark it completed and occasionally read/post comments. Reports
+throughput and p50/p95/p99 latency per endpoint.
+
+    cd backend && python -m benchmarks.seed --scale 10
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.load_test --users 50 --duration 60 [--json results.json]
+
+Pass --in-process to drive the app through httpx's ASGI transport instead of
+a server (no network or uvicorn in the numbers; useful for quick A/B runs).
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from typing import Dict, List
+
+import httpx
+
+PASSWORD = "password123"
+
+
+class Recorder:
+    """Latency samples and error counts keyed by endpoint name"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(name, []))
+            endpoints[name] = {
+                "requests": len(samples),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": percentile_ms(samples, 50),
+                "p95_ms": percentile_ms(samples, 95),
+                "p99_ms": percentile_ms(samples, 99),
+                "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else None,
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "duration_s": round(elapsed, 1),
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(total / elapsed, 1),
+            "endpoints": endpoints,
+        }
+
+
+def percentile_ms(sorted_samples: List[float], pct: float):
+    if not sorted_samples:
+        return None
+    index = min(int(round(pct / 100 * (len(sorted_samples) - 1))), len(sorted_samples) - 1)
+    return round(sorted_samples[index] * 1000, 2)
+
+
+async def virtual_user(client: httpx.AsyncClient, rec: Recorder, learner: int, deadline: float, args) -> None:
+    rng = random.Random(learner)
+    response = await rec.request(
+        client, "POST /auth/login", "POST", "/api/auth/login",
+        json={"email": f"learner{learner}@example.com", "password": PASSWORD}
+    )
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def think():
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+
+    while time.perf_counter() < deadline:
+        for page in range(rng.randint(1, 3)):
+            response = await rec.request(
+                client, "GET /reels/feed", "GET", "/api/reels/feed",
+                params={"limit": 20, "offset": page * 20}, headers=headers
+            )
+            if response is None or time.perf_counter() >= deadline:
+                break
+            reels = response.json()
+            await think()
+
+            for reel in rng.sample(reels, min(len(reels), 3)):
+                reel_id = reel["id"]
+                await rec.request(client, "GET /reels/{id}", "GET", f"/api/reels/{reel_id}", headers=headers)
+                await rec.request(client, "POST /reels/{id}/view", "POST", f"/api/reels/{reel_id}/view", headers=headers)
+                for position in range(10, reel.get("duration_seconds") or 60, 15):
+                    await rec.request(
+                        client, "POST /progress/heartbeat", "POST", "/api/progress/heartbeat",
+                        json={"reel_id": reel_id, "position_seconds": position}, headers=headers
+                    )
+                if rng.random() < 0.7:
+                    await rec.request(
+                        client, "POST /progress", "POST", "/api/progress/",
+                        json={"reel_id": reel_id, "completed": True}, headers=headers
+                    )
+                if rng.random() < 0.3:
+                    await rec.request(
+                        client, "GET /comments/reel/{id}", "GET", f"/api/comments/reel/{reel_id}", headers=headers
+                    )
+                if rng.random() < 0.05:
+                    await rec.request(
+                        client, "POST /comments", "POST", "/api/comments/",
+                        json={"reel_id": reel_id, "content": "Great explanation, thanks!"}, headers=headers
+                    )
+                await think()
+
+
+async def run(args) -> dict:
+    async with AsyncExitStack() as stack:
+        if args.in_process:
+            from app.main import app
+            # ASGITransport sends no lifespan events: run startup/shutdown (search and tag
+            # indexes, trending and watch flushers) around the test, as a server would
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+        else:
+            limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+
+        rec = Recorder()
+        rng = random.Random(args.seed)
+        learners = rng.sample(range(args.learners), min(args.users, args.learners))
+        start = time.perf_counter()
+        deadline = start + args.duration
+        async with client:
+            await asyncio.gather(*(virtual_user(client, rec, n, deadline, args) for n in learners))
+        return rec.report(time.perf_counter() - start)
+
+
+def print_report(report: dict) -> None:
+    print(f"{'endpoint':<26}{'reqs':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, e in report["endpoints"].items():
+        print(
+            f"{name:<26}{e['requests']:>8}{e['errors']:>6}{e['rps']:>9}"
+            f"{e['p50_ms'] or 0:>10.1f}{e['p95_ms'] or 0:>10.1f}{e['p99_ms'] or 0:>10.1f}"
+        )
+    print(f"\n{report['requests']} requests, {report['errors']} errors in {report['duration_s']}s "
+          f"({report['rps']} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test against the EduBit API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Drive the app via ASGI transport, no server")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--learners", type=int, default=2000, help="Seeded learners to pick logins from")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between user actions")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Bulk-load realistic synthetic data for performance work.
+
+Creates learners, creators, reels (Zipf-distributed tags and views),
+micro-courses, playlists, comments and progress using chunked executemany
+inserts with explicit ids, then rebuilds the denormalized course counters.
+Every seeded user's password is `password123`; learners are
+learner{n}@example.com and creators creator{n}@example.com, numbered on
+from any seeded earlier, so repeated runs append to the database.
+
+    cd backend && python -m benchmarks.seed --scale 10          # ~10k reels
+    cd backend && python -m benchmarks.seed --reels 1000000 --progress 5000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import Base
+from app.models import (
+    User, Reel, MicroCourse, Playlist, Progress, Comment, course_reels, playlist_reels
+)
+from app.core.security import pwd_context
+from app.services.progress_service import progress_service
+
+CHUNK = 10000
+PASSWORD = "password123"
+
+TOPICS = [
+    "python", "javascript", "git", "sql", "react", "algorithms", "statistics", "calculus", "linear-algebra",
+    "spanish", "french", "finance", "marketing", "design", "photography", "physics", "chemistry", "biology",
+    "history", "writing", "public-speaking", "excel", "docker", "kubernetes", "rust", "go", "machine-learning",
+    "productivity", "negotiation", "music-theory", "drawing", "nutrition", "fitness", "economics", "philosophy",
+]
+WORDS = (
+    "learn quick guide explained basics tips intro deep dive common mistakes in 60 seconds why how what "
+    "understanding mastering the fundamentals of practical examples cheat sheet trick pattern"
+).split()
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+DIFFICULTY_WEIGHTS = [0.55, 0.32, 0.13]
+
+
+def zipf_index(rng: random.Random, n: int, s: float = 1.1) -> int:
+    """Index in [0, n) with a heavy head, like real tag and view popularity"""
+    return min(int(rng.paretovariate(s)) - 1, n - 1)
+
+
+def sentence(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(k)).capitalize()
+
+
+def next_id(conn, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def next_user_number(conn, kind: str) -> int:
+    """First n for new {kind}{n}@example.com users: runs against a seeded database append"""
+    return conn.execute(select(func.count()).select_from(User).where(User.email.like(f"{kind}%@example.com"))).scalar()
+
+
+def bulk_insert(conn, table, rows_iter, total: int, label: str) -> None:
+    start = time.perf_counter()
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<16} {total:>10,d} rows  {elapsed:7.1f}s  ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def seed(args) -> None:
+    rng = random.Random(args.seed)
+    engine = create_engine(args.database_url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _fast_sqlite(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.close()
+
+    Base.metadata.create_all(bind=engine)
+    hashed_password = pwd_context.hash(PASSWORD)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        first_user = next_id(conn, User)
+        creator_ids = list(range(first_user, first_user + args.creators))
+        learner_ids = list(range(first_user + args.creators, first_user + args.creators + args.users))
+        base = first_user
+        first_creator, first_learner = next_user_number(conn, "creator"), next_user_number(conn, "learner")
+
+        def users():
+            for uid in creator_ids + learner_ids:
+                is_creator = uid < base + args.creators
+                n = first_creator + uid - base if is_creator else first_learner + uid - base - args.creators
+                yield {
+                    "id": uid,
+                    "email": f"{'creator' if is_creator else 'learner'}{n}@example.com",
+                    "hashed_password": hashed_password,
+                    "full_name": f"{'Creator' if is_creator else 'Learner'} {n}",
+                    "role": "creator" if is_creator else "learner",
+                    "created_at": now - timedelta(days=rng.randint(0, 730)),
+                }
+        bulk_insert(conn, User.__table__, users(), len(creator_ids) + len(learner_ids), "users")
+
+        first_reel = next_id(conn, Reel)
+        reel_ids = list(range(first_reel, first_reel + args.reels))
+        reel_creator = {}
+
+        def reels():
+            for rid in reel_ids:
+                creator_id = creator_ids[zipf_index(rng, len(creator_ids))]
+                reel_creator[rid] = creator_id
+                tags = {TOPICS[zipf_index(rng, len(TOPICS))] for _ in range(rng.randint(1, 4))}
+                created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+                yield {
+                    "id": rid,
+                    "title": f"{sentence(rng, 5)} ({', '.join(sorted(tags))})",
+                    "description": sentence(rng, rng.randint(10, 40)),
+                    "video_url": f"https://res.cloudinary.com/demo/video/upload/edubit/reels/{rid}.mp4",
+                    "cloudinary_public_id": None,
+                    "tags": ",".join(sorted(tags)),
+                    "difficulty_level": rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS)[0],
+                    "duration_seconds": rng.randint(30, 90),
+                    "creator_id": creator_id,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "version": 1,
+                    "views_count": int(rng.paretovariate(1.2) * 10) - 10,
+                    "ai_summary": sentence(rng, 40) if rng.random() < 0.7 else None,
+                }
+        bulk_insert(conn, Reel.__table__, reels(), len(reel_ids), "reels")
+
+        reels_by_creator = {}
+        for rid, cid in reel_creator.items():
+            reels_by_creator.setdefault(cid, []).append(rid)
+        course_creators = [cid for cid, owned in reels_by_creator.items() if len(owned) >= 3]
+
+        first_course = next_id(conn, MicroCourse)
+        course_ids = list(range(first_course, first_course + (args.courses if course_creators else 0)))
+        course_members = {}
+
+        def courses():
+            for course_id in course_ids:
+                creator_id = rng.choice(course_creators)
+                owned = reels_by_creator[creator_id]
+                members = rng.sample(owned, min(len(owned), rng.randint(3, 12)))
+                course_members[course_id] = members
+                created_at = now - timedelta(days=rng.randint(0, 365))
+                yield {
+                    "id": course_id,
+                    "title": sentence(rng, 4),
+                    "description": sentence(rng, 20),
+                    "difficulty_level": rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS)[0],
+                    "creator_id": creator_id,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "version": 1,
+                    "reel_count": len(members),
+                }
+        bulk_insert(conn, MicroCourse.__table__, courses(), len(course_ids), "micro_courses")
+        bulk_insert(
+            conn, course_reels,
+            ({"course_id": c, "reel_id": r} for c, members in course_members.items() for r in members),
+            sum(len(m) for m in course_members.values()), "course_reels"
+        )
+
+        first_playlist = next_id(conn, Playlist)
+        playlist_ids = list(range(first_playlist, first_playlist + args.playlists))
+        playlist_members = {}
+
+        def playlists():
+            for playlist_id in playlist_ids:
+                playlist_members[playlist_id] = {
+                    reel_ids[zipf_index(rng, len(reel_ids))] for _ in range(rng.randint(1, 25))
+                }
+                created_at = now - timedelta(days=rng.randint(0, 365))
+                yield {
+                    "id": playlist_id,
+                    "title": sentence(rng, 3),
+                    "description": None,
+                    "user_id": rng.choice(learner_ids),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "version": 1,
+                }
+        bulk_insert(conn, Playlist.__table__, playlists(), len(playlist_ids), "playlists")
+        bulk_insert(
+            conn, playlist_reels,
+            ({"playlist_id": p, "reel_id": r} for p, members in playlist_members.items() for r in members),
+            sum(len(m) for m in playlist_members.values()), "playlist_reels"
+        )
+
+        def comments():
+            for _ in range(args.comments):
+                yield {
+                    "content": sentence(rng, rng.randint(3, 25)),
+                    "user_id": rng.choice(learner_ids),
+                    "reel_id": reel_ids[zipf_index(rng, len(reel_ids))],
+                    "created_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                }
+        bulk_insert(conn, Comment.__table__, comments(), args.comments, "comments")
+
+        # Heavy users watch a lot, most watch a little; one row per (user, reel)
+        seen = set()
+
+        def progress():
+            produced = 0
+            while produced < args.progress:
+                user_id = learner_ids[zipf_index(rng, len(learner_ids), 0.8)]
+                reel_id = reel_ids[zipf_index(rng, len(reel_ids), 0.9)]
+                if (user_id, reel_id) in seen:
+                    reel_id = rng.choice(reel_ids)
+                    if (user_id, reel_id) in seen:
+                        continue
+                seen.add((user_id, reel_id))
+                produced += 1
+                completed = rng.random() < 0.7
+                watched_at = now - timedelta(minutes=rng.randint(0, 180 * 24 * 60))
+                yield {
+                    "user_id": user_id,
+                    "reel_id": reel_id,
+                    "course_id": None,
+                    "completed": completed,
+                    "completed_at": watched_at if completed else None,
+                    "created_at": watched_at,
+                }
+        max_pairs = len(learner_ids) * len(reel_ids)
+        args.progress = min(args.progress, max_pairs // 2)
+        bulk_insert(conn, Progress.__table__, progress(), args.progress, "progress")
+
+        # Rebuild denormalized completion counters (reel_count was inserted above)
+        start = time.perf_counter()
+        with Session(bind=conn) as db:
+            progress_service.rebuild_all(db)
+            db.flush()
+        print(f"  {'course counters':<16} rebuilt in {time.perf_counter() - start:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic EduBit data")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the default row counts")
+    parser.add_argument("--users", type=int, help="Learners (default 2000 x scale)")
+    parser.add_argument("--creators", type=int, help="Creators (default 100 x scale)")
+    parser.add_argument("--reels", type=int, help="Reels (default 1000 x scale)")
+    parser.add_argument("--courses", type=int, help="Micro-courses (default 100 x scale)")
+    parser.add_argument("--playlists", type=int, help="Playlists (default 500 x scale)")
+    parser.add_argument("--comments", type=int, help="Comments (default 5000 x scale)")
+    parser.add_argument("--progress", type=int, help="Progress rows (default 20000 x scale)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    defaults = {"users": 2000, "creators": 100, "reels": 1000, "courses": 100,
+                "playlists": 500, "comments": 5000, "progress": 20000}
+    for name, default in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, max(int(default * args.scale), 1))
+
+    print(f"Seeding {args.database_url}")
+    start = time.perf_counter()
+    seed(args)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -65,6 +65,11 @@ export const getReel = async (id: number): Promise<Reel> => {
   return response.data;
 };
 
+// Fetching a reel doesn't count a view; call this once when playback starts
+export const recordView = async (id: number): Promise<void> => {
+  await apiClient.post(`/reels/${id}/view`);
+};
+
 export const listReels = async (params?: {
   limit?: number;
   offset?: number;
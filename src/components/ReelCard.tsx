@@ -62,7 +62,7 @@ export function ReelCard({ reel }: ReelCardProps) {
         )}
 
         {/* AI Badge */}
-        {reel.ai_summary && (
+        {(reel.has_ai_summary ?? !!reel.ai_summary) && (
           <div className="inline-block px-2 py-1 bg-purple-100 text-purple-700 text-xs rounded">
             ✨ AI Enhanced
           </div>
@@ -2,12 +2,14 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { Play, ThumbsUp, Share2, BookOpen, MessageCircle } from 'lucide-react';
 import { apiClient } from '@/api/client';
+import { recordView } from '@/api/endpoints';
 import { Reel } from '@/types';
 
 const ReelView: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
   const videoRef = useRef<HTMLVideoElement>(null);
+  const viewRecorded = useRef(false);
 
   const [reel, setReel] = useState<Reel | null>(null);
   const [loading, setLoading] = useState(true);
@@ -19,10 +21,18 @@ const ReelView: React.FC = () => {
   const [newComment, setNewComment] = useState('');
 
   useEffect(() => {
+    viewRecorded.current = false;
     loadReel();
     loadComments();
   }, [id]);
 
+  const handlePlay = () => {
+    // One view per page visit, counted when playback actually starts
+    if (viewRecorded.current || !reel) return;
+    viewRecorded.current = true;
+    recordView(reel.id).catch((error) => console.error('Failed to record view', error));
+  };
+
   const loadReel = async () => {
     try {
       const response = await apiClient.get(`/reels/${id}`);
@@ -144,6 +154,7 @@ const ReelView: React.FC = () => {
               autoPlay
               className="w-full aspect-video"
               src={reel.video_url}
+              onPlay={handlePlay}
               onError={(e) => {
                 console.error('Video playback error:', e);
               }}
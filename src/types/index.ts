@@ -26,6 +26,7 @@ export interface Reel {
   created_at: string;
   views_count: number;
   ai_summary?: string;
+  has_ai_summary?: boolean; // Feed/list cards carry this instead of ai_summary
   ai_key_points?: string[];
   ai_quiz?: {
     questions: QuizQuestion[];